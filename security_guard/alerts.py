@@ -1,44 +1,60 @@
 import asyncio
-import os
-import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import BinaryIO
 
-import cv2
+import numpy as np
 
 from . import config
+from .annotate import snapshot_encoder
 from .config import logger
 
 
+@dataclass
+class Alert:
+    """An annotated detection frame published on ``config.alert_bus``."""
+
+    camera_index: int
+    frame: np.ndarray
+
+
 class AlertSystem:
-    """Consumes detected frames from the alert queue and sends Telegram alerts.
+    """Consumes detections from the alert bus and sends Telegram alerts.
 
-    Respects a cooldown and the global mute period.
+    Respects a per-camera cooldown and the global mute period.
     """
 
     def __init__(self) -> None:
         self.cooldown: timedelta = timedelta(seconds=10)
-        self.last_sent: datetime = datetime.min
+        self.last_sent: dict[int, datetime] = {}
         self.alert_lock = config.alert_lock
+        # Keep the earliest alerts when a burst overflows the queue
+        self.subscription = config.alert_bus.subscribe(
+            "alerts",
+            maxsize=config.MAX_ALERT_QUEUE_SIZE,
+            policy="drop_newest",
+        )
 
     def run(self) -> None:
         while config.system_running:
             try:
-                # Respect mute window
-                if datetime.now() < config.mute_until:
-                    time.sleep(1)
-                    continue
+                with self.subscription.next(timeout=1.0) as alert:
+                    if alert is None:
+                        continue
 
-                if not config.alert_queue.empty():
-                    frame = config.alert_queue.get()
+                    # Respect mute window (alerts raised while muted are dropped)
+                    if datetime.now() < config.mute_until:
+                        continue
 
                     with self.alert_lock:
                         current_time = datetime.now()
-                        time_diff = (current_time - self.last_sent).total_seconds()
+                        last_sent = self.last_sent.get(alert.camera_index, datetime.min)
+                        time_diff = (current_time - last_sent).total_seconds()
 
                         if time_diff > self.cooldown.total_seconds():
-                            success = self.send_alert(frame)
+                            success = self.send_alert(alert.frame, alert.camera_index)
                             if success:
-                                self.last_sent = current_time
+                                self.last_sent[alert.camera_index] = current_time
                             else:
                                 logger.error(
                                     "Alert could not be sent; cooldown not updated"
@@ -46,25 +62,27 @@ class AlertSystem:
                         else:
                             remaining = self.cooldown.total_seconds() - time_diff
                             logger.warning(
-                                f"Cooldown active - Remaining: {remaining:.1f}s"
+                                f"Camera {alert.camera_index} cooldown active - "
+                                f"Remaining: {remaining:.1f}s"
                             )
-
-                time.sleep(0.1)
             except Exception as e:  # pragma: no cover - defensive
                 logger.error(f"Alert system error: {str(e)}")
 
-    def send_alert(self, frame) -> bool:
-        filename = f"alert_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
+    def send_alert(self, frame, camera_index: int = 0) -> bool:
         try:
             # Extra safety check for frame
             if frame is None or frame.size == 0 or len(frame.shape) != 3:
                 logger.error("Invalid frame format")
                 return False
 
-            cv2.imwrite(filename, frame)
+            # Encoded here, off the bot's event loop
+            photo = snapshot_encoder.file(
+                frame,
+                f"alert_{camera_index}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg",
+            )
 
             future = asyncio.run_coroutine_threadsafe(
-                self.async_send_alert(filename),
+                self.async_send_alert(photo, camera_index),
                 loop=config.bot_loop,
             )
 
@@ -78,18 +96,14 @@ class AlertSystem:
         except Exception as e:  # pragma: no cover - defensive
             logger.error(f"Alert error: {str(e)}")
             return False
-        finally:
-            if os.path.exists(filename):
-                os.remove(filename)
 
-    async def async_send_alert(self, filename: str) -> bool:
+    async def async_send_alert(self, photo: BinaryIO, camera_index: int = 0) -> bool:
         try:
-            with open(filename, "rb") as photo:
-                await config.bot.send_photo(
-                    chat_id=config.AUTHORIZED_USER_ID,
-                    photo=photo,
-                    caption="🚨 Person detected!",
-                )
+            await config.bot.send_photo(
+                chat_id=config.AUTHORIZED_USER_ID,
+                photo=photo,
+                caption=f"🚨 Person detected! (camera {camera_index})",
+            )
             logger.info("Alert sent")
             return True
         except Exception as e:  # pragma: no cover - defensive
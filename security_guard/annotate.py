@@ -0,0 +1,200 @@
+"""Overlays shared by alerts, recordings, the live stream and snapshots.
+
+``person_boxes`` turns a detection ``Results`` into an ``(N, 4)`` int32 array
+of person boxes in one NumPy pass, instead of converting tensor elements one
+at a time. ``Annotator`` draws all rectangles with a single
+``cv2.polylines`` call and the labels with ``cv2.putText`` from plain int
+lists. The output is identical to ``cv2.rectangle`` plus ``cv2.putText`` per
+box.
+
+``SnapshotEncoder`` turns an annotated frame into JPEG bytes in memory for
+alerts, ``/frame`` and the web app's capture, with no temp file on disk.
+
+``TimestampOverlay`` draws the capture time that frames carry as metadata
+(formatting the text once per second), so capture no longer burns it into
+every frame, where it also altered the pixels the model sees.
+
+The detection engine stores each camera's latest boxes in
+``config.detections``; ``latest_boxes`` gives consumers that run at their
+own rate (live stream, snapshots) the ones that are still current.
+"""
+
+import io
+import time
+
+import cv2
+import numpy as np
+
+from . import config
+
+PERSON_CLASS = 0
+NO_BOXES = np.zeros((0, 4), np.int32)
+
+
+def person_boxes(result, min_conf: float = 0.0) -> np.ndarray:
+    """Person boxes of an ultralytics ``Results`` as int32 ``x1, y1, x2, y2``."""
+    data = result.boxes.data
+    if not len(data):
+        return NO_BOXES
+    # Rows are x1, y1, x2, y2, [track id,] conf, cls
+    data = data.cpu().numpy()
+    keep = (data[:, -1] == PERSON_CLASS) & (data[:, -2] >= min_conf)
+    return data[keep, :4].astype(np.int32)
+
+
+def latest_boxes(camera_index: int, max_age: float = 2.0) -> np.ndarray:
+    """Person boxes of the camera's last detection pass, unless it is stale."""
+    seen = config.detections.get(camera_index)
+    if seen is None or time.monotonic() - seen[0] > max_age:
+        return NO_BOXES
+    return seen[1]
+
+
+class Annotator:
+    """Draws labelled person boxes.
+
+    ``draw`` annotates an image in place. ``render`` first copies the frame
+    into ``out`` (allocated on first use, then reused by the caller), so a
+    ring slot is only read once and no frame-sized array is allocated per
+    call.
+    """
+
+    def __init__(
+        self,
+        label: str = "Human",
+        color: tuple[int, int, int] = (0, 255, 0),
+        thickness: int = 2,
+        font_scale: float = 0.5,
+        label_offset: int = 10,
+    ) -> None:
+        self.label = label
+        self.color = color
+        self.thickness = thickness
+        self.font_scale = font_scale
+        self.label_offset = label_offset
+        (w, h), baseline = cv2.getTextSize(
+            label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness
+        )
+        # Label extent around its origin, to skip labels outside the image
+        self._label_box = (-thickness, -h - thickness, w + thickness, baseline)
+
+    def draw(self, image: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+        """Draw ``boxes`` (int32 ``x1, y1, x2, y2`` rows) and labels in place."""
+        if not len(boxes):
+            return image
+
+        corners = boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+        cv2.polylines(image, list(corners), True, self.color, self.thickness)
+
+        origins = boxes[:, :2] - (0, self.label_offset)
+        left, top, right, bottom = self._label_box
+        height, width = image.shape[:2]
+        visible = (
+            (origins[:, 0] + right > 0)
+            & (origins[:, 0] + left < width)
+            & (origins[:, 1] + bottom > 0)
+            & (origins[:, 1] + top < height)
+        )
+        for origin in origins[visible].tolist():
+            cv2.putText(
+                image,
+                self.label,
+                origin,
+                cv2.FONT_HERSHEY_SIMPLEX,
+                self.font_scale,
+                self.color,
+                self.thickness,
+            )
+        return image
+
+    def render(
+        self, frame: np.ndarray, boxes: np.ndarray, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Copy ``frame`` into ``out`` and draw ``boxes`` on the copy."""
+        if out is None or out.shape != frame.shape:
+            out = np.empty_like(frame)
+        np.copyto(out, frame)
+        return self.draw(out, boxes)
+
+
+class TimestampOverlay:
+    """Capture time text, formatted once per second and drawn on demand.
+
+    Same look as the text capture used to burn into every frame.
+    """
+
+    def __init__(
+        self,
+        origin: tuple[int, int] = (10, 30),
+        color: tuple[int, int, int] = (0, 255, 0),
+        thickness: int = 2,
+        font_scale: float = 0.6,
+        fmt: str = "%Y-%m-%d %H:%M:%S",
+    ) -> None:
+        self.origin = origin
+        self.color = color
+        self.thickness = thickness
+        self.font_scale = font_scale
+        self.fmt = fmt
+        self._text: tuple[int, str] = (-1, "")
+
+    def text(self, wall: float) -> str:
+        """Formatted local time of ``wall`` (seconds since the epoch)."""
+        second = int(wall)
+        cached_second, text = self._text
+        if second != cached_second:
+            text = time.strftime(self.fmt, time.localtime(second))
+            self._text = (second, text)
+        return text
+
+    def draw(self, image: np.ndarray, wall: float) -> np.ndarray:
+        """Draw the time ``wall`` in place; frames without a time are left as is."""
+        if wall:
+            cv2.putText(
+                image,
+                self.text(wall),
+                self.origin,
+                cv2.FONT_HERSHEY_SIMPLEX,
+                self.font_scale,
+                self.color,
+                self.thickness,
+            )
+        return image
+
+
+class SnapshotEncoder:
+    """JPEG-encodes snapshots in memory.
+
+    Frames wider than ``max_width`` are downscaled first (aspect ratio
+    kept), then encoded at ``quality``. The bytes go to Telegram or Flask
+    as they are, so a busy disk cannot delay an alert.
+    """
+
+    def __init__(self, quality: int = 90, max_width: int | None = None) -> None:
+        self.quality = quality
+        self.max_width = max_width
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+    def encode(self, image: np.ndarray) -> bytes:
+        height, width = image.shape[:2]
+        if self.max_width and width > self.max_width:
+            size = (self.max_width, round(height * self.max_width / width))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", image, self.params)
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        return buffer.tobytes()
+
+    def file(self, image: np.ndarray, name: str) -> io.BytesIO:
+        """``encode`` as a named in-memory file (Telegram uses the name)."""
+        data = io.BytesIO(self.encode(image))
+        data.name = name
+        return data
+
+
+# Shared renderers; they keep no per-call state
+annotator = Annotator()
+timestamp_overlay = TimestampOverlay()
+snapshot_encoder = SnapshotEncoder(
+    config.SNAPSHOT.get("quality", 90), config.SNAPSHOT.get("max_width")
+)
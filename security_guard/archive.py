@@ -0,0 +1,79 @@
+import os
+import zipfile
+from collections.abc import Iterator
+
+from .config import logger
+
+# Local header + central directory record of one entry, without the name
+# (30 + 46 bytes, plus Zip64 extra fields), and the end records
+_ENTRY_OVERHEAD = 30 + 46 + 2 * 32
+_END_OVERHEAD = 22 + 56 + 20
+
+
+def _entry_size(path: str, arcname: str) -> int | None:
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return None
+    return size + _ENTRY_OVERHEAD + 2 * len(arcname.encode())
+
+
+def plan_parts(
+    files: list[str], root: str, max_bytes: int
+) -> list[list[tuple[str, str]]]:
+    """Group ``files`` in order into parts whose ZIP stays under ``max_bytes``.
+
+    Each entry is ``(path, name in the archive)``; names are relative to
+    ``root`` (``camera/year/.../minute.avi``, minute names alone collide).
+    A file that is larger than ``max_bytes`` on its own gets its own part.
+    Sizes are taken now, so ``files`` must be complete (not being written);
+    files deleted since the lookup are left out.
+    """
+    parts: list[list[tuple[str, str]]] = []
+    size = max_bytes
+    for path in files:
+        arcname = os.path.relpath(path, root).replace(os.sep, "/")
+        entry = _entry_size(path, arcname)
+        if entry is None:
+            # Deleted since the lookup (retention, /delete)
+            logger.warning(f"{arcname} is gone, left out of the archive")
+            continue
+        if size + entry > max_bytes:
+            parts.append([])
+            size = _END_OVERHEAD
+            if entry + size > max_bytes:
+                logger.warning(f"{arcname} alone is over the archive part size")
+        parts[-1].append((path, arcname))
+        size += entry
+    return parts
+
+
+def write_zip(path: str, entries: list[tuple[str, str]]) -> None:
+    """Write a stored (uncompressed) ZIP of ``entries``.
+
+    Video is already compressed, so deflating it costs CPU for nothing;
+    each file is streamed into the archive in chunks, without a copy.
+    """
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for source, arcname in entries:
+            try:
+                archive.write(source, arcname)
+            except FileNotFoundError:
+                # Deleted since the lookup (retention, /delete)
+                logger.warning(f"{arcname} is gone, left out of {path}")
+
+
+def export_parts(
+    files: list[str], root: str, name: str, folder: str, max_bytes: int
+) -> Iterator[str]:
+    """Write ``files`` as ``name.zip`` or ``name.partNofM.zip`` in ``folder``.
+
+    Yields each part as soon as it is complete, so it can be sent while the
+    next one is written.
+    """
+    parts = plan_parts(files, root, max_bytes)
+    for number, entries in enumerate(parts, 1):
+        suffix = f".part{number}of{len(parts)}" if len(parts) > 1 else ""
+        path = os.path.join(folder, f"{name}{suffix}.zip")
+        write_zip(path, entries)
+        yield path
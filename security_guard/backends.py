@@ -0,0 +1,393 @@
+"""CPU inference backends for the person detector.
+
+``InferenceBackend`` keeps the ultralytics ``predict`` interface (a list of
+``Results`` per call, which the trackers consume) but can run the model in
+a faster runtime than PyTorch FP32:
+
+    "pytorch"    the ``.pt`` weights as-is
+    "onnx"       exported ONNX model run by ONNX Runtime
+    "openvino"   exported OpenVINO IR (needs the ``openvino`` package)
+
+Exports are cached next to the weights and rebuilt when the weights are
+newer. Options on top of any exported backend:
+
+    person_only  cut the classification head down to the person class, so
+                 the exported model scores 1 class instead of 80
+    imgsz        inference input size (multiple of 32)
+    int8         static INT8 post-training quantization, calibrated on
+                 frames sampled from our own recordings
+"""
+
+import glob
+import inspect
+import logging
+import os
+import shutil
+import time
+
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+from ultralytics.engine.results import Results
+
+try:
+    from ultralytics.utils.nms import non_max_suppression
+except ImportError:  # pragma: no cover - ultralytics < 8.3.160
+    from ultralytics.utils.ops import non_max_suppression
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+
+logger = logging.getLogger(__name__)
+
+
+def person_only_head(yolo: YOLO) -> YOLO:
+    """Reduce a COCO detector in place to a single "person" output class."""
+    head = yolo.model.model[-1]
+    for branch in ("cv3", "one2one_cv3"):
+        for layers in getattr(head, branch, None) or []:
+            conv = layers[-1]
+            person = torch.nn.Conv2d(conv.in_channels, 1, 1)
+            with torch.no_grad():
+                person.weight.copy_(conv.weight[:1])
+                person.bias.copy_(conv.bias[:1])
+            layers[-1] = person
+
+    head.nc = 1
+    head.no = 1 + 4 * head.reg_max
+    yolo.model.nc = 1
+    yolo.model.yaml["nc"] = 1
+    yolo.model.names = {0: "person"}
+    return yolo
+
+
+def _letterbox(frame: np.ndarray, imgsz: int) -> np.ndarray:
+    """Resize and pad ``frame`` to a square NCHW float input like ultralytics."""
+    h, w = frame.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    resized = cv2.resize(frame, (round(w * scale), round(h * scale)))
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - resized.shape[0]) // 2
+    left = (imgsz - resized.shape[1]) // 2
+    canvas[top : top + resized.shape[0], left : left + resized.shape[1]] = resized
+    return canvas[None, :, :, ::-1].transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+
+
+def calibration_frames(
+    video_dir: str, count: int = 200, per_file: int = 10
+) -> list[np.ndarray]:
+    """Sample up to ``count`` BGR frames from the newest recordings."""
+    paths = glob.glob(os.path.join(video_dir, "**", "*.avi"), recursive=True)
+    paths += glob.glob(os.path.join(video_dir, "**", "*.mp4"), recursive=True)
+    paths.sort(key=os.path.getmtime, reverse=True)
+
+    frames: list[np.ndarray] = []
+    for path in paths:
+        if len(frames) >= count:
+            break
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for pos in np.linspace(0, max(total - 1, 0), min(per_file, max(total, 1))):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(pos))
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+            if len(frames) >= count:
+                break
+        cap.release()
+    return frames
+
+
+def quantize_onnx(
+    fp32_path: str, int8_path: str, frames: list[np.ndarray], imgsz: int
+) -> str:
+    """Static INT8 (QDQ) quantization of an ONNX model with ONNX Runtime."""
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class _Frames(CalibrationDataReader):
+        def __init__(self) -> None:
+            self._batches = iter({"images": _letterbox(f, imgsz)} for f in frames)
+
+        def get_next(self):
+            return next(self._batches, None)
+
+    # Shape inference and graph folding first, so conv biases are constants
+    prepared = f"{os.path.splitext(int8_path)[0]}_prep.onnx"
+    quant_pre_process(fp32_path, prepared, skip_symbolic_shape=True)
+    quantize_static(
+        prepared,
+        int8_path,
+        _Frames(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    os.remove(prepared)
+
+    # Keep the ultralytics metadata (names, stride, imgsz) of the FP32 export
+    source, quantized = onnx.load(fp32_path), onnx.load(int8_path)
+    onnx.helper.set_model_props(
+        quantized, {p.key: p.value for p in source.metadata_props}
+    )
+    onnx.save(quantized, int8_path)
+    return int8_path
+
+
+def _openvino_from_onnx(onnx_path: str, out_dir: str) -> str:
+    """Convert an (INT8 QDQ) ONNX model to OpenVINO IR readable by ultralytics."""
+    import onnx
+    import openvino as ov
+    import yaml
+
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.basename(out_dir).removesuffix("_openvino_model")
+    ov.save_model(ov.convert_model(onnx_path), os.path.join(out_dir, f"{stem}.xml"))
+
+    metadata = {
+        p.key: p.value
+        for p in onnx.load(onnx_path, load_external_data=False).metadata_props
+    }
+    for key in ("names", "stride", "imgsz", "batch"):
+        if key in metadata:
+            metadata[key] = yaml.safe_load(metadata[key])
+    with open(os.path.join(out_dir, "metadata.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(metadata, f, sort_keys=False)
+    return out_dir
+
+
+class InferenceBackend:
+    """YOLO person detector on the configured runtime.
+
+    ``predict(frames)`` returns one ultralytics ``Results`` per frame whatever
+    the backend, so detection, tracking and annotation code is shared.
+    It is split into ``preprocess`` (letterbox and normalise), ``forward``
+    (the model only) and ``postprocess`` (NMS and boxes back to frame
+    coordinates), so that a pipeline can run the three on separate threads.
+    Frames passed in one call must all have the same shape.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        backend: str = "pytorch",
+        imgsz: int = 640,
+        person_only: bool = False,
+        int8: bool = False,
+        conf: float = 0.25,
+        calibration_dir: str | None = None,
+        calibration_count: int = 200,
+    ) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}")
+        if imgsz % 32:
+            raise ValueError("imgsz must be a multiple of 32")
+
+        self.model_path = model_path
+        self.backend = backend
+        self.imgsz = imgsz
+        self.person_only = person_only
+        self.int8 = int8 and backend != "pytorch"
+        self.conf = conf
+        self.calibration_dir = calibration_dir
+        self.calibration_count = calibration_count
+
+        self.weights = self.prepare()
+        self.model = YOLO(self.weights, task="detect")
+        if backend == "pytorch":
+            self.model = self.model.float()
+            if person_only:
+                person_only_head(self.model)
+        self._runtime = None
+        self._nms_args: dict = {}
+
+    @classmethod
+    def from_config(
+        cls, settings: dict, model_path: str, calibration_dir: str | None = None
+    ) -> "InferenceBackend":
+        """Build a backend from the ``INFERENCE`` config section."""
+        return cls(
+            model_path,
+            backend=settings.get("backend", "pytorch"),
+            imgsz=settings.get("imgsz", 640),
+            person_only=settings.get("person_only", False),
+            int8=settings.get("int8", False),
+            conf=settings.get("conf", 0.25),
+            calibration_dir=settings.get("calibration_dir", calibration_dir),
+            calibration_count=settings.get("calibration_frames", 200),
+        )
+
+    @property
+    def label(self) -> str:
+        parts = [self.backend, str(self.imgsz)]
+        if self.person_only:
+            parts.append("person")
+        if self.int8:
+            parts.append("int8")
+        return "-".join(parts)
+
+    def export_path(self, fmt: str | None = None, int8: bool | None = None) -> str:
+        """Cache path of the exported model for the given (or current) options."""
+        fmt = fmt or self.backend
+        int8 = self.int8 if int8 is None else int8
+        stem = f"{os.path.splitext(self.model_path)[0]}_{self.imgsz}"
+        if self.person_only:
+            stem += "_person"
+        if int8:
+            stem += "_int8"
+        if fmt == "openvino":
+            return f"{stem}_openvino_model"
+        return f"{stem}.onnx"
+
+    def _stale(self, path: str) -> bool:
+        return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(
+            self.model_path
+        )
+
+    def prepare(self) -> str:
+        """Export (and quantize) the model unless a fresh export is cached."""
+        if self.backend == "pytorch":
+            return self.model_path
+
+        target = self.export_path()
+        if not self._stale(target):
+            return target
+
+        if not self.int8:
+            return self._export(self.backend)
+
+        frames = calibration_frames(self.calibration_dir or "", self.calibration_count)
+        if not frames:
+            logger.error(
+                f"No recordings in {self.calibration_dir} to calibrate INT8, "
+                "using the FP32 model"
+            )
+            self.int8 = False
+            return self.prepare()
+
+        onnx_fp32 = self.export_path("onnx", int8=False)
+        if self._stale(onnx_fp32):
+            self._export("onnx")
+        onnx_int8 = quantize_onnx(
+            onnx_fp32, self.export_path("onnx", int8=True), frames, self.imgsz
+        )
+        logger.info(f"Quantized {onnx_fp32} to INT8 on {len(frames)} frames")
+        if self.backend == "onnx":
+            return onnx_int8
+        return _openvino_from_onnx(onnx_int8, target)
+
+    def _export(self, fmt: str) -> str:
+        """Export the FP32 model with ultralytics and move it to its cache path."""
+        yolo = YOLO(self.model_path).float()
+        if self.person_only:
+            person_only_head(yolo)
+
+        exported = yolo.export(
+            format=fmt, imgsz=self.imgsz, dynamic=True, simplify=False, device="cpu"
+        )
+        target = self.export_path(fmt, int8=False)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.move(str(exported), target)
+        logger.info(f"Exported {self.model_path} to {target}")
+        return target
+
+    @property
+    def runtime(self):
+        """The ultralytics ``AutoBackend`` running the weights on this runtime."""
+        if self._runtime is None:
+            # One tiny predict() builds the predictor and its AutoBackend
+            self.model.predict(
+                np.zeros((32, 32, 3), np.uint8), imgsz=32, device="cpu", verbose=False
+            )
+            self._runtime = self.model.predictor.model
+            if "end2end" in inspect.signature(non_max_suppression).parameters:
+                self._nms_args["end2end"] = getattr(self._runtime, "end2end", False)
+        return self._runtime
+
+    def preprocess(
+        self, frames: list[np.ndarray], imgsz: int | None = None
+    ) -> tuple[np.ndarray, tuple[float, int, int]]:
+        """Letterbox BGR frames into one normalised NCHW float32 batch.
+
+        The longest side is scaled to ``imgsz`` and the other padded up to a
+        multiple of 32. Returns the batch and ``(scale, left, top)`` for
+        mapping boxes back.
+        """
+        imgsz = imgsz or self.imgsz
+        h, w = frames[0].shape[:2]
+        scale = min(imgsz / h, imgsz / w)
+        new_w, new_h = round(w * scale), round(h * scale)
+        pad_w, pad_h = -new_w % 32, -new_h % 32
+        left, top = pad_w // 2, pad_h // 2
+
+        canvas = np.full((len(frames), new_h + pad_h, new_w + pad_w, 3), 114, np.uint8)
+        for i, frame in enumerate(frames):
+            cv2.resize(
+                frame,
+                (new_w, new_h),
+                dst=canvas[i, top : top + new_h, left : left + new_w],
+                interpolation=cv2.INTER_LINEAR,
+            )
+        batch = canvas[..., ::-1].transpose(0, 3, 1, 2).astype(np.float32)
+        batch *= 1 / 255.0
+        return batch, (scale, left, top)
+
+    def forward(self, batch: np.ndarray):
+        """Run the model on a preprocessed batch; returns raw predictions."""
+        runtime = self.runtime
+        with torch.inference_mode():
+            return runtime(torch.from_numpy(batch))
+
+    def postprocess(
+        self,
+        preds,
+        frames: list[np.ndarray],
+        letterbox: tuple[float, int, int],
+        iou: float = 0.7,
+    ) -> list[Results]:
+        """NMS and boxes back to frame coordinates, one ``Results`` per frame."""
+        scale, left, top = letterbox
+        h, w = frames[0].shape[:2]
+        detections = non_max_suppression(
+            preds, self.conf, iou, max_det=300, **self._nms_args
+        )
+
+        results = []
+        for frame, det in zip(frames, detections, strict=True):
+            det = det[:, :6].clone()
+            det[:, [0, 2]] = ((det[:, [0, 2]] - left) / scale).clamp(0, w)
+            det[:, [1, 3]] = ((det[:, [1, 3]] - top) / scale).clamp(0, h)
+            results.append(Results(frame, path="", names=self.names, boxes=det))
+        return results
+
+    @property
+    def names(self) -> dict[int, str]:
+        return self.runtime.names
+
+    def predict(
+        self, frames: list[np.ndarray], imgsz: int | None = None
+    ) -> list[Results]:
+        """Preprocess, forward and postprocess in one call."""
+        batch, letterbox = self.preprocess(frames, imgsz)
+        return self.postprocess(self.forward(batch), frames, letterbox)
+
+    def warmup(self, batches: list[tuple[int, tuple[int, ...], int]]) -> float:
+        """Run dummy frames through the model before the first real batch.
+
+        ``batches`` lists the ``(count, frame shape, imgsz)`` inputs detection
+        will use, so the runtime is built and its first-call allocations and
+        kernel selection happen here. Returns the seconds taken.
+        """
+        start = time.perf_counter()
+        for count, shape, imgsz in batches:
+            if count:
+                self.predict([np.zeros(shape, np.uint8)] * count, imgsz)
+        return time.perf_counter() - start
@@ -0,0 +1,2070 @@
+"""Micro-benchmarks for the capture and detection pipeline.
+
+These run without cameras, a YOLO model or Telegram, so they only import the
+pieces of ``security_guard`` they exercise.
+
+Usage:
+    python -m security_guard.benchmarks frame-ring --cameras 4 --readers 4
+    python -m security_guard.benchmarks bus --subscribers 4
+    python -m security_guard.benchmarks camera-scaling --cameras 1 4 8
+    python -m security_guard.benchmarks motion-gate --method diff
+    python -m security_guard.benchmarks batched-inference --model yolo11n.pt
+    python -m security_guard.benchmarks scheduler --cameras 16 --max-ips 20
+    python -m security_guard.benchmarks zones --model yolo11n.pt
+    python -m security_guard.benchmarks alert-dedupe --minutes 60
+    python -m security_guard.benchmarks pipeline --model yolo11n.pt --cameras 4
+    python -m security_guard.benchmarks startup --model yolo11n.pt
+    python -m security_guard.benchmarks annotate --boxes 0 1 10 50 200
+    python -m security_guard.benchmarks timestamp --frames 2000
+    python -m security_guard.benchmarks decode --demand 25 10 5
+    python -m security_guard.benchmarks recorder-queue --cameras 4 --stall 20
+    python -m security_guard.benchmarks rollover --rollovers 100
+    python -m security_guard.benchmarks encoder --seconds 120 --crf 23
+    python -m security_guard.benchmarks event-recording --minutes 10 --person 30 45
+    python -m security_guard.benchmarks segment-index --days 7 --cameras 4
+    python -m security_guard.benchmarks retention --files 120 --batch 20
+    python -m security_guard.benchmarks clip-window --minutes 7 --window 300
+    python -m security_guard.benchmarks clip-export --seconds 300 --max-mb 10
+    python -m security_guard.benchmarks archive --cameras 2 --files 30 --part-mb 48
+    python -m security_guard.benchmarks snapshot --size 1920 1080 --max-width 1280
+    python -m security_guard.benchmarks backends --model yolo11n.pt \
+        --videos /path/to/videos --backends pytorch onnx onnx:int8
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import statistics
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime
+
+import numpy as np
+
+from .bus import FrameBus
+from .framebuffer import FrameRing, SharedFrameRing
+
+
+class _TimedLock:
+    """Lock wrapper that accumulates the time spent waiting to acquire."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.wait = 0.0
+        self.acquisitions = 0
+
+    def __enter__(self) -> "_TimedLock":
+        start = time.perf_counter()
+        self._lock.acquire()
+        self.wait += time.perf_counter() - start
+        self.acquisitions += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._lock.release()
+
+
+def _run_threads(
+    targets: list[Callable[[threading.Event], None]], seconds: float
+) -> None:
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=target, args=(stop,), daemon=True) for target in targets
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+
+def _bench_dict(
+    source: np.ndarray, cameras: int, readers: int, seconds: float
+) -> dict[str, float]:
+    """The previous pattern: dict of frames + per-camera lock + ``.copy()``."""
+    latest: dict[int, np.ndarray | None] = {idx: None for idx in range(cameras)}
+    locks = {idx: _TimedLock() for idx in range(cameras)}
+    counts = {"allocs": 0, "bytes": 0, "reads": 0, "writes": 0}
+    counts_lock = threading.Lock()
+
+    def writer(idx: int) -> Callable[[threading.Event], None]:
+        def run(stop: threading.Event) -> None:
+            allocs = writes = 0
+            while not stop.is_set():
+                frame = source.copy()  # cv2.resize allocated a new frame
+                allocs += 1
+                with locks[idx]:
+                    latest[idx] = frame
+                writes += 1
+                time.sleep(0.001)
+            with counts_lock:
+                counts["allocs"] += allocs
+                counts["bytes"] += allocs * source.nbytes
+                counts["writes"] += writes
+
+        return run
+
+    def reader(idx: int) -> Callable[[threading.Event], None]:
+        def run(stop: threading.Event) -> None:
+            allocs = reads = 0
+            while not stop.is_set():
+                with locks[idx]:
+                    frame = latest[idx]
+                    frame = frame.copy() if frame is not None else None
+                if frame is not None:
+                    allocs += 1
+                    reads += 1
+                    int(frame[::64, ::64, 0].sum())
+                time.sleep(0.001)
+            with counts_lock:
+                counts["allocs"] += allocs
+                counts["bytes"] += allocs * source.nbytes
+                counts["reads"] += reads
+
+        return run
+
+    targets = [writer(i) for i in range(cameras)]
+    targets += [reader(i) for i in range(cameras) for _ in range(readers)]
+    _run_threads(targets, seconds)
+
+    counts["lock_wait"] = sum(lock.wait for lock in locks.values())
+    counts["acquisitions"] = sum(lock.acquisitions for lock in locks.values())
+    return counts
+
+
+def _bench_ring(
+    source: np.ndarray, cameras: int, readers: int, seconds: float, slots: int
+) -> dict[str, float]:
+    """The frame ring: in-place writes and pinned read-only views."""
+    rings = {idx: FrameRing(source.shape, slots=slots) for idx in range(cameras)}
+    locks = {idx: _TimedLock() for idx in range(cameras)}
+    for idx, ring in rings.items():
+        ring._lock = locks[idx]
+    counts = {"allocs": 0, "bytes": 0, "reads": 0, "writes": 0}
+    counts_lock = threading.Lock()
+
+    def writer(idx: int) -> Callable[[threading.Event], None]:
+        def run(stop: threading.Event) -> None:
+            writes = 0
+            ring = rings[idx]
+            while not stop.is_set():
+                slot = ring.writable_slot()
+                if slot is not None:
+                    np.copyto(slot, source)  # cv2.resize(..., dst=slot)
+                    ring.publish()
+                    writes += 1
+                time.sleep(0.001)
+            with counts_lock:
+                counts["writes"] += writes
+
+        return run
+
+    def reader(idx: int) -> Callable[[threading.Event], None]:
+        def run(stop: threading.Event) -> None:
+            reads = 0
+            ring = rings[idx]
+            while not stop.is_set():
+                with ring.read() as frame:
+                    if frame is not None:
+                        reads += 1
+                        int(frame.image[::64, ::64, 0].sum())
+                time.sleep(0.001)
+            with counts_lock:
+                counts["reads"] += reads
+
+        return run
+
+    targets = [writer(i) for i in range(cameras)]
+    targets += [reader(i) for i in range(cameras) for _ in range(readers)]
+    _run_threads(targets, seconds)
+
+    counts["lock_wait"] = sum(lock.wait for lock in locks.values())
+    counts["acquisitions"] = sum(lock.acquisitions for lock in locks.values())
+    return counts
+
+
+def bench_frame_ring(args: argparse.Namespace) -> None:
+    """Compare the latest-frame dict against ``FrameRing``."""
+    width, height = args.size
+    source = np.random.default_rng(0).integers(
+        0, 255, size=(height, width, 3), dtype=np.uint8
+    )
+
+    rows = [
+        (
+            "dict+lock+copy",
+            _bench_dict(source, args.cameras, args.readers, args.seconds),
+        ),
+        (
+            "frame ring",
+            _bench_ring(source, args.cameras, args.readers, args.seconds, args.slots),
+        ),
+    ]
+
+    print(
+        f"{args.cameras} cameras x {args.readers} readers, "
+        f"{width}x{height}, {args.seconds:.1f}s"
+    )
+    print(
+        f"{'variant':<16} {'writes/s':>10} {'reads/s':>10} {'allocs/s':>10} "
+        f"{'MB alloc/s':>11} {'lock wait ms':>13} {'wait/acq us':>12}"
+    )
+    for name, c in rows:
+        per_acq = c["lock_wait"] / max(c["acquisitions"], 1) * 1e6
+        print(
+            f"{name:<16} {c['writes'] / args.seconds:>10.0f} "
+            f"{c['reads'] / args.seconds:>10.0f} "
+            f"{c['allocs'] / args.seconds:>10.0f} "
+            f"{c['bytes'] / args.seconds / 1e6:>11.1f} "
+            f"{c['lock_wait'] * 1e3:>13.1f} {per_acq:>12.2f}"
+        )
+
+
+def _sleep_poll_subscriber(
+    latest: dict[str, int], stop: threading.Event, interval: float
+) -> None:
+    """The previous worker loop: check for work, then sleep."""
+    seen = -1
+    while not stop.is_set():
+        if latest["seq"] != seen:
+            seen = latest["seq"]
+        time.sleep(interval)
+
+
+def bench_bus(args: argparse.Namespace) -> None:
+    """Idle CPU and publish-to-wake latency: sleep polling vs ``FrameBus``."""
+    # Idle CPU: nothing is published, workers just wait
+    stop = threading.Event()
+    latest = {"seq": -1}
+    threads = [
+        threading.Thread(
+            target=_sleep_poll_subscriber, args=(latest, stop, 0.01), daemon=True
+        )
+        for _ in range(args.subscribers)
+    ]
+    cpu = time.process_time()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    poll_cpu = time.process_time() - cpu
+
+    bus = FrameBus("bench", ring=FrameRing((8, 8, 3), slots=4))
+    subs = [bus.subscribe(f"sub-{i}") for i in range(args.subscribers)]
+    stop = threading.Event()
+    latencies: list[float] = []
+    lat_lock = threading.Lock()
+
+    def wait_loop(sub) -> None:
+        while not stop.is_set():
+            with sub.next(timeout=0.5) as frame:
+                if frame is None:
+                    continue
+                waited = time.perf_counter() - sent[frame.seq]
+            with lat_lock:
+                latencies.append(waited)
+
+    sent: dict[int, float] = {}
+    threads = [
+        threading.Thread(target=wait_loop, args=(sub,), daemon=True) for sub in subs
+    ]
+    cpu = time.process_time()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    bus_cpu = time.process_time() - cpu
+
+    # Latency: publish at camera rate and time until each subscriber wakes
+    for _ in range(args.frames):
+        bus.ring.writable_slot()
+        sent[bus.ring.seq + 1] = time.perf_counter()
+        bus.publish_frame()
+        time.sleep(0.04)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(f"{args.subscribers} idle subscribers, {args.seconds:.1f}s")
+    print(f"  sleep(0.01) polling CPU: {poll_cpu * 1e3:8.1f} ms")
+    print(f"  FrameBus idle CPU:       {bus_cpu * 1e3:8.1f} ms")
+    if latencies:
+        print(
+            f"  publish->wake latency:   median "
+            f"{statistics.median(latencies) * 1e6:.0f} us, "
+            f"max {max(latencies) * 1e6:.0f} us "
+            f"(sleep polling adds up to 10000 us per stage)"
+        )
+
+
+def _synthetic_capture(ring: FrameRing, stop, sensor_size: tuple[int, int]) -> None:
+    """Capture-loop stand-in: synthetic source, resize, timestamp, publish."""
+    import cv2
+
+    from .sources import SyntheticSource
+
+    height, width = ring.shape[:2]
+    # A person is always walking through, so consecutive frames differ
+    source = SyntheticSource(
+        sensor_size, realtime=False, person_windows=[(0, 4)], period=4
+    )
+    raw = None
+    while not stop.is_set():
+        ret, raw = source.read(raw)
+        slot = ring.writable_slot()
+        if not ret or slot is None:
+            continue
+        cv2.resize(raw, (width, height), dst=slot)
+        cv2.putText(
+            slot,
+            time.strftime("%Y-%m-%d %H:%M:%S"),
+            (10, 30),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            (0, 255, 0),
+            2,
+        )
+        ring.publish()
+
+
+def _encode_consumer(rings: list[FrameRing], stop: threading.Event) -> None:
+    """Parent-side consumer: JPEG-encode the newest frame of each camera."""
+    import cv2
+
+    while not stop.is_set():
+        for ring in rings:
+            with ring.read() as frame:
+                if frame is not None:
+                    cv2.imencode(".jpg", frame.image)
+        time.sleep(0.02)
+
+
+def _scaling_run(cameras: int, mode: str, args: argparse.Namespace) -> list[float]:
+    width, height = args.size
+    shape = (height, width, 3)
+    sensor = tuple(args.sensor)
+
+    if mode == "threads":
+        stop = threading.Event()
+        rings: list[FrameRing] = [FrameRing(shape) for _ in range(cameras)]
+        workers = [
+            threading.Thread(
+                target=_synthetic_capture, args=(ring, stop, sensor), daemon=True
+            )
+            for ring in rings
+        ]
+    else:
+        stop = mp.Event()
+        rings = [SharedFrameRing(shape) for _ in range(cameras)]
+        workers = [
+            mp.Process(
+                target=_synthetic_capture, args=(ring, stop, sensor), daemon=True
+            )
+            for ring in rings
+        ]
+
+    consumer_stop = threading.Event()
+    consumer = threading.Thread(
+        target=_encode_consumer, args=(rings, consumer_stop), daemon=True
+    )
+    for w in workers:
+        w.start()
+    consumer.start()
+
+    # Let processes start up before measuring
+    time.sleep(1.0)
+    start = [ring.seq for ring in rings]
+    time.sleep(args.seconds)
+    fps = [
+        (ring.seq - s0) / args.seconds for ring, s0 in zip(rings, start, strict=True)
+    ]
+
+    stop.set()
+    consumer_stop.set()
+    for w in workers:
+        w.join()
+    consumer.join()
+    if mode == "processes":
+        for ring in rings:
+            ring.close()
+    return fps
+
+
+def bench_camera_scaling(args: argparse.Namespace) -> None:
+    """Per-camera capture FPS with thread-per-camera vs process-per-camera."""
+    print(
+        f"synthetic {args.sensor[0]}x{args.sensor[1]} -> "
+        f"{args.size[0]}x{args.size[1]}, {args.seconds:.1f}s, "
+        f"{os.cpu_count()} CPUs"
+    )
+    print(f"{'mode':<10} {'cameras':>8} {'mean fps/cam':>13} {'min fps/cam':>12}")
+    for mode in ("threads", "processes"):
+        for cameras in args.cameras:
+            fps = _scaling_run(cameras, mode, args)
+            print(
+                f"{mode:<10} {cameras:>8} {statistics.mean(fps):>13.1f} "
+                f"{min(fps):>12.1f}"
+            )
+
+
+def bench_motion_gate(args: argparse.Namespace) -> None:
+    """Skipped-inference fraction and per-frame cost of ``MotionGate``."""
+    from .motion import MotionGate
+    from .sources import SyntheticSource
+
+    size = tuple(args.size)
+    source = SyntheticSource(
+        size,
+        fps=args.fps,
+        realtime=False,
+        person_windows=[(10, 16), (40, 44)],
+        period=60,
+    )
+    gate = MotionGate(
+        size,
+        method=args.method,
+        threshold=args.threshold,
+        min_area=args.min_area,
+        keepalive=args.keepalive,
+    )
+
+    frames = int(args.minutes * 60 * args.fps)
+    step = max(int(args.fps / args.detect_fps), 1)
+    raw = None
+    missed = 0
+    cost = 0.0
+    for n in range(frames):
+        ret, raw = source.read(raw)
+        if n % step:
+            continue
+        t = n / args.fps
+        start = time.perf_counter()
+        run = gate.should_infer(raw, now=t)
+        cost += time.perf_counter() - start
+        if not run and source.person_progress(t) is not None:
+            missed += 1
+
+    print(
+        f"{args.method}: {gate.frames} checks over {args.minutes:.0f} simulated "
+        f"minutes, skipped {gate.skipped_fraction:.1%} of inferences, "
+        f"{cost / max(gate.frames, 1) * 1e6:.0f} us per check, "
+        f"{missed} person frames without inference"
+    )
+
+
+def bench_batched_inference(args: argparse.Namespace) -> None:
+    """Inferences/s per camera: N sequential calls vs one batched call."""
+    from ultralytics import YOLO
+
+    from .sources import SyntheticSource
+
+    model = YOLO(args.model).float()
+    size = tuple(args.size)
+
+    print(f"{args.model}, {size[0]}x{size[1]}, {args.rounds} rounds")
+    print(f"{'cameras':>8} {'sequential inf/s/cam':>21} {'batched inf/s/cam':>18}")
+    for cameras in args.cameras:
+        frames = []
+        for seed in range(cameras):
+            source = SyntheticSource(
+                size, realtime=False, person_windows=[(0, 60)], seed=seed
+            )
+            for _ in range(10 * (seed + 1)):
+                source.grab()
+            frames.append(source.retrieve()[1])
+
+        # Warm-up (first call builds the predictor)
+        model.predict(frames, verbose=False)
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for frame in frames:
+                model.predict(frame, verbose=False)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            model.predict(frames, verbose=False)
+        batched = time.perf_counter() - start
+
+        print(
+            f"{cameras:>8} {args.rounds / sequential:>21.2f} "
+            f"{args.rounds / batched:>18.2f}"
+        )
+
+
+def _simulate_schedule(
+    args: argparse.Namespace,
+    adaptive: bool,
+    arrivals: list[tuple[float, int]],
+    motion: bool = False,
+) -> dict[str, float]:
+    """Replay person arrivals on a virtual clock; no model is run.
+
+    With ``motion``, a person moving in view is seen by the motion check
+    on every frame delivered to detection (``active_fps`` per camera), as
+    ``DetectionEngine.gather`` does before asking the scheduler.
+    """
+    from .scheduler import DetectionScheduler
+
+    cameras = list(range(args.cameras))
+    if adaptive:
+        scheduler = DetectionScheduler(
+            cameras,
+            max_ips=args.max_ips,
+            active_fps=args.active_fps,
+            idle_fps=args.idle_fps,
+            hold=args.hold,
+            half_life=args.half_life,
+        )
+    else:
+        # Fixed cadence: every camera gets an equal share of the budget
+        share = args.max_ips / args.cameras
+        scheduler = DetectionScheduler(
+            cameras, max_ips=args.max_ips, active_fps=share, idle_fps=share
+        )
+
+    pending: dict[int, float] = {}
+    present_until = {idx: -1.0 for idx in cameras}
+    delays: list[float] = []
+    busy_inferences = 0
+    upcoming = iter(arrivals)
+    arrival = next(upcoming, None)
+
+    step = 1.0 / args.fps
+    delivered_every = max(1, round(args.fps / args.active_fps))
+    for tick in range(int(args.minutes * 60 * args.fps)):
+        now = tick * step
+        while arrival is not None and arrival[0] <= now:
+            pending.setdefault(arrival[1], arrival[0])
+            present_until[arrival[1]] = arrival[0] + args.dwell
+            arrival = next(upcoming, None)
+
+        if motion and tick % delivered_every == 0:
+            for idx in cameras:
+                if present_until[idx] >= now:
+                    scheduler.note_activity(idx, now)
+        due = [idx for idx in cameras if scheduler.due(idx, now)]
+        for idx in scheduler.admit(due, now):
+            if present_until[idx] >= now:
+                scheduler.note_activity(idx, now)
+                busy_inferences += 1
+                if idx in pending:
+                    delays.append(now - pending.pop(idx))
+
+    total = sum(scheduler.inferences.values())
+    return {
+        "ips": total / (args.minutes * 60),
+        "busy": busy_inferences / max(total, 1),
+        "mean": statistics.mean(delays) if delays else 0.0,
+        "max": max(delays, default=0.0),
+        "bound": scheduler.ttfd_bound,
+    }
+
+
+def bench_scheduler(args: argparse.Namespace) -> None:
+    """Time to first detection: fixed equal share vs adaptive scheduling."""
+    rng = np.random.default_rng(args.seed)
+    duration = args.minutes * 60
+    count = int(args.events_per_minute * args.minutes)
+    arrivals = sorted(
+        (float(t), int(cam))
+        for t, cam in zip(
+            rng.uniform(0, duration, count),
+            rng.integers(0, args.cameras, count),
+            strict=True,
+        )
+    )
+
+    print(
+        f"{args.cameras} cameras, budget {args.max_ips:g} inf/s, "
+        f"{count} person arrivals over {args.minutes:g} min"
+    )
+    print(
+        f"{'schedule':>9} {'inf/s':>7} {'on people':>10} {'mean TTFD':>10} "
+        f"{'max TTFD':>9} {'bound':>7}"
+    )
+    for name, adaptive, motion in (
+        ("fixed", False, False),
+        ("adaptive", True, False),
+        ("+ motion", True, True),
+    ):
+        r = _simulate_schedule(args, adaptive, arrivals, motion)
+        print(
+            f"{name:>9} {r['ips']:>7.1f} {r['busy']:>10.1%} {r['mean']:>9.2f}s "
+            f"{r['max']:>8.2f}s {r['bound']:>6.2f}s"
+        )
+
+
+def bench_zones(args: argparse.Namespace) -> None:
+    """Full-frame inference vs batched zone crops on the same frames."""
+    from .backends import InferenceBackend
+    from .sources import SyntheticSource
+    from .zones import Zone, ZoneSet
+
+    size = tuple(args.size)
+    width, height = size
+    if args.zone:
+        polygons = [np.asarray(z, dtype=int).reshape(-1, 2).tolist() for z in args.zone]
+    else:
+        # A doorway on the left and a stretch of driveway on the right
+        polygons = [
+            [[40, 120], [200, 120], [200, height - 10], [40, height - 10]],
+            [[width - 220, height // 2], [width - 20, height // 2],
+             [width - 20, height - 10], [width - 220, height - 10]],
+        ]  # fmt: skip
+    zones = ZoneSet([Zone(f"zone{i}", p, size) for i, p in enumerate(polygons)])
+
+    source = SyntheticSource(size, realtime=False, person_windows=[(0, 60)])
+    frames = [source.read()[1] for _ in range(args.frames)]
+    model = InferenceBackend(args.model, imgsz=args.imgsz, conf=args.conf)
+    crop_imgsz = zones.imgsz(args.imgsz)
+
+    def full(frame: np.ndarray) -> int:
+        return len(model.predict([frame])[0].boxes)
+
+    def cropped(frame: np.ndarray) -> int:
+        results = model.predict(zones.crops(frame), imgsz=crop_imgsz)
+        return len(zones.merge(frame, results).boxes)
+
+    print(
+        f"{len(zones.zones)} zones, crops "
+        f"{', '.join(f'{w}x{h}' for w, h in (z.crop_size for z in zones.zones))}"
+        f" at imgsz {crop_imgsz}, full frame at {args.imgsz}"
+    )
+    print(f"{'mode':>6} {'ms/frame':>9} {'max px':>9} {'boxes':>6}")
+    for name, run, pixels in (
+        ("full", full, args.imgsz**2),
+        ("zones", cropped, len(zones.zones) * crop_imgsz**2),
+    ):
+        run(frames[0])  # warm-up
+        start = time.perf_counter()
+        boxes = sum(run(frame) for frame in frames)
+        elapsed = (time.perf_counter() - start) * 1000 / len(frames)
+        print(f"{name:>6} {elapsed:>9.1f} {pixels:>9} {boxes:>6}")
+
+
+def bench_alert_dedupe(args: argparse.Namespace) -> None:
+    """Alerts published and JPEGs encoded: every person frame vs per track."""
+    from .tracking import TrackRegistry
+
+    rng = np.random.default_rng(args.seed)
+    duration = args.minutes * 60
+    count = int(args.people_per_hour * args.minutes / 60)
+    visits = [
+        (float(start), float(start + dwell), track_id)
+        for track_id, (start, dwell) in enumerate(
+            zip(
+                rng.uniform(0, duration, count),
+                rng.exponential(args.dwell, count),
+                strict=True,
+            )
+        )
+    ]
+
+    registry = TrackRegistry(
+        realert_after=args.realert_after, expire_after=args.expire_after
+    )
+    published = {"per frame": 0, "per track": 0}
+    encoded = {"per frame": 0, "per track": 0}
+    last_encode = {"per frame": -np.inf, "per track": -np.inf}
+    person_frames = 0
+
+    for tick in range(int(duration * args.fps)):
+        now = tick / args.fps
+        present = [t for start, end, t in visits if start <= now < end]
+        if not present:
+            continue
+        person_frames += 1
+        alerting = {
+            "per frame": True,
+            "per track": bool(registry.update(0, present, now)),
+        }
+        for mode, alert in alerting.items():
+            if not alert:
+                continue
+            published[mode] += 1
+            # AlertSystem encodes and sends at most once per 10 s cooldown
+            if now - last_encode[mode] > 10.0:
+                encoded[mode] += 1
+                last_encode[mode] = now
+
+    print(
+        f"{count} visits (mean dwell {args.dwell:g}s) over {args.minutes:g} min "
+        f"at {args.fps:g} detections/s: {person_frames} frames with people"
+    )
+    print(f"{'mode':>10} {'alerts published':>17} {'JPEG encodes':>13}")
+    for mode in published:
+        print(f"{mode:>10} {published[mode]:>17} {encoded[mode]:>13}")
+
+
+def bench_pipeline(args: argparse.Namespace) -> None:
+    """Batches/s with serial detection vs the three-stage pipeline."""
+    import queue
+
+    import cv2
+
+    from .backends import InferenceBackend
+    from .pipeline import Stage, run_pipeline
+    from .sources import SyntheticSource
+
+    size = tuple(args.size)
+    frames = [
+        SyntheticSource(size, realtime=False, person_windows=[(0, 60)], seed=i).read()[
+            1
+        ]
+        for i in range(args.cameras)
+    ]
+    model = InferenceBackend(args.model, imgsz=args.imgsz, conf=args.conf)
+    model.predict(frames)  # warm-up
+
+    def preprocess(_):
+        return model.preprocess(frames)
+
+    def infer(item):
+        inputs, letterbox = item
+        return model.forward(inputs), letterbox
+
+    def postprocess(item):
+        preds, letterbox = item
+        for frame, result in zip(
+            frames, model.postprocess(preds, frames, letterbox), strict=True
+        ):
+            # Stand-in for tracking and annotation: copy and draw every box
+            annotated = frame.copy()
+            for x1, y1, x2, y2 in result.boxes.xyxy.int().tolist():
+                cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.imencode(".jpg", annotated)
+
+    start = time.perf_counter()
+    for _ in range(args.batches):
+        postprocess(infer(preprocess(None)))
+    serial = args.batches / (time.perf_counter() - start)
+
+    to_infer: queue.Queue = queue.Queue(maxsize=1)
+    to_post: queue.Queue = queue.Queue(maxsize=1)
+    remaining = [args.batches]
+
+    def source():
+        if remaining[0] <= 0:
+            time.sleep(0.01)
+            return None
+        remaining[0] -= 1
+        return True
+
+    stages = [
+        Stage("preprocess", preprocess, source=source, outbox=to_infer),
+        Stage("inference", infer, inbox=to_infer, outbox=to_post),
+        Stage("postprocess", postprocess, inbox=to_post),
+    ]
+    start = time.perf_counter()
+    run_pipeline(stages, lambda: stages[-1].stats.items < args.batches)
+    pipelined = args.batches / (time.perf_counter() - start)
+
+    print(f"{args.cameras} cameras per batch, {args.batches} batches")
+    print(f"serial:    {serial:6.2f} batches/s")
+    print(f"pipelined: {pipelined:6.2f} batches/s")
+    for stage in stages:
+        stats = stage.stats.snapshot()
+        print(
+            f"  {stage.name:>11}: {stats['mean_ms']:7.1f} ms avg, "
+            f"{stats['utilisation']:4.0%} busy, {stats['blocked']:4.0%} blocked"
+        )
+
+
+def _import_seconds(module: str) -> float:
+    """Seconds to import ``module`` in a fresh interpreter."""
+    import subprocess
+    import sys
+
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - t)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.split()[-1])
+
+
+def bench_startup(args: argparse.Namespace) -> None:
+    """Import costs, model load and the cold first inference a warm-up removes."""
+    from .backends import InferenceBackend
+
+    for module in ("security_guard.config", "security_guard.detection"):
+        print(f"import {module:<26} {_import_seconds(module):6.2f} s")
+
+    start = time.perf_counter()
+    model = InferenceBackend(args.model, imgsz=args.imgsz)
+    print(f"{'model load':<33} {time.perf_counter() - start:6.2f} s")
+
+    frames = [np.zeros((args.size[1], args.size[0], 3), np.uint8)] * args.batch
+    start = time.perf_counter()
+    model.predict(frames)
+    cold = time.perf_counter() - start
+    warm = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        model.predict(frames)
+        warm.append(time.perf_counter() - start)
+    warm_ms = 1000 * statistics.median(warm)
+    print(f"{'first inference (cold)':<33} {1000 * cold:6.0f} ms")
+    print(f"{'later inferences (median)':<33} {warm_ms:6.0f} ms")
+    print(f"{'removed by warm-up':<33} {1000 * cold - warm_ms:6.0f} ms")
+
+
+def _plot_boxes_per_element(frame: np.ndarray, result) -> np.ndarray:
+    """The former per-box, per-tensor-element annotation loop (reference)."""
+    import cv2
+
+    annotated = frame.copy()
+    for box, cls in zip(result.boxes.xyxy, result.boxes.cls, strict=True):
+        if int(cls) == 0:
+            x1, y1, x2, y2 = map(int, box)
+            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(
+                annotated,
+                "Human",
+                (x1, y1 - 10),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                (0, 255, 0),
+                2,
+            )
+    return annotated
+
+
+def bench_annotate(args: argparse.Namespace) -> None:
+    """Annotation ms per frame vs number of boxes, per-element loop vs renderer."""
+    import torch
+    from ultralytics.engine.results import Results
+
+    from .annotate import Annotator, person_boxes
+
+    rng = np.random.default_rng(0)
+    width, height = args.size
+    frame = rng.integers(0, 255, (height, width, 3), np.uint8)
+    annotator = Annotator()
+
+    print(f"{'boxes':>6} {'per-element ms':>15} {'renderer ms':>12} {'identical':>10}")
+    for count in args.boxes:
+        xy = rng.uniform(0, (width, height), (count, 2))
+        wh = rng.uniform(20, 200, (count, 2))
+        data = np.c_[xy, xy + wh, rng.uniform(0.3, 1, count), rng.integers(0, 3, count)]
+        result = Results(
+            frame,
+            path="",
+            names={0: "person", 1: "car", 2: "dog"},
+            boxes=torch.as_tensor(data, dtype=torch.float32),
+        )
+
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            reference = _plot_boxes_per_element(frame, result)
+        loop_ms = 1000 * (time.perf_counter() - start) / args.repeats
+
+        out = None
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            out = annotator.render(frame, person_boxes(result), out=out)
+        render_ms = 1000 * (time.perf_counter() - start) / args.repeats
+
+        same = np.array_equal(reference, out)
+        print(f"{count:>6} {loop_ms:>15.2f} {render_ms:>12.2f} {str(same):>10}")
+
+
+def bench_timestamp(args: argparse.Namespace) -> None:
+    """Capture-loop cost of a burned-in timestamp vs timestamp metadata."""
+    import cv2
+
+    from .annotate import TimestampOverlay
+
+    width, height = args.size
+    ring = FrameRing((height, width, 3), slots=8)
+    raw = np.random.default_rng(0).integers(0, 255, (height, width, 3), np.uint8)
+
+    def burned_in() -> None:
+        frame = ring.writable_slot()
+        np.copyto(frame, raw)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cv2.putText(
+            frame, timestamp, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2
+        )
+        ring.publish()
+
+    def metadata() -> None:
+        captured, wall = time.monotonic(), time.time()
+        frame = ring.writable_slot()
+        np.copyto(frame, raw)
+        ring.publish(captured, wall)
+
+    print(f"capture loop, {width}x{height}, {args.frames} frames (copy + publish)")
+    for name, step in (("putText per frame", burned_in), ("metadata", metadata)):
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            step()
+        per_frame = 1e6 * (time.perf_counter() - start) / args.frames
+        print(f"  {name:<18} {per_frame:8.1f} us/frame")
+
+    overlay = TimestampOverlay()
+    image = raw.copy()
+    wall = time.time()
+    start = time.perf_counter()
+    for i in range(args.frames):
+        overlay.draw(image, wall + i / 25)
+    per_frame = 1e6 * (time.perf_counter() - start) / args.frames
+    print(f"overlay drawn by a consumer: {per_frame:.1f} us/frame")
+
+
+def bench_decode(args: argparse.Namespace) -> None:
+    """Capture cost of read() on every frame vs grab() + on-demand retrieve()."""
+    import tempfile
+
+    import cv2
+
+    from .camera import DecodeSchedule
+    from .sources import FileSource, SyntheticSource
+
+    width, height = args.source_size
+    frame_size = tuple(args.size)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Compressed test clip, so retrieve() does real decoding work
+        path = os.path.join(tmp, "clip.avi")
+        writer = cv2.VideoWriter(
+            path, cv2.VideoWriter_fourcc(*"MJPG"), args.camera_fps, (width, height)
+        )
+        synthetic = SyntheticSource((width, height), realtime=False, seed=1)
+        for _ in range(args.frames):
+            writer.write(synthetic.read()[1])
+        writer.release()
+
+        def capture(demand: float | None, decode_all: bool) -> tuple[float, int]:
+            source = FileSource(path, loop=False, realtime=False)
+            schedule = DecodeSchedule()
+            out = np.empty((frame_size[1], frame_size[0], 3), np.uint8)
+            raw, decoded = None, 0
+            start = time.perf_counter()
+            for i in range(args.frames):
+                if decode_all:
+                    ret, raw = source.read(raw)
+                else:
+                    ret = source.grab()
+                    if ret and schedule.due(i / args.camera_fps, demand):
+                        ret, raw = source.retrieve(raw)
+                    else:
+                        continue
+                if ret:
+                    decoded += 1
+                    cv2.resize(raw, frame_size, dst=out)
+            source.release()
+            return time.perf_counter() - start, decoded
+
+        print(
+            f"{args.frames} frames of {width}x{height} MJPG at {args.camera_fps:g} fps, "
+            f"resized to {frame_size[0]}x{frame_size[1]}"
+        )
+        seconds, decoded = capture(None, True)
+        print(
+            f"  read() every frame:       {1e3 * seconds / args.frames:6.2f} ms/frame"
+        )
+        for demand in args.demand:
+            seconds, decoded = capture(demand, False)
+            print(
+                f"  grab(), decode {demand:>4g} fps: "
+                f"{1e3 * seconds / args.frames:6.2f} ms/frame, "
+                f"{decoded} of {args.frames} decoded"
+            )
+
+
+def bench_recorder_queue(args: argparse.Namespace) -> None:
+    """Memory and drops of recorder queues through a simulated disk stall."""
+    from .framebuffer import FramePool
+
+    width, height = args.size
+    frame_mb = width * height * 3 / 2**20
+    frames = int(args.stall * args.fps)
+
+    def run(label: str, policy: str, pool: FramePool | None) -> None:
+        subs = []
+        for cam in range(args.cameras):
+            ring = FrameRing((height, width, 3), slots=4)
+            bus = FrameBus(f"camera-{cam}", ring=ring)
+            subs.append(
+                (
+                    ring,
+                    bus,
+                    bus.subscribe(
+                        "recorder",
+                        maxsize=args.queue,
+                        policy=policy,
+                        copy=True,
+                        pool=pool,
+                    ),
+                )
+            )
+        # The writer is stalled: frames only arrive, nothing is written
+        start = time.perf_counter()
+        for _ in range(frames):
+            for ring, bus, _sub in subs:
+                ring.writable_slot()
+                bus.publish_frame()
+        per_frame = 1e6 * (time.perf_counter() - start) / (frames * args.cameras)
+
+        queued = sum(len(sub.queue) for _, _, sub in subs)
+        dropped = [sub.queue.dropped for _, _, sub in subs]
+        high = max(sub.queue.high_water for _, _, sub in subs)
+        print(
+            f"  {label:<34} {queued * frame_mb:7.0f} MB queued, "
+            f"high water {high} frames/camera, dropped {dropped}, "
+            f"{per_frame:5.0f} us/frame"
+        )
+        for _, _, sub in subs:
+            sub.close()
+
+    print(
+        f"{args.cameras} cameras at {args.fps:g} fps, writer stalled {args.stall:g}s, "
+        f"queue {args.queue} frames/camera, {frame_mb:.2f} MB/frame"
+    )
+    run("per-camera copies, drop_newest", "drop_newest", None)
+    for policy in ("drop_newest", "drop_oldest"):
+        pool = FramePool((height, width, 3), args.budget_mb * 2**20)
+        run(f"{args.budget_mb} MB pool, {policy}", policy, pool)
+
+
+class _SlowWriter:
+    """``cv2.VideoWriter`` whose release takes ``stall`` seconds longer."""
+
+    def __init__(self, writer, stall: float) -> None:
+        self.writer, self.stall = writer, stall
+
+    def write(self, image: np.ndarray) -> None:
+        self.writer.write(image)
+
+    def release(self) -> None:
+        time.sleep(self.stall)
+        self.writer.release()
+
+
+class _InlineSegments:
+    """The old rollover: release and open writers on the recording thread."""
+
+    def __init__(
+        self, fps: float, size: tuple[int, int], codec: str, stall: float = 0.0
+    ) -> None:
+        self.path_for = None
+        self.fps, self.size, self.codec = fps, size, codec
+        self.stall = stall
+        self.minute = None
+        self.writer = None
+
+    def write(self, image: np.ndarray, wall: float) -> None:
+        import cv2
+
+        minute = int(wall // 60)
+        if minute != self.minute:
+            self.close()
+            path = self.path_for(datetime.fromtimestamp(minute * 60))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fourcc = cv2.VideoWriter_fourcc(*self.codec)
+            time.sleep(self.stall)
+            writer = cv2.VideoWriter(path, fourcc, self.fps, self.size)
+            self.writer = _SlowWriter(writer, self.stall)
+            self.minute = minute
+        self.writer.write(image)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+def bench_rollover(args: argparse.Namespace) -> None:
+    """Dropped frames and write stalls across minute segment rollovers.
+
+    Opening and releasing a file each take ``--stall`` extra seconds, as on
+    a busy or spinning disk.
+    """
+    import tempfile
+
+    from .recorder import SegmentWriter
+    from .sources import SyntheticSource
+
+    class SlowSegments(SegmentWriter):
+        def open(self, minute: int):
+            time.sleep(args.stall)
+            minute, path, writer = super().open(minute)
+            if writer is not None:
+                writer = _SlowWriter(writer, args.stall)
+            return minute, path, writer
+
+    width, height = args.size
+    frames = args.rollovers * args.segment_frames + 1
+    # Synthetic capture clock: every segment_frames frames cross a minute edge
+    step = 60.0 / args.segment_frames
+    first_minute = int(time.time() // 60) * 60
+
+    def run(label: str, writer) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            writer.path_for = lambda ts: os.path.join(
+                root, ts.strftime("%Y/%m/%d/%H/%M.avi")
+            )
+            ring = FrameRing((height, width, 3), slots=4)
+            bus = FrameBus("camera", ring=ring)
+            sub = bus.subscribe(
+                "recorder", maxsize=args.queue, policy="drop_oldest", copy=True
+            )
+            done = threading.Event()
+
+            def capture() -> None:
+                source = SyntheticSource(
+                    (width, height), fps=args.fps, person_windows=[(0, 4)], period=4
+                )
+                raw = None
+                for i in range(frames):
+                    _, raw = source.read(raw)
+                    np.copyto(ring.writable_slot(), raw)
+                    bus.publish_frame(time.monotonic(), first_minute + i * step)
+                done.set()
+
+            producer = threading.Thread(target=capture)
+            producer.start()
+            written, edges, steady = 0, [], []
+            while not (done.is_set() and not len(sub.queue)):
+                with sub.next(timeout=0.1) as frame:
+                    if frame is None:
+                        continue
+                    minute = writer.minute
+                    start = time.perf_counter()
+                    writer.write(frame.image, frame.wall)
+                    seconds = time.perf_counter() - start
+                    (edges if writer.minute != minute else steady).append(seconds)
+                    written += 1
+            producer.join()
+            writer.close()
+            files = sum(len(names) for _, _, names in os.walk(root))
+
+        print(
+            f"  {label:<20} {written} written, {sub.queue.dropped} dropped, "
+            f"{files} files; write at rollover mean "
+            f"{1e3 * statistics.mean(edges):5.2f} ms, max {1e3 * max(edges):6.2f} ms; "
+            f"other frames mean {1e3 * statistics.mean(steady):5.2f} ms"
+        )
+
+    print(
+        f"{args.rollovers} rollovers, {args.segment_frames} frames/segment at "
+        f"{args.fps:g} fps, {width}x{height} {args.codec}, queue {args.queue}, "
+        f"open/release +{1e3 * args.stall:g} ms"
+    )
+    run(
+        "inline open/release",
+        _InlineSegments(args.fps, (width, height), args.codec, args.stall),
+    )
+    # A compressed "minute" is shorter than the default lead, so the next
+    # segment is opened as soon as the previous one starts
+    ahead = SlowSegments(None, args.fps, (width, height), preopen=60.0)
+    ahead.codecs = [args.codec]
+    run("SegmentWriter", ahead)
+
+
+def bench_encoder(args: argparse.Namespace) -> None:
+    """CPU per camera and bytes per hour of cv2.VideoWriter vs an ffmpeg pipe."""
+    import shutil
+    import tempfile
+
+    from .recorder import SEGMENT_LAYOUT, FfmpegSegmentWriter, SegmentWriter
+    from .sources import SyntheticSource
+
+    width, height = args.size
+    frames = int(args.seconds * args.fps)
+    # A walk-through loop, generated up front so only encoding is measured
+    source = SyntheticSource(
+        (width, height), fps=args.fps, realtime=False, person_windows=[(0, 4)], period=8
+    )
+    clip = [source.read()[1].copy() for _ in range(int(8 * args.fps))]
+    first_minute = int(time.time() // 60) * 60
+
+    def run(label: str, make_writer) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            writer = make_writer(root)
+            before = os.times()
+            start = time.perf_counter()
+            for i in range(frames):
+                writer.write(clip[i % len(clip)], first_minute + i / args.fps)
+            writer.close()
+            seconds = time.perf_counter() - start
+            after = os.times()
+            size = sum(
+                os.path.getsize(os.path.join(folder, name))
+                for folder, _, names in os.walk(root)
+                for name in names
+            )
+
+        if not size:
+            print(f"  {label:<34} not available here")
+            return
+        own = after.user + after.system - before.user - before.system
+        children = (
+            after.children_user
+            + after.children_system
+            - before.children_user
+            - before.children_system
+        )
+        print(
+            f"  {label:<34} CPU {100 * own / args.seconds:5.1f}% in-process "
+            f"+ {100 * children / args.seconds:5.1f}% ffmpeg of one core per camera, "
+            f"{size / args.seconds * 3600 / 2**30:5.2f} GB/hour, "
+            f"{frames / seconds:5.0f} fps max"
+        )
+
+    print(
+        f"{args.seconds:g}s of {width}x{height} at {args.fps:g} fps "
+        f"(as fast as possible)"
+    )
+    for codec in args.codecs:
+
+        def opencv(root: str, codec: str = codec) -> SegmentWriter:
+            writer = SegmentWriter(
+                lambda ts: os.path.join(root, ts.strftime(SEGMENT_LAYOUT)),
+                args.fps,
+                (width, height),
+            )
+            writer.codecs = [codec]
+            return writer
+
+        run(f"cv2.VideoWriter {codec}", opencv)
+
+    if shutil.which(args.ffmpeg) is None:
+        print(f"  {args.ffmpeg} not found, ffmpeg pipe skipped")
+        return
+    options = {
+        "ffmpeg": args.ffmpeg,
+        "preset": args.preset,
+        "crf": args.crf,
+        "threads": args.threads,
+        "keyframe_interval": args.keyframe_interval,
+    }
+    run(
+        f"ffmpeg libx264 {args.preset} crf {args.crf}",
+        lambda root: FfmpegSegmentWriter(
+            os.path.join(root, SEGMENT_LAYOUT),
+            args.fps,
+            (width, height),
+            options=options,
+        ),
+    )
+
+
+def bench_event_recording(args: argparse.Namespace) -> None:
+    """Frames, files and bytes written by continuous vs event recording."""
+    import tempfile
+
+    from .events import EventIndex, EventRecorder
+    from .recorder import SEGMENT_LAYOUT, SegmentWriter
+    from .sources import SyntheticSource
+
+    width, height = args.size
+    windows = list(zip(args.person[::2], args.person[1::2], strict=True))
+    source = SyntheticSource(
+        (width, height),
+        fps=args.fps,
+        realtime=False,
+        person_windows=windows,
+        period=args.period,
+    )
+    frames = int(args.minutes * 60 * args.fps)
+    first_minute = int(time.time() // 60) * 60
+
+    def run(label: str, events: bool) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            segments = SegmentWriter(
+                lambda ts: os.path.join(root, ts.strftime(SEGMENT_LAYOUT)),
+                args.fps,
+                (width, height),
+            )
+            segments.codecs = [args.codec]
+            clock = {"now": 0.0, "last": None}
+            recorder = EventRecorder(
+                segments,
+                lambda: clock["last"],
+                EventIndex(os.path.join(root, "events.jsonl")),
+                pre_roll=args.pre_roll,
+                post_roll=args.post_roll,
+                fps=args.fps,
+            )
+            raw = None
+            before = os.times()
+            for i in range(frames):
+                t = i / args.fps
+                _, raw = source.read(raw)
+                # Detection notices the person a little after it appears
+                if source.person_progress(t - args.delay) is not None:
+                    clock["last"] = t
+                if events:
+                    recorder.write(raw, first_minute + t, t)
+                else:
+                    segments.write(raw, first_minute + t)
+            recorder.finish()
+            segments.close()
+            after = os.times()
+            paths = [
+                os.path.join(folder, name)
+                for folder, _, names in os.walk(root)
+                for name in names
+                if name.endswith(".avi")
+            ]
+            size = sum(os.path.getsize(path) for path in paths)
+
+        written = recorder.frames_written if events else frames
+        cpu = after.user + after.system - before.user - before.system
+        print(
+            f"  {label:<11} {written:6d} of {frames} frames written "
+            f"({written / frames:6.1%}), {len(paths):3d} files, "
+            f"{size / 2**20:7.1f} MB, {recorder.events:3d} events, "
+            f"CPU {cpu:5.1f}s"
+        )
+
+    active = sum(end - start for start, end in windows) / args.period
+    print(
+        f"{args.minutes:g} min at {args.fps:g} fps, person present {active:.1%} "
+        f"of the time, pre-roll {args.pre_roll:g}s, post-roll {args.post_roll:g}s, "
+        f"{args.codec}"
+    )
+    run("continuous", events=False)
+    run("events", events=True)
+
+
+def bench_segment_index(args: argparse.Namespace) -> None:
+    """Range lookups: an os.path.exists per minute vs the segment index."""
+    import tempfile
+    from datetime import timedelta
+
+    from .recorder import SEGMENT_LAYOUT
+    from .recordings import SegmentIndex
+
+    first = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    first -= timedelta(days=args.days)
+    minutes = args.days * 1440
+    with tempfile.TemporaryDirectory() as root:
+        # Empty placeholder files in the recorder's layout
+        for cam in range(args.cameras):
+            for m in range(minutes):
+                path = os.path.join(
+                    root,
+                    str(cam),
+                    (first + timedelta(minutes=m)).strftime(SEGMENT_LAYOUT),
+                )
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, "wb").close()
+
+        index = SegmentIndex(os.path.join(root, "segments.db"))
+        start = time.perf_counter()
+        count = index.rebuild(root)
+        print(
+            f"{args.cameras} cameras x {args.days} days: rebuilt {count} files in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+
+        def probe(begin: datetime, end: datetime, cam: int) -> list[str]:
+            files, current = [], begin
+            while current <= end:
+                path = os.path.join(root, str(cam), current.strftime(SEGMENT_LAYOUT))
+                if os.path.exists(path):
+                    files.append(path)
+                current += timedelta(minutes=1)
+            return files
+
+        for span in args.spans:
+            begin = first + timedelta(minutes=minutes // 2)
+            end = begin + timedelta(minutes=span - 1)
+            start = time.perf_counter()
+            probed = probe(begin, end, 0)
+            probe_ms = 1e3 * (time.perf_counter() - start)
+            start = time.perf_counter()
+            found = index.paths(begin, end, 0)
+            index_ms = 1e3 * (time.perf_counter() - start)
+            start = time.perf_counter()
+            every = index.paths(begin, end)
+            all_ms = 1e3 * (time.perf_counter() - start)
+            print(
+                f"  {span:5d} min: exists() per minute {probe_ms:7.2f} ms "
+                f"({len(probed)} files), index {index_ms:6.2f} ms "
+                f"({len(found)} files, same: {found == probed}), "
+                f"all cameras {all_ms:6.2f} ms ({len(every)} files)"
+            )
+        index.close()
+
+
+def bench_retention(args: argparse.Namespace) -> None:
+    """Deletion time of one RetentionManager pass over each kind of quota."""
+    import math
+    import tempfile
+
+    from .recorder import SEGMENT_LAYOUT
+    from .recordings import SegmentIndex
+    from .retention import DAY, GB, RetentionManager
+
+    size = args.kb * 1024
+    count = args.files
+    batch = args.batch
+
+    def populate(root: str, index: SegmentIndex, cameras: int) -> None:
+        # Sparse placeholder files, one per minute, the newest 30 s old
+        now = time.time()
+        for cam in range(cameras):
+            for m in range(count):
+                start = now - (count - m) * 60 + 30
+                path = os.path.join(
+                    root,
+                    str(cam),
+                    datetime.fromtimestamp(start).strftime(SEGMENT_LAYOUT),
+                )
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.truncate(size)
+                index.opened(cam, path, start)
+                index.closed(cam, path, start, start + 59.5, 1487)
+
+    def trimmed(keep: int, have: int = count) -> int:
+        # Files left when deleting oldest first in whole batches
+        return have - min(have, math.ceil((have - keep) / batch) * batch)
+
+    with tempfile.TemporaryDirectory() as root:
+        # Per-camera max_gb (camera 0), per-camera max_days (camera 1), then
+        # the global max_gb, which takes the oldest files overall (camera 2)
+        index = SegmentIndex(os.path.join(root, "segments.db"))
+        populate(root, index, 3)
+        kept = {0: trimmed(count // 2), 1: count // 4, 2: count}
+        over = sum(kept.values()) - (count * 3) // 2
+        kept[2] = trimmed(count - over)
+        settings = {
+            "max_gb": ((count * 3) // 2 + 0.5) * size / GB,
+            "warn_free_gb": None,
+            "batch": batch,
+            "pause": 0,
+            "cameras": {
+                "0": {"max_gb": (count // 2 + 0.5) * size / GB},
+                "1": {"max_days": (count // 4) * 60 / DAY},
+            },
+        }
+        manager = RetentionManager(index, root, settings)
+        start = time.perf_counter()
+        manager.enforce()
+        elapsed = time.perf_counter() - start
+        batches = sum(math.ceil((count - n) / batch) for n in kept.values())
+        print(
+            f"quotas: deleted {manager.deleted_files} of {3 * count} files in "
+            f"{1e3 * elapsed:.0f} ms ({1e3 * elapsed / max(batches, 1):.1f} ms "
+            f"per batch of {batch}), left {kept}"
+        )
+        index.close()
+
+    with tempfile.TemporaryDirectory() as root:
+        # Free-space floor and warning on a simulated disk that fills up with
+        # the recordings alone
+        index = SegmentIndex(os.path.join(root, "segments.db"))
+        populate(root, index, 1)
+        keep = count // 3
+        capacity = 2 * count * size
+        settings = {
+            "min_free_gb": (2 * count - keep - 0.5) * size / GB,
+            "warn_free_gb": capacity / GB,
+            "batch": batch,
+            "pause": 0,
+        }
+        warnings: list[str] = []
+
+        class SimulatedDisk(RetentionManager):
+            def free(self) -> int:
+                return capacity - self.index.total
+
+        manager = SimulatedDisk(index, root, settings, notify=warnings.append)
+        start = time.perf_counter()
+        manager.enforce()
+        manager.enforce()
+        elapsed = time.perf_counter() - start
+        kept = {0: trimmed(keep)}
+        print(
+            f"free space: deleted {manager.deleted_files} of {count} files in "
+            f"{1e3 * elapsed:.0f} ms, left {kept[0]}, {len(warnings)} warning(s)"
+        )
+        index.close()
+
+
+def bench_clip_window(args: argparse.Namespace) -> None:
+    """Snapshot and build time of the rolling clip window."""
+    import shutil
+    import tempfile
+    import types
+
+    import cv2
+
+    from .clips import ClipBuilder
+
+    width, height = args.size
+    per_file = int(60 * args.fps)
+    with tempfile.TemporaryDirectory() as root:
+        builder = ClipBuilder(args.window, args.ffmpeg, args.fps, folder=root)
+        # Minute files, every third one short of frames (dropped frames or an
+        # events-mode file held open between events); the last one still open
+        now = time.time()
+        frame = np.zeros((height, width, 3), np.uint8)
+        for m in range(args.minutes):
+            start = now - (args.minutes - m) * 60
+            frames = per_file * 2 // 3 if m % 3 == 0 else per_file
+            path = os.path.join(root, f"{m:02d}.avi")
+            writer = cv2.VideoWriter(
+                path, cv2.VideoWriter_fourcc(*"MJPG"), args.fps, (width, height)
+            )
+            for _ in range(frames):
+                writer.write(frame)
+            writer.release()
+            builder.opened(path, start)
+            if m < args.minutes - 1:
+                builder.closed(path, start, start + 59.9, frames)
+            else:
+                builder.writer = types.SimpleNamespace(path=path, frames=frames)
+
+        entries, seconds = builder.entries()
+
+        # Concurrent requests, as alerts of several cameras at once
+        listings: list[str] = []
+        times: list[float] = []
+        lock = threading.Lock()
+
+        def request() -> None:
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                listing, _ = builder.snapshot()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    listings.append(listing)
+                    times.append(elapsed)
+
+        threads = [threading.Thread(target=request) for _ in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for listing in listings:
+            os.remove(listing)
+        print(
+            f"{len(entries)} files, {seconds:.0f}s of content in the "
+            f"{args.window:g}s window: snapshot "
+            f"{1e3 * statistics.median(times):.2f} ms median, "
+            f"{1e3 * max(times):.2f} ms max over {len(times)} requests "
+            f"from {args.threads} threads"
+        )
+
+        if shutil.which(args.ffmpeg) is None:
+            print(f"  {args.ffmpeg} not found, build skipped")
+        else:
+            start = time.perf_counter()
+            clip = builder.build()
+            elapsed = time.perf_counter() - start
+            capture = cv2.VideoCapture(clip)
+            count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            capture.release()
+            print(f"  build (stream copy) {1e3 * elapsed:.0f} ms, {count} frames")
+
+
+def bench_clip_export(args: argparse.Namespace) -> None:
+    """Encode time and size of a clip transcoded to a byte budget."""
+    import shutil
+    import tempfile
+
+    import cv2
+
+    from .clips import ClipBuilder, ClipExporter
+    from .sources import SyntheticSource
+
+    width, height = args.size
+    if shutil.which(args.ffmpeg) is None:
+        print(f"{args.ffmpeg} not found, encode skipped")
+    else:
+        # A walk-through every 20 s, the rest of the time a still scene
+        source = SyntheticSource(
+            (width, height),
+            fps=args.fps,
+            realtime=False,
+            person_windows=[(0, 4)],
+            period=20,
+        )
+        with tempfile.TemporaryDirectory() as root:
+            builder = ClipBuilder(args.seconds + 60, args.ffmpeg, args.fps, root)
+            start = time.time() - args.seconds
+            path = os.path.join(root, "clip.avi")
+            writer = cv2.VideoWriter(
+                path, cv2.VideoWriter_fourcc(*"MJPG"), args.fps, (width, height)
+            )
+            frames = int(args.seconds * args.fps)
+            for _ in range(frames):
+                writer.write(source.read()[1])
+            writer.release()
+            builder.opened(path, start)
+            builder.closed(path, start, start + args.seconds, frames)
+            listing, length = builder.snapshot()
+            try:
+                for speedup in (1, args.idle_speedup):
+                    exporter = ClipExporter(
+                        {
+                            "max_mb": args.max_mb,
+                            "max_kbps": args.max_kbps,
+                            "idle_speedup": speedup,
+                            "nice": args.nice,
+                            "folder": root,
+                        },
+                        args.ffmpeg,
+                    )
+                    clip, encode = exporter.export(listing, length)
+                    exporter.pool.shutdown()
+                    size = os.path.getsize(clip)
+                    capture = cv2.VideoCapture(clip)
+                    count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+                    capture.release()
+                    os.remove(clip)
+                    print(
+                        f"  idle speed-up {speedup}: {length:.0f}s encoded in "
+                        f"{encode:.1f}s, {size / 2**20:.2f} of {args.max_mb:g} MB, "
+                        f"{count} of {frames} frames"
+                    )
+            finally:
+                os.remove(listing)
+
+
+def bench_archive(args: argparse.Namespace) -> None:
+    """Copy + make_archive vs streaming stored ZIP parts for /download."""
+    import shutil
+    import tempfile
+
+    from .archive import export_parts
+
+    size = int(args.mb * 2**20)
+    max_bytes = int(args.part_mb * 2**20)
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as root:
+        # Incompressible placeholder files, like compressed video
+        recordings = os.path.join(root, "recordings")
+        files = []
+        for cam in range(args.cameras):
+            folder = os.path.join(recordings, str(cam), "2026", "01", "01", "12")
+            os.makedirs(folder)
+            for m in range(args.files):
+                path = os.path.join(folder, f"{m:02d}.avi")
+                with open(path, "wb") as f:
+                    f.write(rng.bytes(size))
+                files.append(path)
+        total = len(files) * size / 2**20
+        print(f"{len(files)} files of {args.mb:g} MB ({total:.0f} MB)")
+
+        # Before: copy into a folder, then a deflated archive of it
+        start = time.perf_counter()
+        copies = os.path.join(root, "temp_download")
+        os.makedirs(copies)
+        for path in files:
+            shutil.copy2(path, copies)
+        shutil.make_archive(os.path.join(root, "download"), "zip", copies)
+        before = time.perf_counter() - start
+        shutil.rmtree(copies)
+        os.remove(os.path.join(root, "download.zip"))
+        print(f"  copy + make_archive      {before:6.2f}s")
+
+        # After, with a file that is gone by the time it is archived
+        out = os.path.join(root, "out")
+        os.makedirs(out)
+        missing = os.path.join(recordings, "0", "2026", "01", "01", "13", "00.avi")
+        start = time.perf_counter()
+        parts, first = [], None
+        for part in export_parts(
+            files + [missing], recordings, "download", out, max_bytes
+        ):
+            if first is None:
+                first = time.perf_counter() - start
+            parts.append(part)
+        after = time.perf_counter() - start
+        print(
+            f"  stored ZIP parts         {after:6.2f}s, {len(parts)} parts of at "
+            f"most {args.part_mb:g} MB, first ready after {first:.2f}s"
+        )
+
+
+def bench_snapshot(args: argparse.Namespace) -> None:
+    """Alert JPEG via imwrite + read + remove vs in-memory SnapshotEncoder."""
+    import tempfile
+
+    import cv2
+
+    from .annotate import SnapshotEncoder
+    from .sources import SyntheticSource
+
+    width, height = args.size
+    source = SyntheticSource((width, height), realtime=False, person_windows=[(0, 8)])
+    frames = [source.read()[1].copy() for _ in range(args.frames)]
+    params = [cv2.IMWRITE_JPEG_QUALITY, args.quality]
+    print(f"{args.frames} snapshots of {width}x{height} at quality {args.quality}")
+
+    with tempfile.TemporaryDirectory() as root:
+        times = []
+        written = b""
+        for i, frame in enumerate(frames):
+            start = time.perf_counter()
+            path = os.path.join(root, f"alert_{i}.jpg")
+            cv2.imwrite(path, frame, params)
+            with open(path, "rb") as f:
+                written = f.read()
+            os.remove(path)
+            times.append(time.perf_counter() - start)
+    print(
+        f"  imwrite + read + remove  {1e3 * statistics.median(times):6.2f} ms median, "
+        f"{1e3 * max(times):6.2f} ms max, {len(written) / 1024:.0f} KB"
+    )
+
+    for max_width in (None, args.max_width):
+        encoder = SnapshotEncoder(args.quality, max_width)
+        times = []
+        for frame in frames:
+            start = time.perf_counter()
+            data = encoder.file(frame, "alert.jpg")
+            times.append(time.perf_counter() - start)
+        label = f"in memory, max {max_width}" if max_width else "in memory"
+        print(
+            f"  {label:<24} {1e3 * statistics.median(times):6.2f} ms median, "
+            f"{1e3 * max(times):6.2f} ms max, {len(data.getvalue()) / 1024:.0f} KB"
+        )
+
+
+def _iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def _person_boxes(result) -> np.ndarray:
+    boxes = result.boxes.cpu().numpy()
+    return boxes.xyxy[boxes.cls == 0]
+
+
+def _matched(reference: np.ndarray, candidate: np.ndarray, iou: float) -> int:
+    """Greedy one-to-one matches of reference boxes at the IoU threshold."""
+    free = np.ones(len(candidate), dtype=bool)
+    matched = 0
+    for box in reference:
+        if not free.any():
+            break
+        overlaps = np.where(free, _iou(box, candidate), 0.0)
+        best = int(overlaps.argmax())
+        if overlaps[best] >= iou:
+            free[best] = False
+            matched += 1
+    return matched
+
+
+def bench_backends(args: argparse.Namespace) -> None:
+    """Latency and person recall of inference backends vs PyTorch FP32 at 640."""
+    from .backends import InferenceBackend, calibration_frames
+    from .sources import SyntheticSource
+
+    if args.videos:
+        frames = calibration_frames(args.videos, args.frames)
+    else:
+        source = SyntheticSource(
+            (640, 480), realtime=False, person_windows=[(0, 30)], period=40
+        )
+        frames = [source.read()[1] for _ in range(args.frames)]
+    batches = [frames[i : i + args.batch] for i in range(0, len(frames), args.batch)]
+
+    reference = InferenceBackend(args.model, conf=args.conf)
+    expected = [_person_boxes(r) for b in batches for r in reference.predict(b)]
+    total = sum(len(boxes) for boxes in expected)
+
+    print(
+        f"{len(frames)} frames, batch {args.batch}, "
+        f"{total} persons found by pytorch-640 FP32"
+    )
+    print(
+        f"{'backend':>26} {'ms/frame':>9} {'p95 ms/frame':>13} "
+        f"{'persons':>8} {'recall':>7}"
+    )
+    for spec in args.backends:
+        name, _, quant = spec.partition(":")
+        backend = InferenceBackend(
+            args.model,
+            backend=name,
+            imgsz=args.imgsz,
+            person_only=args.person_only,
+            int8=quant == "int8",
+            conf=args.conf,
+            calibration_dir=args.calibration or args.videos,
+        )
+        backend.predict(batches[0])  # warm-up
+
+        timings, found = [], []
+        for batch in batches:
+            start = time.perf_counter()
+            results = backend.predict(batch)
+            timings.append((time.perf_counter() - start) * 1000 / len(batch))
+            found.extend(_person_boxes(r) for r in results)
+
+        matched = sum(
+            _matched(ref, got, args.iou)
+            for ref, got in zip(expected, found, strict=True)
+        )
+        p95 = float(np.percentile(timings, 95))
+        recall = f"{matched / total:.1%}" if total else "n/a"
+        print(
+            f"{backend.label:>26} {statistics.mean(timings):>9.1f} {p95:>13.1f} "
+            f"{sum(len(f) for f in found):>8} {recall:>7}"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m security_guard.benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("frame-ring", help="latest-frame dict vs FrameRing")
+    p.add_argument("--cameras", type=int, default=4)
+    p.add_argument("--readers", type=int, default=4, help="readers per camera")
+    p.add_argument("--seconds", type=float, default=3.0)
+    p.add_argument("--slots", type=int, default=8)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_frame_ring)
+
+    p = sub.add_parser("bus", help="sleep polling vs FrameBus wake-ups")
+    p.add_argument("--subscribers", type=int, default=4)
+    p.add_argument("--seconds", type=float, default=2.0)
+    p.add_argument("--frames", type=int, default=100)
+    p.set_defaults(func=bench_bus)
+
+    p = sub.add_parser(
+        "camera-scaling", help="capture threads vs processes with shared memory"
+    )
+    p.add_argument("--cameras", type=int, nargs="+", default=[1, 4, 8])
+    p.add_argument("--seconds", type=float, default=3.0)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.add_argument("--sensor", type=int, nargs=2, default=[1280, 720])
+    p.set_defaults(func=bench_camera_scaling)
+
+    p = sub.add_parser("motion-gate", help="MotionGate skip rate on a synthetic scene")
+    p.add_argument("--method", choices=["diff", "mog2"], default="diff")
+    p.add_argument("--threshold", type=int, default=25)
+    p.add_argument("--min-area", type=float, default=0.002)
+    p.add_argument("--keepalive", type=float, default=10.0)
+    p.add_argument("--minutes", type=float, default=2.0)
+    p.add_argument("--fps", type=float, default=25.0)
+    p.add_argument("--detect-fps", type=float, default=10.0)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_motion_gate)
+
+    p = sub.add_parser(
+        "batched-inference", help="N sequential model calls vs one batched call"
+    )
+    p.add_argument("--model", default="yolo11n.pt")
+    p.add_argument("--cameras", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--rounds", type=int, default=20)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_batched_inference)
+
+    p = sub.add_parser(
+        "scheduler", help="time to first detection, fixed vs adaptive schedule"
+    )
+    p.add_argument("--cameras", type=int, default=16)
+    p.add_argument("--max-ips", type=float, default=20.0)
+    p.add_argument("--active-fps", type=float, default=10.0)
+    p.add_argument("--idle-fps", type=float, default=1.0)
+    p.add_argument("--hold", type=float, default=5.0)
+    p.add_argument("--half-life", type=float, default=5.0)
+    p.add_argument("--events-per-minute", type=float, default=4.0)
+    p.add_argument("--dwell", type=float, default=8.0, help="seconds a person stays")
+    p.add_argument("--minutes", type=float, default=30.0)
+    p.add_argument("--fps", type=float, default=25.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_scheduler)
+
+    p = sub.add_parser("zones", help="full-frame inference vs zone crops")
+    p.add_argument("--model", default="yolo11n.pt")
+    p.add_argument(
+        "--zone",
+        type=int,
+        nargs="+",
+        action="append",
+        help="polygon as x1 y1 x2 y2 ... (repeat for several zones)",
+    )
+    p.add_argument("--frames", type=int, default=50)
+    p.add_argument("--imgsz", type=int, default=640)
+    p.add_argument("--conf", type=float, default=0.25)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_zones)
+
+    p = sub.add_parser("alert-dedupe", help="alerts per person frame vs per new track")
+    p.add_argument("--minutes", type=float, default=60.0)
+    p.add_argument("--fps", type=float, default=10.0, help="detections per second")
+    p.add_argument("--people-per-hour", type=float, default=20.0)
+    p.add_argument("--dwell", type=float, default=60.0, help="mean seconds on scene")
+    p.add_argument("--realert-after", type=float, default=None)
+    p.add_argument("--expire-after", type=float, default=60.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_alert_dedupe)
+
+    p = sub.add_parser("pipeline", help="serial vs pipelined detection stages")
+    p.add_argument("--model", default="yolo11n.pt")
+    p.add_argument("--cameras", type=int, default=4)
+    p.add_argument("--batches", type=int, default=30)
+    p.add_argument("--imgsz", type=int, default=640)
+    p.add_argument("--conf", type=float, default=0.25)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_pipeline)
+
+    p = sub.add_parser("startup", help="import, model load and warm-up costs")
+    p.add_argument("--model", default="yolo11n.pt")
+    p.add_argument("--imgsz", type=int, default=640)
+    p.add_argument("--batch", type=int, default=1)
+    p.add_argument("--repeats", type=int, default=10)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("annotate", help="annotation cost vs number of boxes")
+    p.add_argument("--boxes", type=int, nargs="+", default=[0, 1, 10, 50, 200])
+    p.add_argument("--repeats", type=int, default=50)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_annotate)
+
+    p = sub.add_parser("timestamp", help="burned-in timestamp vs metadata")
+    p.add_argument("--frames", type=int, default=2000)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_timestamp)
+
+    p = sub.add_parser("decode", help="read() every frame vs decode on demand")
+    p.add_argument("--frames", type=int, default=300)
+    p.add_argument("--camera-fps", type=float, default=25)
+    p.add_argument("--demand", type=float, nargs="+", default=[25, 10, 5])
+    p.add_argument("--source-size", type=int, nargs=2, default=[1280, 720])
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_decode)
+
+    p = sub.add_parser("recorder-queue", help="recorder queue memory and drops")
+    p.add_argument("--cameras", type=int, default=4)
+    p.add_argument("--fps", type=float, default=25)
+    p.add_argument("--stall", type=float, default=20, help="seconds")
+    p.add_argument("--queue", type=int, default=300)
+    p.add_argument("--budget-mb", type=int, default=256)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_recorder_queue)
+
+    p = sub.add_parser("rollover", help="drops and stalls at segment rollovers")
+    p.add_argument("--rollovers", type=int, default=100)
+    p.add_argument("--segment-frames", type=int, default=10)
+    p.add_argument("--fps", type=float, default=25)
+    p.add_argument("--queue", type=int, default=2)
+    p.add_argument("--codec", default="MJPG")
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.add_argument("--stall", type=float, default=0.1, help="seconds per open/release")
+    p.set_defaults(func=bench_rollover)
+
+    p = sub.add_parser("encoder", help="cv2.VideoWriter vs ffmpeg pipe CPU and size")
+    p.add_argument("--seconds", type=float, default=120)
+    p.add_argument("--fps", type=float, default=25)
+    p.add_argument("--codecs", nargs="+", default=["MJPG", "X264"])
+    p.add_argument("--ffmpeg", default="ffmpeg")
+    p.add_argument("--preset", default="veryfast")
+    p.add_argument("--crf", type=int, default=23)
+    p.add_argument("--threads", type=int, default=1)
+    p.add_argument("--keyframe-interval", type=float, default=2)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_encoder)
+
+    p = sub.add_parser("event-recording", help="continuous vs event recording")
+    p.add_argument("--minutes", type=float, default=10)
+    p.add_argument("--fps", type=float, default=25)
+    p.add_argument(
+        "--person",
+        type=float,
+        nargs="+",
+        default=[30, 45],
+        help="start end pairs (seconds within each period) with a person",
+    )
+    p.add_argument("--period", type=float, default=300)
+    p.add_argument("--delay", type=float, default=1.0, help="detection delay")
+    p.add_argument("--pre-roll", type=float, default=10)
+    p.add_argument("--post-roll", type=float, default=20)
+    p.add_argument("--codec", default="MJPG")
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.set_defaults(func=bench_event_recording)
+
+    p = sub.add_parser("segment-index", help="per-minute exists() vs segment index")
+    p.add_argument("--days", type=int, default=7)
+    p.add_argument("--cameras", type=int, default=4)
+    p.add_argument("--spans", type=int, nargs="+", default=[5, 60, 1440])
+    p.set_defaults(func=bench_segment_index)
+
+    p = sub.add_parser("retention", help="quota and free-space deletion check")
+    p.add_argument("--files", type=int, default=120, help="files per camera")
+    p.add_argument("--kb", type=int, default=1024, help="size of each file")
+    p.add_argument("--batch", type=int, default=20)
+    p.set_defaults(func=bench_retention)
+
+    p = sub.add_parser("clip-window", help="rolling clip manifest and build time")
+    p.add_argument("--minutes", type=int, default=7)
+    p.add_argument("--window", type=float, default=300)
+    p.add_argument("--fps", type=float, default=25)
+    p.add_argument("--size", type=int, nargs=2, default=[160, 120])
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--requests", type=int, default=50, help="per thread")
+    p.add_argument("--ffmpeg", default="ffmpeg")
+    p.set_defaults(func=bench_clip_window)
+
+    p = sub.add_parser("clip-export", help="clip transcode time and size budget")
+    p.add_argument("--seconds", type=float, default=300)
+    p.add_argument("--fps", type=float, default=25)
+    p.add_argument("--size", type=int, nargs=2, default=[640, 480])
+    p.add_argument("--max-mb", type=float, default=10)
+    p.add_argument("--max-kbps", type=int, default=2000)
+    p.add_argument("--idle-speedup", type=int, default=8)
+    p.add_argument("--nice", type=int, default=10)
+    p.add_argument("--ffmpeg", default="ffmpeg")
+    p.set_defaults(func=bench_clip_export)
+
+    p = sub.add_parser("archive", help="copy + make_archive vs stored ZIP parts")
+    p.add_argument("--cameras", type=int, default=2)
+    p.add_argument("--files", type=int, default=30, help="files per camera")
+    p.add_argument("--mb", type=float, default=2, help="size of each file")
+    p.add_argument("--part-mb", type=float, default=48)
+    p.set_defaults(func=bench_archive)
+
+    p = sub.add_parser("snapshot", help="imwrite round trip vs in-memory JPEG")
+    p.add_argument("--frames", type=int, default=200)
+    p.add_argument("--size", type=int, nargs=2, default=[1920, 1080])
+    p.add_argument("--quality", type=int, default=90)
+    p.add_argument("--max-width", type=int, default=1280)
+    p.set_defaults(func=bench_snapshot)
+
+    p = sub.add_parser("backends", help="latency and person recall per backend")
+    p.add_argument("--model", default="yolo11n.pt")
+    p.add_argument(
+        "--backends",
+        nargs="+",
+        default=["pytorch", "onnx", "onnx:int8"],
+        help="backend[:int8] entries, e.g. pytorch onnx onnx:int8 openvino",
+    )
+    p.add_argument("--videos", help="recordings directory to sample frames from")
+    p.add_argument("--calibration", help="INT8 calibration recordings directory")
+    p.add_argument("--frames", type=int, default=100)
+    p.add_argument("--batch", type=int, default=1)
+    p.add_argument("--imgsz", type=int, default=640)
+    p.add_argument("--person-only", action="store_true")
+    p.add_argument("--conf", type=float, default=0.25)
+    p.add_argument("--iou", type=float, default=0.5)
+    p.set_defaults(func=bench_backends)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
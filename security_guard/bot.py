@@ -1,12 +1,15 @@
 import asyncio
 import os
 import shutil
+import tempfile
 from datetime import datetime, timedelta
 
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 
 from . import config, webapp
+from .annotate import annotator, latest_boxes, snapshot_encoder, timestamp_overlay
+from .archive import export_parts
 from .config import logger
 
 
@@ -75,17 +78,16 @@ class SecurityBot:
 
         cam_index = 0
         try:
-            lock = config.camera_locks.get(cam_index)
-            if lock is None:
+            ring = config.frame_rings.get(cam_index)
+            if ring is None:
                 await update.message.reply_text("⚠️ Camera not initialized yet.")
                 return
 
-            with lock:
-                frame = (
-                    config.latest_frames[cam_index].copy()
-                    if config.latest_frames.get(cam_index) is not None
-                    else None
-                )
+            filename = f"snapshot_{datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
+            with ring.read() as frame:
+                if frame is not None:
+                    image = annotator.render(frame.image, latest_boxes(cam_index))
+                    timestamp_overlay.draw(image, frame.wall)
 
             if frame is None:
                 await update.message.reply_text(
@@ -93,15 +95,9 @@ class SecurityBot:
                 )
                 return
 
-            filename = f"snapshot_{datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
-            import cv2
-
-            cv2.imwrite(filename, frame)
-
-            with open(filename, "rb") as photo:
-                await update.message.reply_photo(photo=photo)
-
-            os.remove(filename)
+            await update.message.reply_photo(
+                photo=snapshot_encoder.file(image, filename)
+            )
 
         except Exception as e:  # pragma: no cover - defensive
             await update.message.reply_text(f"Error: {str(e)}")
@@ -123,6 +119,7 @@ class SecurityBot:
         try:
             shutil.rmtree(config.VIDEO_SAVE_DIR)
             os.makedirs(config.VIDEO_SAVE_DIR, exist_ok=True)
+            config.segment_index.reset()
             logger.info("All recordings deleted and directory recreated.")
         except Exception as e:  # pragma: no cover - defensive
             logger.error(f"Delete error: {str(e)}")
@@ -150,7 +147,8 @@ class SecurityBot:
     ) -> None:
         """Zip recordings for a date-time range and send via Telegram.
 
-        Usage: /download YYYYMMDDHHmm YYYYMMDDHHmm
+        Usage: /download YYYYMMDDHHmm YYYYMMDDHHmm [camera ...]
+        (all cameras unless some are given, e.g. ``0 2`` or ``0,2``)
         """
         if not await self.check_auth(update):
             return
@@ -160,67 +158,91 @@ class SecurityBot:
             end_str = context.args[1]
             start = datetime.strptime(start_str, "%Y%m%d%H%M")
             end = datetime.strptime(end_str, "%Y%m%d%H%M")
+            cameras = [
+                int(camera)
+                for arg in context.args[2:]
+                for camera in arg.split(",")
+                if camera
+            ]
 
             await update.message.reply_text("⏳ Download process started...")
-            config.executor.submit(self._prepare_download, start, end, update)
+            config.executor.submit(
+                self._prepare_download, start, end, update, cameras or None
+            )
         except Exception as e:  # pragma: no cover - defensive
             await update.message.reply_text(f"Download error: {str(e)}")
 
-    def _prepare_download(self, start: datetime, end: datetime, update: Update) -> None:
-        """Collect recordings for the given range, zip, and send via Telegram."""
-        try:
-            files: list[str] = []
-            current = start.replace(second=0, microsecond=0)
-            while current <= end:
-                path = os.path.join(
-                    config.VIDEO_SAVE_DIR,
-                    "0",  # camera index
-                    f"{current.year}",
-                    f"{current.month:02d}",
-                    f"{current.day:02d}",
-                    f"{current.hour:02d}",
-                    f"{current.minute:02d}.avi",
-                )
-                if os.path.exists(path):
-                    files.append(path)
-                current += timedelta(minutes=1)
-
-            if files:
-                temp_dir = "temp_download"
-                os.makedirs(temp_dir, exist_ok=True)
-
-                for file in files:
-                    shutil.copy(file, temp_dir)
-
-                zip_name = (
-                    f"recordings_{start.strftime('%Y%m%d%H%M')}_"
-                    f"{end.strftime('%Y%m%d%H%M')}.zip"
-                )
-                shutil.make_archive(zip_name[:-4], "zip", temp_dir)
-                shutil.rmtree(temp_dir)
+    def _prepare_download(
+        self,
+        start: datetime,
+        end: datetime,
+        update: Update,
+        cameras: list[int] | None = None,
+    ) -> None:
+        """Stream recordings for the range into ZIP parts and send each one.
 
-                asyncio.run_coroutine_threadsafe(
-                    self._send_zip(zip_name, update),
-                    loop=config.bot_loop,
+        Parts stay under ``DOWNLOAD_PART_MB``; part N is uploaded while part
+        N+1 is written, so at most two parts are on disk.
+        """
+        folder = None
+        try:
+            # Files still being written are left out: they would outgrow the
+            # size their part was planned with
+            files = [
+                segment.path
+                for camera in cameras or [None]
+                for segment in config.segment_index.find(start, end, camera)
+                if segment.end is not None
+            ]
+
+            folder = tempfile.mkdtemp(prefix="download_")
+            name = (
+                f"recordings_{start.strftime('%Y%m%d%H%M')}_"
+                f"{end.strftime('%Y%m%d%H%M')}"
+            )
+            upload = None
+            for part in export_parts(
+                files,
+                config.VIDEO_SAVE_DIR,
+                name,
+                folder,
+                int(config.DOWNLOAD_PART_MB * 2**20),
+            ):
+                if upload is not None:
+                    upload.result(timeout=600)
+                upload = asyncio.run_coroutine_threadsafe(
+                    self._send_zip(part, update), loop=config.bot_loop
                 )
+            if upload is not None:
+                upload.result(timeout=600)
             else:
+                # Nothing in the range, or all of it deleted since the lookup
                 asyncio.run_coroutine_threadsafe(
                     update.message.reply_text(
                         "❌ No recordings found in the specified range"
                     ),
                     loop=config.bot_loop,
                 )
-
         except Exception as e:  # pragma: no cover - defensive
             logger.error(f"Download error: {str(e)}")
+            asyncio.run_coroutine_threadsafe(
+                update.message.reply_text(f"Download error: {str(e)}"),
+                loop=config.bot_loop,
+            )
+        finally:
+            if folder is not None:
+                shutil.rmtree(folder, ignore_errors=True)
 
     async def _send_zip(self, zip_name: str, update: Update) -> None:
         try:
             with open(zip_name, "rb") as zip_file:
-                await update.message.reply_document(document=zip_file)
-            os.remove(zip_name)
+                await update.message.reply_document(
+                    document=zip_file, write_timeout=300
+                )
         except Exception as e:  # pragma: no cover - defensive
             await update.message.reply_text(f"Send error: {str(e)}")
+        finally:
+            os.remove(zip_name)
 
     def register_handlers(self) -> None:
         self.application.add_handler(CommandHandler("start", self.start))
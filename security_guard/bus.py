@@ -0,0 +1,286 @@
+import threading
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Any
+
+import numpy as np
+
+from .framebuffer import Frame, FramePool, FrameRing
+
+DROP_POLICIES = ("drop_oldest", "drop_newest")
+
+
+class DropQueue:
+    """Bounded FIFO whose consumers block on a condition instead of polling.
+
+    When full, ``drop_oldest`` evicts the oldest item to make room while
+    ``drop_newest`` rejects the incoming one. ``on_drop`` is called with every
+    item that is dropped either way (to release what it holds).
+    ``high_water`` is the longest the queue has been.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1,
+        policy: str = "drop_oldest",
+        on_drop: Callable[[Any], None] | None = None,
+    ) -> None:
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.on_drop = on_drop
+        self.delivered = 0
+        self.dropped = 0
+        self.high_water = 0
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: Any) -> bool:
+        """Add an item; return False if the policy dropped it."""
+        with self._cond:
+            if self._closed:
+                dropped = item
+            elif len(self._items) < self.maxsize:
+                dropped = None
+            elif self.policy == "drop_newest":
+                self.dropped += 1
+                dropped = item
+            else:
+                self.dropped += 1
+                dropped = self._items.popleft()
+            if dropped is not item:
+                self._items.append(item)
+                self.high_water = max(self.high_water, len(self._items))
+                self._cond.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+        return dropped is not item
+
+    def drop_oldest(self) -> bool:
+        """Evict the oldest item to free what it holds; False if empty."""
+        with self._cond:
+            if not self._items:
+                return False
+            self.dropped += 1
+            dropped = self._items.popleft()
+        if self.on_drop is not None:
+            self.on_drop(dropped)
+        return True
+
+    def count_drop(self) -> None:
+        """Count an item that was dropped before it reached the queue."""
+        with self._cond:
+            self.dropped += 1
+
+    def get(self, timeout: float | None = None) -> Any | None:
+        """Block until an item is available; ``None`` on timeout or close."""
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._items or self._closed, timeout=timeout
+            ):
+                return None
+            if not self._items:
+                return None
+            self.delivered += 1
+            return self._items.popleft()
+
+    def close(self) -> None:
+        """Wake every waiting consumer; further puts are ignored."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            items, self._items = list(self._items), deque()
+        if self.on_drop is not None:
+            for item in items:
+                self.on_drop(item)
+
+
+@dataclass(frozen=True)
+class PooledFrame:
+    """A frame copied into ``FramePool`` buffer ``index``, queued for delivery."""
+
+    frame: Frame
+    index: int
+
+
+class Subscription:
+    """A subscriber's view of a ``FrameBus`` with its own drop policy.
+
+    ``copy=True`` detaches ring frames on delivery (needed when the consumer
+    may fall more than ``FrameRing.slots`` frames behind, e.g. the recorder).
+    Otherwise ring frames are delivered as views and pinned by ``next``.
+    With a ``pool`` the copies go into its preallocated buffers, which are
+    returned when the consumer leaves the ``next`` block or the frame is
+    dropped. If the pool's byte budget is used up, ``drop_oldest`` evicts
+    this subscriber's oldest queued frame to make room; otherwise (or if it
+    has nothing queued) the new frame is dropped.
+
+    ``wakeup`` is set after every delivery, so one consumer can wait on
+    several subscriptions at once (e.g. one detector for all cameras).
+
+    ``rate`` is the most frames per second the consumer will use (``None``:
+    every frame); capture only decodes as many frames as the fastest
+    subscriber of a camera wants.
+    """
+
+    def __init__(
+        self,
+        bus: "FrameBus",
+        name: str,
+        maxsize: int = 1,
+        policy: str = "drop_oldest",
+        copy: bool = False,
+        wakeup: threading.Event | None = None,
+        rate: float | None = None,
+        pool: FramePool | None = None,
+    ) -> None:
+        self.bus = bus
+        self.name = name
+        self.copy = copy or pool is not None
+        self.wakeup = wakeup
+        self.rate = rate
+        self.pool = pool
+        self.queue = DropQueue(maxsize=maxsize, policy=policy, on_drop=self._release)
+
+    def _release(self, item: Any) -> None:
+        if isinstance(item, PooledFrame):
+            self.pool.release(item.index)
+
+    def _pooled_copy(self, frame: Frame) -> PooledFrame | None:
+        index = self.pool.acquire()
+        if index is None and self.queue.policy == "drop_oldest":
+            if self.queue.drop_oldest():
+                index = self.pool.acquire()
+        if index is None:
+            return None
+        image = self.pool.buffer(index)
+        np.copyto(image, frame.image)
+        return PooledFrame(replace(frame, slot=-1, image=image), index)
+
+    def offer(self, item: Any) -> bool:
+        if self.copy and isinstance(item, Frame) and item.slot >= 0:
+            if self.pool is None:
+                item = replace(item, slot=-1, image=item.image.copy())
+            else:
+                item = self._pooled_copy(item)
+                if item is None:
+                    self.queue.count_drop()
+                    return False
+        delivered = self.queue.put(item)
+        if delivered and self.wakeup is not None:
+            self.wakeup.set()
+        return delivered
+
+    @contextmanager
+    def next(self, timeout: float | None = None) -> Iterator[Any | None]:
+        """Wait for the next item; ring frames stay pinned inside the block.
+
+        Yields ``None`` on timeout, on close, or if a ring frame was recycled
+        before it could be pinned.
+        """
+        item = self.queue.get(timeout=timeout)
+        ring = self.bus.ring
+        if isinstance(item, PooledFrame):
+            try:
+                yield item.frame
+            finally:
+                self._release(item)
+        elif ring is not None and isinstance(item, Frame) and item.slot >= 0:
+            with ring.pin(item) as pinned:
+                yield pinned
+        else:
+            yield item
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+        self.queue.close()
+
+
+class FrameBus:
+    """Publish/subscribe fan-out of frames (or other items) to subscribers.
+
+    A camera bus wraps the camera's ``FrameRing``: ``publish_frame`` publishes
+    the reserved slot and hands every subscriber a view of it. Subscribers
+    block on their own queue, so idle consumers cost no CPU.
+    """
+
+    def __init__(self, name: str, ring: FrameRing | None = None) -> None:
+        self.name = name
+        self.ring = ring
+        self._subscribers: list[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        name: str,
+        maxsize: int = 1,
+        policy: str = "drop_oldest",
+        copy: bool = False,
+        wakeup: threading.Event | None = None,
+        rate: float | None = None,
+        pool: FramePool | None = None,
+    ) -> Subscription:
+        """Register a subscriber; ``maxsize=1, drop_oldest`` means "newest only"."""
+        sub = Subscription(
+            self,
+            name,
+            maxsize=maxsize,
+            policy=policy,
+            copy=copy,
+            wakeup=wakeup,
+            rate=rate,
+            pool=pool,
+        )
+        with self._lock:
+            self._subscribers = [*self._subscribers, sub]
+            self._update_demand()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not sub]
+            self._update_demand()
+
+    def _update_demand(self) -> None:
+        """Tell capture the highest rate any subscriber wants decoded."""
+        if self.ring is None:
+            return
+        rates = [sub.rate for sub in self._subscribers]
+        self.ring.demand = None if None in rates else max(rates, default=0.0)
+
+    def publish(self, item: Any) -> None:
+        """Deliver ``item`` to every subscriber according to its policy."""
+        # Copy-on-write list: publishing never holds the lock while delivering
+        for sub in self._subscribers:
+            sub.offer(item)
+
+    def publish_frame(self, monotonic: float = 0.0, wall: float = 0.0) -> Frame:
+        """Publish the ring's reserved slot (captured at the given times)."""
+        if self.ring is None:
+            raise RuntimeError(f"Bus {self.name} has no frame ring")
+        self.ring.publish(monotonic, wall)
+        frame = self.ring.latest()
+        self.publish(frame)
+        return frame
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Delivered / dropped / queued / high-water counters per subscriber."""
+        return {
+            sub.name: {
+                "delivered": sub.queue.delivered,
+                "dropped": sub.queue.dropped,
+                "queued": len(sub.queue),
+                "high_water": sub.queue.high_water,
+            }
+            for sub in self._subscribers
+        }
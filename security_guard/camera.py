@@ -1,75 +1,218 @@
-import queue
+import multiprocessing as mp
 import threading
 import time
-from datetime import datetime
 
 import cv2
+import numpy as np
 
 from . import config
+from .bus import FrameBus
 from .config import logger
+from .framebuffer import FrameRing, SharedFrameRing
+from .sources import open_source
+
+
+class DecodeSchedule:
+    """Decides which grabbed frames are worth decoding.
+
+    ``demand`` is the highest rate any consumer wants (``None``: every
+    frame). Frames are decoded at that rate, but at least ``min_fps`` so the
+    newest frame in the ring (snapshots) never gets old. A frame arriving up
+    to half an interval early counts as due, so a demand equal to the camera
+    rate decodes every frame despite timing jitter.
+    """
+
+    def __init__(self, min_fps: float = 1.0) -> None:
+        self.min_fps = min_fps
+        self._next = 0.0
+
+    def due(self, now: float, demand: float | None) -> bool:
+        if demand is None:
+            return True
+        interval = 1.0 / max(demand, self.min_fps)
+        if now < self._next - interval / 2:
+            return False
+        self._next = max(self._next, now) + interval
+        return True
 
 
 class CameraStream:
     """Handle continuous frame capture for a single camera.
 
-    Runs in its own thread, continuously reading frames, updating
-    ``config.latest_frames[camera_index]`` and pushing frames into the
-    corresponding recorder queue.
+    Runs in its own thread, continuously reading frames into the camera's
+    ``config.frame_rings[camera_index]`` and publishing them on
+    ``config.frame_buses[camera_index]`` (recorder, detector and live stream
+    subscribe there).
+
+    ``ring`` lets a capture process write into a ``SharedFrameRing`` owned by
+    the parent instead of a private one (see ``CameraProcess``).
+
+    Every frame is ``grab``-bed so the device buffer never backs up, but only
+    the frames the subscribers' rates call for (``FrameRing.demand``) are
+    decoded with ``retrieve`` and resized; the rest cost a grab only.
     """
 
-    def __init__(self, camera_index: int) -> None:
+    def __init__(self, camera_index: int, ring: FrameRing | None = None) -> None:
         self.camera_index = camera_index
-        self.cap = cv2.VideoCapture(camera_index)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.FRAME_SIZE[0])
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.FRAME_SIZE[1])
+        # Device index by default; CAMERA_SOURCES can map it to a file,
+        # network stream or synthetic generator
+        self.cap = open_source(
+            config.CAMERA_SOURCES.get(camera_index, camera_index), config.FRAME_SIZE
+        )
         self.running = True
 
-        # Shared dictionary and lock
-        config.latest_frames[self.camera_index] = None
-        config.camera_locks[self.camera_index] = threading.Lock()
+        # Reused decode buffer; ``retrieve`` fills it in place when sizes match
+        self._raw: np.ndarray | None = None
 
-        # Recording queue for this camera
-        config.recorder_queues[self.camera_index] = queue.Queue(
-            maxsize=config.MAX_RECORDER_QUEUE_SIZE
-        )
+        self.decode_on_demand = config.CAPTURE.get("decode_on_demand", True)
+        self.schedule = DecodeSchedule(config.CAPTURE.get("min_fps", 1.0))
+        self.report_interval = config.CAPTURE.get("report_interval", 300)
+        self.grabbed = 0
+        self.decoded = 0
+        self._last_report = time.monotonic()
+
+        # Shared frame ring (readers get read-only views of the newest slot)
+        width, height = config.FRAME_SIZE
+        if ring is None:
+            ring = FrameRing((height, width, 3), slots=config.FRAME_RING_SLOTS)
+        self.ring = ring
+        config.frame_rings[self.camera_index] = self.ring
+
+        # Frame bus for this camera
+        self.bus = FrameBus(f"camera-{self.camera_index}", ring=self.ring)
+        config.frame_buses[self.camera_index] = self.bus
 
     def run(self) -> None:
         """Main capture loop."""
         while self.running and config.system_running:
             try:
-                ret, frame = self.cap.read()
-                if ret:
-                    # Fix frame size
-                    frame = cv2.resize(frame, config.FRAME_SIZE)
-
-                    # Add timestamp
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    cv2.putText(
-                        frame,
-                        timestamp,
-                        (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (0, 255, 0),
-                        2,
-                    )
-
-                    # Save latest frame to global dictionary
-                    with config.camera_locks[self.camera_index]:
-                        config.latest_frames[self.camera_index] = frame
-
-                    # Add frame to recording queue
-                    queue_ = config.recorder_queues[self.camera_index]
-                    if not queue_.full():
-                        queue_.put(frame)
-
-                time.sleep(0.01)
+                # Blocks until the device delivers the next frame
+                if not self.cap.grab():
+                    time.sleep(0.1)
+                    continue
+                # Capture time travels with the frame; consumers that show
+                # it (recorder, live view, snapshots) overlay it themselves
+                captured, wall = time.monotonic(), time.time()
+                self.grabbed += 1
+                self.report_stats(captured)
+
+                demand = self.ring.demand if self.decode_on_demand else None
+                if not self.schedule.due(captured, demand):
+                    continue
+                ret, self._raw = self.cap.retrieve(self._raw)
+                if not ret:
+                    continue
+                self.decoded += 1
+
+                frame = self.ring.writable_slot()
+                if frame is None:
+                    # Every slot is pinned by readers; drop this frame
+                    continue
+
+                # Fix frame size, writing straight into the ring slot
+                if self._raw.shape == frame.shape:
+                    np.copyto(frame, self._raw)
+                else:
+                    cv2.resize(self._raw, config.FRAME_SIZE, dst=frame)
+
+                # Publish the slot and wake every subscriber
+                self.bus.publish_frame(captured, wall)
             except Exception as e:  # pragma: no cover - defensive
                 logger.error(f"Camera {self.camera_index} error: {str(e)}")
                 self.stop()
 
+    def report_stats(self, now: float) -> None:
+        """Periodically log how many grabbed frames were decoded."""
+        if now - self._last_report < self.report_interval:
+            return
+        demand = self.ring.demand
+        logger.info(
+            f"Camera {self.camera_index} capture: {self.decoded} of "
+            f"{self.grabbed} grabbed frames decoded "
+            f"({self.decoded / max(self.grabbed, 1):.0%}), consumers want "
+            f"{'every frame' if demand is None else f'{demand:g} fps'}"
+        )
+        self.grabbed = self.decoded = 0
+        self._last_report = now
+
     def stop(self) -> None:
         """Stop camera capture and release resources."""
         self.running = False
         time.sleep(0.5)
         self.cap.release()
+
+
+def _run_camera_process(camera_index: int, ring: SharedFrameRing, stop_event) -> None:
+    """Entry point of a capture process: capture into ``ring`` until stopped."""
+    cam = CameraStream(camera_index, ring=ring)
+    t = threading.Thread(target=cam.run, name=f"Camera-{camera_index}", daemon=True)
+    t.start()
+    stop_event.wait()
+    cam.stop()
+
+
+class CameraProcess:
+    """Run a ``CameraStream`` in its own process (``CAMERA_PROCESSES`` mode).
+
+    Frames travel through a ``SharedFrameRing``; in this process ``run``
+    relays each new sequence number onto ``config.frame_buses[camera_index]``
+    as a view of the shared slot, so detection, recording and the webapp work
+    unchanged and no frame is ever pickled.
+    """
+
+    def __init__(self, camera_index: int) -> None:
+        self.camera_index = camera_index
+        self.running = True
+
+        width, height = config.FRAME_SIZE
+        self.ring = SharedFrameRing((height, width, 3), slots=config.FRAME_RING_SLOTS)
+        config.frame_rings[self.camera_index] = self.ring
+
+        self.bus = FrameBus(f"camera-{self.camera_index}", ring=self.ring)
+        config.frame_buses[self.camera_index] = self.bus
+
+        self._stop_event = mp.Event()
+        self.process = mp.Process(
+            target=_run_camera_process,
+            args=(camera_index, self.ring, self._stop_event),
+            name=f"CameraProcess-{camera_index}",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        """Start the capture process (call before starting any thread)."""
+        self.process.start()
+        logger.info(
+            f"Camera {self.camera_index} capture process started "
+            f"(pid {self.process.pid})"
+        )
+
+    def run(self) -> None:
+        """Relay loop: publish every new shared frame on the local bus."""
+        last_seq = -1
+        while self.running and config.system_running:
+            try:
+                seq = self.ring.wait(last_seq, timeout=1.0)
+                if seq == last_seq:
+                    if not self.process.is_alive():
+                        logger.error(
+                            f"Camera {self.camera_index} capture process exited"
+                        )
+                        break
+                    continue
+                last_seq = seq
+
+                frame = self.ring.latest()
+                if frame is not None:
+                    self.bus.publish(frame)
+            except Exception as e:  # pragma: no cover - defensive
+                logger.error(f"Camera {self.camera_index} relay error: {str(e)}")
+
+    def stop(self) -> None:
+        """Stop the capture process and release the shared segment."""
+        self.running = False
+        self._stop_event.set()
+        self.process.join(timeout=5)
+        if self.process.is_alive():  # pragma: no cover - defensive
+            self.process.terminate()
+        self.ring.close()
@@ -0,0 +1,279 @@
+import multiprocessing as mp
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .recordings import MAX_SEGMENT_SECONDS
+
+
+class ClipBuilder:
+    """Rolling list of a camera's recent files, ready to serve as one clip.
+
+    ``opened``/``closed`` are the recorder's segment callbacks: every file
+    is added when it is opened, and when it is closed its concat-manifest
+    entry (path and duration, so ffmpeg does not have to probe it) is built
+    once. Files that ended more than ``window`` seconds ago are dropped.
+
+    Durations are ``frames / fps``, the length of the content: a file's wall
+    span is longer when frames were dropped or, in ``events`` mode, when
+    the file was held open between events. The frames of the open file are
+    read from ``writer`` (the recorder's segment writer), if set.
+
+    ``snapshot()`` then only writes the prepared manifest plus the file still
+    being written to a unique temp file; ``build()`` stream-copies it into a
+    unique ``.mp4`` with one ffmpeg call (nothing is looked up or
+    re-encoded, so a 5-minute clip takes a fraction of a second) and
+    ``ClipExporter`` transcodes it to fit an upload size. The open file is
+    read as far as it has been flushed to disk.
+    """
+
+    def __init__(
+        self,
+        window: float = 300.0,
+        ffmpeg: str = "ffmpeg",
+        fps: float = 25.0,
+        folder: str | None = None,
+        timeout: float = 60.0,
+    ) -> None:
+        self.window = window
+        self.ffmpeg = ffmpeg
+        self.fps = fps
+        # Has ``path`` and ``frames`` of the file being written
+        self.writer = None
+        self.folder = folder
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        # [path, start, end or None, manifest entry or None, seconds],
+        # oldest first
+        self.segments: deque[list] = deque()
+
+    def opened(self, path: str, start: float) -> None:
+        with self.lock:
+            self.segments.append([path, start, None, None, 0.0])
+            self._prune(start)
+
+    def closed(self, path: str, start: float, end: float, frames: int) -> None:
+        seconds = frames / self.fps
+        entry = f"file '{self._quote(os.path.abspath(path))}'\n"
+        if seconds > 0:
+            entry += f"duration {seconds:.3f}\n"
+        with self.lock:
+            for segment in reversed(self.segments):
+                if segment[0] == path:
+                    segment[2:] = [end, entry, seconds]
+                    break
+            else:
+                self.segments.append([path, start, end, entry, seconds])
+            self._prune(end)
+
+    def _prune(self, now: float) -> None:
+        while self.segments and self._end(self.segments[0]) < now - self.window:
+            self.segments.popleft()
+
+    @staticmethod
+    def _end(segment: list) -> float:
+        # A file whose close was never reported (failed writer) ends with
+        # its minute at the latest
+        return segment[1] + MAX_SEGMENT_SECONDS if segment[2] is None else segment[2]
+
+    @staticmethod
+    def _quote(path: str) -> str:
+        return path.replace("'", "'\\''")
+
+    def entries(self, since: float | None = None) -> tuple[list[str], float]:
+        """Manifest entries of the files ending after ``since``, open ones too.
+
+        Also returns the seconds they cover.
+        """
+        since = time.time() - self.window if since is None else since
+        writer = self.writer
+        entries, seconds = [], 0.0
+        with self.lock:
+            for segment in self.segments:
+                path, _, _, entry, length = segment
+                if self._end(segment) < since:
+                    continue
+                if entry is None:
+                    # Still being written: no duration yet
+                    if not os.path.exists(path):
+                        continue
+                    entry = f"file '{self._quote(os.path.abspath(path))}'\n"
+                    if writer is not None and writer.path == path:
+                        length = writer.frames / self.fps
+                entries.append(entry)
+                seconds += length
+        return entries, seconds
+
+    def snapshot(self, since: float | None = None) -> tuple[str, float] | None:
+        """Write the recent window to a unique concat manifest.
+
+        Returns its path and the seconds it covers, or None without files.
+        The caller removes the manifest.
+        """
+        entries, seconds = self.entries(since)
+        if not entries:
+            return None
+        fd, listing = tempfile.mkstemp(
+            prefix="clip_", suffix=".ffconcat", dir=self.folder
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("ffconcat version 1.0\n" + "".join(entries))
+        return listing, seconds
+
+    def build(self, since: float | None = None) -> str | None:
+        """Stream-copy the recent window into a new ``.mp4``; its path, or None."""
+        snapshot = self.snapshot(since)
+        if snapshot is None:
+            return None
+        listing = snapshot[0]
+        try:
+            return run_ffmpeg(
+                self.ffmpeg, listing, ["-c", "copy"], self.folder, self.timeout
+            )
+        finally:
+            os.remove(listing)
+
+
+def run_ffmpeg(
+    ffmpeg: str,
+    listing: str,
+    args: list[str],
+    folder: str | None = None,
+    timeout: float = 60.0,
+) -> str:
+    """Run ffmpeg on a concat manifest into a unique ``.mp4``; its path."""
+    fd, output = tempfile.mkstemp(prefix="clip_", suffix=".mp4", dir=folder)
+    os.close(fd)
+    try:
+        subprocess.run(
+            [
+                ffmpeg,
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                listing,
+                *args,
+                "-y",
+                output,
+            ],
+            check=True,
+            timeout=timeout,
+            stdin=subprocess.DEVNULL,
+        )
+    except BaseException:
+        os.remove(output)
+        raise
+    return output
+
+
+def video_bitrate(seconds: float, max_bytes: int, max_kbps: int | None) -> int:
+    """Video bits per second that fit ``seconds`` of clip into ``max_bytes``.
+
+    3% is kept for the MP4 container; ``max_kbps`` caps short clips, which
+    would not look better at a higher rate.
+    """
+    bitrate = int(max_bytes * 8 * 0.97 / max(seconds, 1.0))
+    if max_kbps is not None:
+        bitrate = min(bitrate, max_kbps * 1000)
+    return bitrate
+
+
+def transcode(listing: str, seconds: float, options: dict) -> tuple[str, float]:
+    """Encode a concat manifest to H.264 within ``max_mb``; path and seconds taken.
+
+    ``seconds`` is the content length of the clip (frames / fps, as
+    ``ClipBuilder.snapshot`` reports it), not its wall span, which would
+    spread the budget over time that has no frames.
+
+    With ``idle_speedup`` above 1, runs of (nearly) unchanged frames keep
+    only every n-th frame (``mpdecimate``) and the timestamps are closed up,
+    so quiet stretches play that much faster and cost almost no bytes. The
+    output is then shorter than ``seconds`` by an amount known only after
+    encoding, so instead of an average bitrate it is encoded at quality
+    ``crf`` (default ``23``) with the budget's bitrate as the cap: it
+    cannot exceed ``max_mb``, and the bits the budget would spread over
+    dropped frames are not wasted.
+    """
+    started = time.monotonic()
+    bitrate = video_bitrate(
+        seconds, int(options.get("max_mb", 45) * 2**20), options.get("max_kbps", 2000)
+    )
+    args = []
+    filters = []
+    speedup = options.get("idle_speedup", 1)
+    if speedup > 1:
+        filters += [f"mpdecimate=max={speedup - 1}", "setpts=N/FRAME_RATE/TB"]
+    if options.get("width"):
+        filters.append(f"scale={options['width']}:-2")
+    if filters:
+        args += ["-vf", ",".join(filters)]
+    if speedup > 1:
+        rate = ["-crf", str(options.get("crf", 23))]
+    else:
+        rate = ["-b:v", str(bitrate)]
+    args += [
+        "-c:v",
+        "libx264",
+        "-preset",
+        options.get("preset", "veryfast"),
+        *rate,
+        "-maxrate",
+        str(bitrate),
+        "-bufsize",
+        str(bitrate),
+        "-threads",
+        str(options.get("threads", 2)),
+        "-pix_fmt",
+        "yuv420p",
+        "-an",
+        "-movflags",
+        "+faststart",
+    ]
+    output = run_ffmpeg(
+        options.get("ffmpeg", "ffmpeg"),
+        listing,
+        args,
+        options.get("folder"),
+        options.get("timeout", 300),
+    )
+    return output, time.monotonic() - started
+
+
+def _lower_priority(niceness: int) -> None:
+    # Inherited by the ffmpeg children, so encodes yield the CPU to capture,
+    # detection and the recorders
+    try:
+        os.nice(niceness)
+    except (AttributeError, OSError):  # pragma: no cover - e.g. Windows
+        pass
+
+
+class ClipExporter:
+    """Transcodes clips for upload in a pool of low-priority processes.
+
+    ``options`` is the ``CLIP_EXPORT`` config (see ``transcode``). Workers
+    are started on the first export.
+    """
+
+    def __init__(self, options: dict, ffmpeg: str = "ffmpeg") -> None:
+        self.options = {"ffmpeg": ffmpeg, **options}
+        # spawn: forking the threaded main process could copy held locks
+        self.pool = ProcessPoolExecutor(
+            max_workers=options.get("workers", 1),
+            mp_context=mp.get_context("spawn"),
+            initializer=_lower_priority,
+            initargs=(options.get("nice", 10),),
+        )
+
+    def export(self, listing: str, seconds: float) -> tuple[str, float]:
+        """Transcode ``listing``; the ``.mp4`` path and the encode seconds."""
+        return self.pool.submit(transcode, listing, seconds, self.options).result()
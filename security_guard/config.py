@@ -1,15 +1,15 @@
 import json
 import logging
 import os
-import queue
 import threading
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
-from telegram import Bot
-from ultralytics import YOLO
+from .bus import FrameBus
+from .framebuffer import FramePool, FrameRing
+from .startup import clock
 
 # Base directory of the project (cam-security-guard root)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -22,12 +22,43 @@ with open(CONFIG_PATH, encoding="utf-8") as f:
 TELEGRAM_TOKEN = _config["TELEGRAM_TOKEN"]
 AUTHORIZED_USER_ID = _config["AUTHORIZED_USER_ID"]
 CAMERA_INDEXES = _config["CAMERA_INDEXES"]
+# Optional source URI per camera index (see sources.py); default: the device
+CAMERA_SOURCES = {int(k): v for k, v in _config.get("CAMERA_SOURCES", {}).items()}
 VIDEO_SAVE_DIR = _config["VIDEO_SAVE_DIR"]
+# SQLite index of the recorded files (see recordings.py)
+SEGMENT_INDEX_PATH = _config.get(
+    "SEGMENT_INDEX_PATH", os.path.join(VIDEO_SAVE_DIR, "segments.db")
+)
+# Largest /download ZIP part (Telegram bots can send documents up to 50 MB)
+DOWNLOAD_PART_MB = _config.get("DOWNLOAD_PART_MB", 48)
+# Quotas and free-space limits for deleting old recordings
+RETENTION = _config.get("RETENTION", {})
 YOLO_MODEL_PATH = _config["YOLO_MODEL_PATH"]
 MAX_RECORDER_QUEUE_SIZE = _config["MAX_RECORDER_QUEUE_SIZE"]
+# Byte budget shared by the queued frames of all recorders, and what to drop
+RECORDER_BUFFER_MB = _config.get("RECORDER_BUFFER_MB", 256)
+RECORDER_DROP_POLICY = _config.get("RECORDER_DROP_POLICY", "drop_oldest")
+# Encoder of the recordings: cv2.VideoWriter in-process or an ffmpeg pipe
+RECORDER = _config.get("RECORDER", {})
+# JPEG quality and optional downscale of alert and on-demand snapshots
+SNAPSHOT = _config.get("SNAPSHOT", {})
+# Length of the clip sent with alerts at SECURE_LEVEL 2
+CLIP_SECONDS = _config.get("CLIP_SECONDS", 300)
+# Size-targeted H.264 transcode of that clip before upload
+CLIP_EXPORT = _config.get("CLIP_EXPORT", {})
 MAX_ALERT_QUEUE_SIZE = _config["MAX_ALERT_QUEUE_SIZE"]
 FRAME_SIZE = tuple(_config["FRAME_SIZE"])
 FPS = _config["FPS"]
+FRAME_RING_SLOTS = _config.get("FRAME_RING_SLOTS", 8)
+CAMERA_PROCESSES = _config.get("CAMERA_PROCESSES", False)
+CAPTURE = _config.get("CAPTURE", {})
+DETECTION_FPS = _config.get("DETECTION_FPS", 10)
+MOTION_GATE = _config.get("MOTION_GATE", {})
+ZONES = _config.get("ZONES", {})
+SCHEDULER = _config.get("SCHEDULER", {})
+TRACKER_CONFIG = _config.get("TRACKER_CONFIG", "bytetrack.yaml")
+TRACK_ALERTS = _config.get("TRACK_ALERTS", {})
+INFERENCE = _config.get("INFERENCE", {})
 MUTE_DURATIONS = _config["MUTE_DURATIONS"]
 SECURE_LEVEL = _config["SECURE_LEVEL"]
 SECRET_KEY = _config["SECRET_KEY"]
@@ -50,25 +81,75 @@ class AppState:
     system_running: bool = True
     mute_until: datetime = datetime.min
     last_alert_sent: datetime = datetime.min
-    latest_frames: dict[int, Any] = field(default_factory=dict)
-    camera_locks: dict[int, threading.Lock] = field(default_factory=dict)
-    recorder_queues: dict[int, queue.Queue] = field(default_factory=dict)
-    alert_queue: queue.Queue = field(
-        default_factory=lambda: queue.Queue(maxsize=MAX_ALERT_QUEUE_SIZE)
-    )
+    frame_rings: dict[int, FrameRing] = field(default_factory=dict)
+    frame_buses: dict[int, FrameBus] = field(default_factory=dict)
+    alert_bus: FrameBus = field(default_factory=lambda: FrameBus("alerts"))
+    recorder_pool: FramePool | None = None
     bot_loop: Any = None
+    # (monotonic time, person boxes) of each camera's latest detection pass
+    detections: dict[int, Any] = field(default_factory=dict)
+    # Rolling recent-recordings clip of each camera (clips.ClipBuilder)
+    clips: dict[int, Any] = field(default_factory=dict)
+    # Monotonic time of each camera's last motion or person (event recording)
+    activity: dict[int, float] = field(default_factory=dict)
+    # Set once the model is loaded and warmed up and detection is running
+    detection_ready: threading.Event = field(default_factory=threading.Event)
 
 
 # Single shared state instance
 state = AppState()
 
+
+def _load_model() -> Any:
+    from .backends import InferenceBackend
+
+    return InferenceBackend.from_config(INFERENCE, YOLO_MODEL_PATH, VIDEO_SAVE_DIR)
+
+
+def _load_bot() -> Any:
+    from telegram import Bot
+
+    return Bot(token=TELEGRAM_TOKEN)
+
+
+def _load_segment_index() -> Any:
+    from .recordings import SegmentIndex
+
+    return SegmentIndex(SEGMENT_INDEX_PATH)
+
+
+# YOLO model (on the configured inference backend), Telegram bot & segment
+# index are built on first access of ``config.model`` / ``config.bot`` /
+# ``config.segment_index``: importing config (the web app, camera processes,
+# tools) must not pay for torch and the weights
+_LAZY = {
+    "model": _load_model,
+    "bot": _load_bot,
+    "segment_index": _load_segment_index,
+}
+_lazy_lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Any:
+    """Expose ``AppState`` fields as module attributes (``config.frame_rings``).
+
+    Also builds ``model``, ``bot`` and ``segment_index`` on first access.
+    """
+    if name in _LAZY:
+        with _lazy_lock:
+            if name not in globals():
+                with clock.measure(name):
+                    globals()[name] = _LAZY[name]()
+        return globals()[name]
+    try:
+        return getattr(state, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+
 # Thread pool executor for background jobs
 executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=4)
 
-# YOLO model & Telegram bot
-model = YOLO(YOLO_MODEL_PATH).float()
-bot = Bot(token=TELEGRAM_TOKEN)
-
 # ------------------ Logging configuration ------------------
 logging.basicConfig(
     filename=os.path.join(BASE_DIR, "security_guard_logs.txt"),
@@ -77,3 +158,12 @@ logging.basicConfig(
     level=logging.INFO,
 )
 logger = logging.getLogger(__name__)
+
+if FRAME_RING_SLOTS < 6:
+    # FrameRing works with 3, but detection pins a camera's frame until
+    # postprocessing is done, and capture drops frames while too few are free
+    logger.warning(
+        f"FRAME_RING_SLOTS is {FRAME_RING_SLOTS}; below 6 capture drops frames "
+        "while detection holds them"
+    )
+clock.mark("config")
@@ -1,57 +1,389 @@
 import asyncio
 import os
+import queue
 import subprocess
+import threading
 import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from typing import Any
 
-import cv2
+import numpy as np
 from telegram import InputFile
 from telegram.constants import ChatAction
 
 from . import config
+from .alerts import Alert
+from .annotate import annotator, person_boxes, timestamp_overlay
+from .clips import ClipExporter, run_ffmpeg
 from .config import logger
+from .motion import MotionGate
+from .pipeline import Stage, run_pipeline
+from .scheduler import DetectionScheduler
+from .startup import clock
+from .tracking import CameraTracker, TrackRegistry, load_tracker_args
+from .zones import ZoneSet
+
+
+@dataclass
+class InputGroup:
+    """Images sharing one model input shape, and where their results go."""
+
+    positions: list[int]
+    images: list[np.ndarray]
+    inputs: np.ndarray
+    letterbox: tuple[float, int, int]
+    preds: Any = None
+
+
+@dataclass
+class DetectionBatch:
+    """One scheduling round travelling through the detection pipeline."""
+
+    started: float
+    frames: list[tuple[int, np.ndarray]]
+    walls: list[float] = field(default_factory=list)
+    groups: list[InputGroup] = field(default_factory=list)
+    pins: ExitStack = field(default_factory=ExitStack)
+
+    def release(self) -> None:
+        """Unpin the ring slots of this batch's frames."""
+        self.pins.close()
 
 
 class DetectionEngine:
-    """Runs YOLO human detection on the latest frames and triggers alerts.
+    """Runs batched YOLO human detection on every camera and triggers alerts.
 
-    Periodically copies frames from ``config.latest_frames`` and runs YOLO
-    human detection. On detection, sends frames to ``config.alert_queue``.
-    If ``config.SECURE_LEVEL`` is 2, merges and sends recent recordings.
+    Subscribes to the newest frame of each camera on ``config.frame_buses``.
+    Whenever any camera publishes, the cameras that the ``DetectionScheduler``
+    considers due are gathered into one batch and run through a single forward
+    pass. Letterboxing, the forward pass and postprocessing (NMS, tracking,
+    annotation) run as pipeline stages on separate threads, so the model is
+    never idle while boxes are drawn. The scheduler gives busy cameras (recent
+    motion or person) full rate, lets idle cameras decay to a low rate and
+    never exceeds the global inferences-per-second budget. Tracking state stays
+    per camera. Every delivered frame is checked for motion before the
+    scheduler is asked, so motion raises an idle camera to full rate at once.
+    With ``MOTION_GATE`` enabled, cameras without motion are also left out of
+    the batch (apart from a periodic keep-alive). On detection, publishes an
+    ``Alert`` on ``config.alert_bus``. If ``config.SECURE_LEVEL`` is 2, merges
+    and sends recent recordings of that camera.
     """
 
-    def __init__(self, camera_index: int = 0) -> None:
-        self.camera_index = camera_index
+    def __init__(self, camera_indexes: list[int] | None = None) -> None:
+        if camera_indexes is None:
+            camera_indexes = list(config.CAMERA_INDEXES)
+        self.camera_indexes = camera_indexes
         self.last_detection: datetime = datetime.min
         self.last_15min_sent: datetime = datetime.min
         self.cooldown: timedelta = timedelta(minutes=5)  # 5 minute cooldown
+        # Alert clips are transcoded to fit CLIP_EXPORT.max_mb unless disabled
+        self.exporter: ClipExporter | None = None
+        if config.CLIP_EXPORT.get("enabled", True):
+            self.exporter = ClipExporter(
+                config.CLIP_EXPORT, config.RECORDER.get("ffmpeg", "ffmpeg")
+            )
+        self.scheduler = DetectionScheduler.from_config(
+            config.SCHEDULER, camera_indexes, config.DETECTION_FPS
+        )
+        self.batch_seconds: float = 0.0
+
+        # Newest frame only per camera; any new frame sets ``frames_ready``
+        self.frames_ready = threading.Event()
+        self.subscriptions = {
+            idx: config.frame_buses[idx].subscribe(
+                "detector",
+                wakeup=self.frames_ready,
+                rate=self.scheduler.active_fps,
+            )
+            for idx in camera_indexes
+        }
+
+        tracker_args = load_tracker_args(config.TRACKER_CONFIG)
+        self.trackers = {
+            idx: CameraTracker(tracker_args, frame_rate=config.DETECTION_FPS)
+            for idx in camera_indexes
+        }
+        self.track_registry = TrackRegistry.from_config(config.TRACK_ALERTS)
+
+        # Motion raises a camera to full rate and starts event recording, so
+        # it is checked whenever either can happen; ``MOTION_GATE.enabled``
+        # also skips inference on frames without it
+        self.gate_inference = config.MOTION_GATE.get("enabled", False)
+        self.motion_gates: dict[int, MotionGate] = {}
+        if (
+            self.gate_inference
+            or self.scheduler.idle_fps < self.scheduler.active_fps
+            or config.RECORDER.get("mode", "continuous") == "events"
+        ):
+            self.motion_gates = {
+                idx: MotionGate.from_config(config.MOTION_GATE, idx, config.FRAME_SIZE)
+                for idx in camera_indexes
+            }
+        # Cameras with ROI zones only run the model on their zone crops
+        self.zones: dict[int, ZoneSet] = {}
+        for idx in camera_indexes:
+            zones = ZoneSet.from_config(config.ZONES, idx, config.FRAME_SIZE)
+            if zones is not None:
+                self.zones[idx] = zones
+
+        # Bounded handoffs: one batch waits while the next stage is busy
+        to_infer: queue.Queue = queue.Queue(maxsize=1)
+        to_post: queue.Queue = queue.Queue(maxsize=1)
+        self.stages = [
+            Stage(
+                "preprocess",
+                self.preprocess,
+                source=self.wait_for_frames,
+                outbox=to_infer,
+                on_error=self.release,
+            ),
+            Stage(
+                "inference",
+                self.infer,
+                inbox=to_infer,
+                outbox=to_post,
+                on_error=self.release,
+            ),
+            Stage(
+                "postprocess",
+                self.postprocess,
+                inbox=to_post,
+                on_error=self.release,
+            ),
+        ]
+
+        self.report_interval: float = config.SCHEDULER.get(
+            "report_interval", config.MOTION_GATE.get("report_interval", 300)
+        )
+        self._last_report = time.monotonic()
 
     def run(self) -> None:
-        """Main detection loop."""
-        while config.system_running:
-            try:
-                frame = None
-                if self.camera_index in config.camera_locks:
-                    with config.camera_locks[self.camera_index]:
-                        if config.latest_frames.get(self.camera_index) is not None:
-                            frame = config.latest_frames[self.camera_index].copy()
+        """Warm the model up, then run the pipeline stages until shutdown."""
+        self.warm_up()
+        config.detection_ready.set()
+        clock.mark("detection ready")
+        run_pipeline(self.stages, lambda: config.system_running)
+
+    def warm_up(self) -> None:
+        """Load the model and run dummy batches of the shapes detection uses."""
+        width, height = config.FRAME_SIZE
+        full_frames = len(self.camera_indexes) - len(self.zones)
+        batches = [(full_frames, (height, width, 3), config.model.imgsz)]
+        for zones in self.zones.values():
+            w, h = zones.zones[0].crop_size
+            batches.append(
+                (len(zones.zones), (h, w, 3), zones.imgsz(config.model.imgsz))
+            )
+        with clock.measure("warm-up"):
+            config.model.warmup(batches)
+        logger.info(f"Detection model {config.model.label} loaded and warmed up")
+
+    @staticmethod
+    def release(item: Any) -> None:
+        """Unpin a batch that was dropped by a failing or stopping stage."""
+        if isinstance(item, DetectionBatch):
+            item.release()
+
+    def wait_for_frames(self) -> float | None:
+        """Pipeline source: block until any camera has a new frame."""
+        if not self.frames_ready.wait(timeout=0.5):
+            return None
+        self.frames_ready.clear()
+        return time.monotonic()
+
+    def preprocess(self, now: float) -> DetectionBatch | None:
+        """Stage 1: pick due cameras, pin their frames and letterbox them."""
+        batch = self.gather(now)
+        self.report_stats()
+        if batch is None:
+            return None
+
+        try:
+            # Group whole frames and zone crops by input size and shape
+            groups: dict[tuple, tuple[list[int], list[np.ndarray]]] = {}
+            for pos, (idx, frame) in enumerate(batch.frames):
+                zones = self.zones.get(idx)
+                if zones is None:
+                    imgsz, images = config.model.imgsz, [frame]
+                else:
+                    imgsz = zones.imgsz(config.model.imgsz)
+                    images = zones.crops(frame)
+                positions, group = groups.setdefault((imgsz, images[0].shape), ([], []))
+                positions.extend([pos] * len(images))
+                group.extend(images)
+
+            for (imgsz, _), (positions, images) in groups.items():
+                inputs, letterbox = config.model.preprocess(images, imgsz)
+                batch.groups.append(InputGroup(positions, images, inputs, letterbox))
+        except Exception:
+            batch.release()
+            raise
+        return batch
+
+    def gather(self, now: float) -> DetectionBatch | None:
+        """Pin the newest frame of every camera the scheduler admits."""
+        pins: dict[int, ExitStack] = {}
+        frames = {}
+        try:
+            for idx, subscription in self.subscriptions.items():
+                pin = ExitStack()
+                frame = pin.enter_context(subscription.next(timeout=0))
+                if frame is None:
+                    pin.close()
+                    continue
+                gate = self.motion_gates.get(idx)
+                if gate is not None:
+                    # Every delivered frame, not only due ones: an idle camera
+                    # notices motion (and starts event recording) at once and
+                    # is raised to full rate before the scheduler is asked
+                    gate.check(frame.image, now)
+                    self.scheduler.note_activity(idx, gate.last_motion)
+                    self.note_event(idx, gate.last_motion)
+                if not self.scheduler.due(idx, now) or (
+                    self.gate_inference and not gate.wants_inference(now)
+                ):
+                    pin.close()
+                    continue
+                pins[idx] = pin
+                frames[idx] = frame
+
+            admitted = self.scheduler.admit(list(frames), now)
+        except Exception:
+            for pin in pins.values():
+                pin.close()
+            raise
+
+        if frames:
+            clock.mark("first frame")
+        # Slots of admitted frames stay pinned until postprocess is done
+        batch = DetectionBatch(
+            now,
+            [(idx, frames[idx].image) for idx in admitted],
+            [frames[idx].wall for idx in admitted],
+        )
+        for idx, pin in pins.items():
+            if idx in admitted:
+                batch.pins.enter_context(pin)
+            else:
+                pin.close()
+        return batch if admitted else None
+
+    def infer(self, batch: DetectionBatch) -> DetectionBatch:
+        """Stage 2: forward passes only, so the model runs back to back."""
+        for group in batch.groups:
+            group.preds = config.model.forward(group.inputs)
+        return batch
+
+    def postprocess(self, batch: DetectionBatch) -> None:
+        """Stage 3: NMS, zone merge, tracking, alert dedupe and annotation."""
+        try:
+            per_camera: list[list] = [[] for _ in batch.frames]
+            for group in batch.groups:
+                results = config.model.postprocess(
+                    group.preds, group.images, group.letterbox
+                )
+                for pos, result in zip(group.positions, results, strict=True):
+                    per_camera[pos].append(result)
+
+            for (idx, frame), wall, results in zip(
+                batch.frames, batch.walls, per_camera, strict=True
+            ):
+                zones = self.zones.get(idx)
+                result = results[0] if zones is None else zones.merge(frame, results)
+                self.handle_result(idx, frame, result, wall)
+        finally:
+            batch.release()
+        self.batch_seconds = time.monotonic() - batch.started
+        if clock.mark("first inference"):
+            logger.info(f"Startup: {clock.report()}")
+
+    def handle_result(
+        self, idx: int, frame: np.ndarray, result, wall: float = 0.0
+    ) -> None:
+        """Track one camera's detections and publish an alert for new people."""
+        result = self.trackers[idx].update(result)
+        boxes = person_boxes(result)
+        # Latest boxes for the live stream and snapshots
+        config.detections[idx] = (time.monotonic(), boxes)
+
+        # Only proceed when a person is detected
+        if self.check_human_presence([result]):
+            self.scheduler.note_activity(idx)
+            self.note_event(idx, time.monotonic())
 
-                if frame is not None:
-                    results = config.model.track(frame, persist=True, verbose=False)
+            # One alert per new person track (plus optional dwell re-alerts)
+            if not self.track_registry.update(idx, self.person_track_ids(result)):
+                return
+            annotated_frame = annotator.render(frame, boxes)
+            timestamp_overlay.draw(annotated_frame, wall)
 
-                    # Only proceed when a person is detected
-                    if self.check_human_presence(results):
-                        annotated_frame = self.plot_human_boxes(frame, results)
+            config.alert_bus.publish(Alert(idx, annotated_frame))
 
-                        if not config.alert_queue.full():
-                            config.alert_queue.put(annotated_frame)
+            if config.SECURE_LEVEL == 2:
+                config.executor.submit(self.send_last_15min_recording, idx)
 
-                        if config.SECURE_LEVEL == 2:
-                            config.executor.submit(self.send_last_15min_recording)
+    def report_stats(self) -> None:
+        """Periodically log scheduler rates and motion gate skip rates."""
+        if time.monotonic() - self._last_report < self.report_interval:
+            return
+        self._last_report = time.monotonic()
 
-                time.sleep(0.1)
-            except Exception as e:  # pragma: no cover - defensive
-                logger.error(f"Detection error: {str(e)}")
+        scheduler = self.scheduler
+        logger.info(
+            f"Detection scheduler: time-to-first-detection bound "
+            f"{scheduler.ttfd_bound + self.batch_seconds:.2f}s, "
+            f"{scheduler.deferred} inferences deferred by the "
+            f"{scheduler.max_ips:g}/s budget"
+        )
+        for idx, stats in scheduler.stats().items():
+            logger.info(
+                f"Detection camera {idx}: {stats['rate']:.1f} inf/s now, "
+                f"{stats['inferences']} inferences, "
+                f"longest gap {stats['max_gap']:.2f}s"
+            )
+        scheduler.reset_stats()
+
+        for stage in self.stages:
+            stats = stage.stats.snapshot()
+            logger.info(
+                f"Detection stage {stage.name}: {stats['items']} runs, "
+                f"{stats['mean_ms']:.1f} ms avg / {stats['max_ms']:.1f} ms max, "
+                f"{stats['utilisation']:.0%} busy, "
+                f"{stats['blocked']:.0%} blocked on the next stage"
+            )
+
+        registry = self.track_registry
+        logger.info(
+            f"Track alerts: {registry.alerts} frames alerted, "
+            f"{registry.suppressed} person frames suppressed as known tracks"
+        )
+
+        for idx, gate in self.motion_gates.items() if self.gate_inference else ():
+            logger.info(
+                f"Motion gate camera {idx}: skipped "
+                f"{gate.skipped_fraction:.1%} of {gate.frames} inferences "
+                f"(last motion ratio {gate.motion_ratio:.4f})"
+            )
+
+    @staticmethod
+    def note_event(idx: int, when: float) -> None:
+        """Record motion or a person for event recording (``config.activity``)."""
+        if when > config.activity.get(idx, 0.0):
+            config.activity[idx] = when
+
+    @staticmethod
+    def person_track_ids(result) -> list[int]:
+        """Track IDs of the person boxes in ``result`` (empty if untracked)."""
+        boxes = result.boxes
+        if boxes.id is None:
+            return []
+        return [
+            int(track_id)
+            for track_id, cls in zip(boxes.id.tolist(), boxes.cls.tolist(), strict=True)
+            if int(cls) == 0
+        ]
 
     def check_human_presence(self, results) -> bool:
         """Return True if any person (class 0) is detected."""
@@ -62,115 +394,61 @@ class DetectionEngine:
                 return True
         return False
 
-    def plot_human_boxes(self, frame, results):
-        """Draw bounding boxes only for the person class (ID=0)."""
-        annotated_frame = frame.copy()
+    def send_last_15min_recording(self, camera_index: int = 0) -> None:
+        """Send the camera's last ``CLIP_SECONDS`` of recordings as one clip.
 
-        for result in results:
-            for box, cls in zip(result.boxes.xyxy, result.boxes.cls):
-                if int(cls) == 0:  # 0 = person class ID
-                    x1, y1, x2, y2 = map(int, box)
-
-                    cv2.rectangle(
-                        annotated_frame,
-                        (x1, y1),
-                        (x2, y2),
-                        (0, 255, 0),
-                        2,
-                    )
-                    cv2.putText(
-                        annotated_frame,
-                        "Human",
-                        (x1, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.5,
-                        (0, 255, 0),
-                        2,
-                    )
-        return annotated_frame
-
-    def send_last_15min_recording(self) -> None:
-        """Merge and send the last few minutes of recordings (5 minutes)."""
+        The clip comes from the camera's ``ClipBuilder`` and includes the
+        minute still being recorded.
+        """
         try:
             with config.mute_until_lock:
-                if (datetime.now() - self.last_15min_sent) < self.cooldown:
+                previous = self.last_15min_sent
+                if (datetime.now() - previous) < self.cooldown:
                     return
+                # Claimed before building, so simultaneous detections do not
+                # build the same clip
+                self.last_15min_sent = datetime.now()
 
-            end_time = datetime.now().replace(second=0, microsecond=0)
-            start_time = end_time - timedelta(minutes=5)
-
-            files = self.find_recordings(start_time, end_time)
-            if files:
-                self.merge_and_send(files)
+            builder = config.clips.get(camera_index)
+            snapshot = builder.snapshot() if builder is not None else None
+            if snapshot is None:
                 with config.mute_until_lock:
-                    self.last_15min_sent = datetime.now()
-        except Exception as e:  # pragma: no cover - defensive
-            logger.error(f"15-minute recording error: {str(e)}")
-
-    def find_recordings(self, start: datetime, end: datetime) -> list[str]:
-        """Check for an .avi file for each minute in the start-end range."""
-        files: list[str] = []
-        current = start.replace(second=0, microsecond=0)
-        while current <= end:
-            path = os.path.join(
-                config.VIDEO_SAVE_DIR,
-                str(self.camera_index),
-                f"{current.year}",
-                f"{current.month:02d}",
-                f"{current.day:02d}",
-                f"{current.hour:02d}",
-                f"{current.minute:02d}.avi",
+                    self.last_15min_sent = previous
+                return
+            listing, seconds = snapshot
+            started = time.monotonic()
+            try:
+                if self.exporter is not None:
+                    clip, took = self.exporter.export(listing, seconds)
+                else:
+                    clip = run_ffmpeg(builder.ffmpeg, listing, ["-c", "copy"])
+                    took = time.monotonic() - started
+            finally:
+                os.remove(listing)
+            # Encode time without waiting for a pool worker; upload time is
+            # logged by send_video
+            logger.info(
+                f"Camera {camera_index} clip: {seconds:.0f}s, "
+                f"{os.path.getsize(clip) / 2**20:.1f} MB, "
+                f"{'encoded' if self.exporter else 'copied'} in {took:.1f}s "
+                f"({time.monotonic() - started:.1f}s with queueing)"
             )
-            if os.path.exists(path):
-                files.append(path)
-            current += timedelta(minutes=1)
-        return files
-
-    def merge_and_send(self, files: list[str]) -> None:
-        """Merge the given files with ffmpeg and send as a single video."""
-        try:
-            merged_file = f"merged_{datetime.now().strftime('%Y%m%d%H%M%S')}.mp4"
-            filelist_path = "filelist.txt"
-            with open(filelist_path, "w", encoding="utf-8") as f:
-                for file in files:
-                    f.write(f"file '{file}'\n")
 
             asyncio.run_coroutine_threadsafe(
                 self.send_merge_progress(True),
                 loop=config.bot_loop,
             )
-
-            cmd = [
-                "ffmpeg",
-                "-f",
-                "concat",
-                "-safe",
-                "0",
-                "-i",
-                filelist_path,
-                "-c",
-                "copy",
-                "-y",
-                merged_file,
-            ]
-            subprocess.run(cmd, check=True, timeout=300)
-
             asyncio.run_coroutine_threadsafe(
-                self.send_merge_progress(False),
-                loop=config.bot_loop,
-            )
-
-            asyncio.run_coroutine_threadsafe(
-                self.send_video(merged_file),
+                self.send_video(
+                    clip,
+                    f"Camera {camera_index} - last {config.CLIP_SECONDS / 60:g} minutes",
+                ),
                 loop=config.bot_loop,
             )
         except subprocess.TimeoutExpired:
             logger.error("FFmpeg timeout!")
         except Exception as e:  # pragma: no cover - defensive
-            logger.error(f"Video merge error: {str(e)}")
-        finally:
-            if os.path.exists("filelist.txt"):
-                os.remove("filelist.txt")
+            logger.error(f"Clip error: {str(e)}")
 
     async def send_merge_progress(self, is_starting: bool):
         action = ChatAction.UPLOAD_VIDEO if is_starting else ChatAction.TYPING
@@ -191,16 +469,24 @@ class DetectionEngine:
         with config.mute_until_lock:
             config.mute_until = datetime.now() + timedelta(seconds=duration)
 
-    async def send_video(self, filename: str) -> None:
-        """Send the merged video to Telegram and delete the file."""
+    async def send_video(
+        self, filename: str, caption: str = "Last minutes of recording"
+    ) -> None:
+        """Send the clip to Telegram and delete the file."""
         try:
+            started = time.monotonic()
             with open(filename, "rb") as video:
                 await config.bot.send_video(
                     chat_id=config.AUTHORIZED_USER_ID,
                     video=InputFile(video),
-                    caption="Last 15 minutes recording",
+                    caption=caption,
                     write_timeout=60,
                 )
-            os.remove(filename)
+            logger.info(
+                f"Clip uploaded in {time.monotonic() - started:.1f}s "
+                f"({os.path.getsize(filename) / 2**20:.1f} MB)"
+            )
         except Exception as e:  # pragma: no cover - defensive
             logger.error(f"Video could not be sent: {str(e)}")
+        finally:
+            os.remove(filename)
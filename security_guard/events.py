@@ -0,0 +1,173 @@
+import json
+import os
+from collections import deque
+from collections.abc import Callable, Iterator
+from datetime import datetime
+from math import ceil
+
+import cv2
+import numpy as np
+
+from .config import logger
+
+
+class PreRoll:
+    """The last ``seconds`` of frames, JPEG-encoded in memory.
+
+    Raw 640x480 frames are ~0.9 MB each, so 10 s at 25 fps would hold about
+    230 MB per camera; as JPEGs it is a few MB. The ring is also capped at
+    ``seconds * fps`` frames, so a camera delivering more than ``fps``
+    cannot grow it.
+    """
+
+    def __init__(self, seconds: float, fps: float, quality: int = 90) -> None:
+        self.seconds = seconds
+        self.frames: deque[tuple[float, np.ndarray]] = deque(
+            maxlen=max(1, ceil(seconds * fps))
+        )
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buf.nbytes for _, buf in self.frames)
+
+    def add(self, image: np.ndarray, wall: float) -> None:
+        """Keep ``image`` captured at ``wall``; forget frames older than the window."""
+        if self.seconds <= 0:
+            return
+        ok, buf = cv2.imencode(".jpg", image, self.params)
+        if ok:
+            self.frames.append((wall, buf))
+        while self.frames and self.frames[0][0] < wall - self.seconds:
+            self.frames.popleft()
+
+    def drain(self) -> Iterator[tuple[float, np.ndarray]]:
+        """Decoded frames, oldest first, emptying the ring."""
+        while self.frames:
+            wall, buf = self.frames.popleft()
+            yield wall, cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+
+class EventIndex:
+    """Start, end and files of each event clip, one JSON line per event."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def add(self, start: float, end: float, files: list[str]) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        entry = {
+            "start": datetime.fromtimestamp(start).isoformat(timespec="milliseconds"),
+            "end": datetime.fromtimestamp(end).isoformat(timespec="milliseconds"),
+            "files": files,
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def between(self, start: datetime, end: datetime) -> list[dict]:
+        """Events overlapping ``start``-``end``, oldest first."""
+        if not os.path.exists(self.path):
+            return []
+        events = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                event = json.loads(line)
+                if (
+                    datetime.fromisoformat(event["start"]) <= end
+                    and datetime.fromisoformat(event["end"]) >= start
+                ):
+                    events.append(event)
+        return events
+
+
+class EventRecorder:
+    """Writes frames to disk only around activity.
+
+    While the camera's last motion or person (``last_activity()``, a
+    monotonic time) is more than ``post_roll`` seconds before a frame, the
+    frame only goes into the pre-roll. The first frame within ``post_roll``
+    starts an event: the pre-roll is written first, so the clip also shows
+    the seconds before the trigger and covers the detection delay, then
+    frames go straight to ``segments`` until ``post_roll`` seconds pass
+    without activity. Each event is added to ``index``.
+
+    Files keep the per-minute layout. A minute's file stays open while the
+    pre-roll still reaches back into it, so a later event in the same minute
+    continues that file instead of overwriting it.
+    """
+
+    def __init__(
+        self,
+        segments,
+        last_activity: Callable[[], float | None],
+        index: EventIndex,
+        pre_roll: float = 10.0,
+        post_roll: float = 20.0,
+        fps: float = 25.0,
+        quality: int = 90,
+        name: str = "Recorder",
+    ) -> None:
+        self.segments = segments
+        self.last_activity = last_activity
+        self.index = index
+        self.pre_roll = PreRoll(pre_roll, fps, quality)
+        self.post_roll = post_roll
+        self.name = name
+        self.start: float | None = None
+        self.end = 0.0
+        self.files: list[str] = []
+        self.events = 0
+        self.frames_seen = 0
+        self.frames_written = 0
+
+    def write(self, image: np.ndarray, wall: float, monotonic: float) -> None:
+        """Record or hold ``image`` captured at ``wall``/``monotonic``."""
+        self.frames_seen += 1
+        last = self.last_activity()
+        if last is not None and monotonic - last <= self.post_roll:
+            if self.start is None:
+                self._begin(wall)
+            self._write(image, wall)
+            return
+
+        self.finish()
+        self.pre_roll.add(image, wall)
+        segments = self.segments
+        if (
+            segments.minute is not None
+            and (wall - self.pre_roll.seconds) // 60 > segments.minute
+        ):
+            segments.close(wait=False)
+
+    def _begin(self, wall: float) -> None:
+        self.start = self.pre_roll.frames[0][0] if self.pre_roll.frames else wall
+        self.files = []
+        logger.info(f"{self.name} - event recording started")
+        for held_wall, held in self.pre_roll.drain():
+            self._write(held, held_wall)
+
+    def _write(self, image: np.ndarray, wall: float) -> None:
+        self.segments.write(image, wall)
+        self.frames_written += 1
+        self.end = wall
+        path = self.segments.path
+        if path is not None and (not self.files or self.files[-1] != path):
+            self.files.append(path)
+
+    def finish(self) -> None:
+        """End the running event, if any, and index it."""
+        if self.start is None:
+            return
+        try:
+            self.index.add(self.start, self.end, self.files)
+        except Exception as e:  # pragma: no cover - defensive
+            logger.error(f"{self.name} event index error: {str(e)}")
+        self.events += 1
+        logger.info(
+            f"{self.name} - event recorded: {self.end - self.start:.1f}s "
+            f"in {len(self.files)} file(s)"
+        )
+        self.start = None
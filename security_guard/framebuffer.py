@@ -0,0 +1,312 @@
+import multiprocessing as mp
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Header words: newest slot index, newest sequence number, decode demand
+_LATEST, _SEQ, _DEMAND = 0, 1, 2
+_HEADER_WORDS = 3
+# Per-slot capture timestamps: monotonic and wall-clock seconds
+_STAMPS = 2
+
+
+@dataclass(frozen=True)
+class Frame:
+    """Read-only view of one published ring slot.
+
+    ``monotonic`` and ``wall`` are the capture time (``time.monotonic`` /
+    ``time.time``); 0 when unknown.
+    """
+
+    seq: int
+    slot: int
+    image: np.ndarray
+    monotonic: float = 0.0
+    wall: float = 0.0
+
+
+class FrameRing:
+    """Per-camera ring of preallocated frame slots with sequence numbers.
+
+    The capture thread fills a free slot in place (``writable_slot``) and then
+    ``publish``-es it. Readers get a read-only view of the newest slot without
+    copying. Slots pinned by a reader (``read``) are never handed out for
+    writing, so a view stays valid for as long as the pin is held.
+
+    All ring state (header, per-slot sequence numbers, pin counts, capture
+    timestamps and pixels) lives in one buffer so that ``SharedFrameRing``
+    can place it in shared memory unchanged.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, ...],
+        slots: int = 8,
+        dtype: np.dtype = np.uint8,
+        buffer=None,
+        lock=None,
+    ) -> None:
+        if slots < 3:
+            raise ValueError("FrameRing needs at least 3 slots")
+
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        self._lock = lock if lock is not None else threading.Lock()
+        self._writing = -1
+
+        fresh = buffer is None
+        if fresh:
+            buffer = bytearray(self.nbytes(self.shape, slots, self.dtype))
+
+        words = _HEADER_WORDS + 2 * slots
+        meta = np.frombuffer(buffer, dtype=np.int64, count=words)
+        self._state = meta[:_HEADER_WORDS]
+        self._seqs = meta[_HEADER_WORDS : _HEADER_WORDS + slots]
+        self._pins = meta[_HEADER_WORDS + slots :]
+        self._stamps = np.frombuffer(
+            buffer, dtype=np.float64, count=_STAMPS * slots, offset=words * 8
+        ).reshape(slots, _STAMPS)
+        self._buffer = np.frombuffer(
+            buffer,
+            dtype=self.dtype,
+            count=slots * int(np.prod(self.shape)),
+            offset=(words + _STAMPS * slots) * 8,
+        ).reshape((slots, *self.shape))
+        if fresh:
+            self._state[:] = -1
+            self._seqs[:] = -1
+
+        # Views are built once so the hot path never allocates them
+        self._writable = [self._buffer[i] for i in range(slots)]
+        self._readonly = []
+        for i in range(slots):
+            view = self._buffer[i].view()
+            view.flags.writeable = False
+            self._readonly.append(view)
+
+    @staticmethod
+    def nbytes(shape: tuple[int, ...], slots: int, dtype: np.dtype = np.uint8) -> int:
+        """Size of the buffer backing a ring of the given geometry."""
+        words = _HEADER_WORDS + (2 + _STAMPS) * slots
+        return words * 8 + slots * int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the newest published frame (-1 if none)."""
+        return int(self._state[_SEQ])
+
+    @property
+    def demand(self) -> float | None:
+        """Frames per second the readers want decoded; ``None``: every frame.
+
+        Written by the reading side (``FrameBus``), read by capture, which may
+        run in another process.
+        """
+        millihertz = int(self._state[_DEMAND])
+        return None if millihertz < 0 else millihertz / 1000
+
+    @demand.setter
+    def demand(self, fps: float | None) -> None:
+        self._state[_DEMAND] = -1 if fps is None else round(fps * 1000)
+
+    def writable_slot(self) -> np.ndarray | None:
+        """Reserve a slot that is neither the newest frame nor pinned.
+
+        Returns ``None`` when every candidate slot is pinned by readers; the
+        caller should drop the frame in that case.
+        """
+        with self._lock:
+            latest = int(self._state[_LATEST])
+            for step in range(1, self.slots + 1):
+                idx = (latest + step) % self.slots
+                if idx != latest and self._pins[idx] == 0:
+                    self._writing = idx
+                    self._seqs[idx] = -1
+                    return self._writable[idx]
+        return None
+
+    def publish(self, monotonic: float = 0.0, wall: float = 0.0) -> int:
+        """Publish the slot reserved by ``writable_slot`` as the newest frame.
+
+        ``monotonic`` and ``wall`` are the frame's capture time.
+        """
+        with self._lock:
+            if self._writing < 0:
+                raise RuntimeError("publish() called without a reserved slot")
+            seq = int(self._state[_SEQ]) + 1
+            self._stamps[self._writing] = monotonic, wall
+            self._seqs[self._writing] = seq
+            self._state[_LATEST] = self._writing
+            self._state[_SEQ] = seq
+            self._writing = -1
+            return seq
+
+    def latest(self) -> Frame | None:
+        """Return the newest frame without pinning it.
+
+        The view may be recycled by the writer after ``slots - 1`` further
+        frames; use ``read`` when the frame is held for longer than that.
+        """
+        with self._lock:
+            idx = int(self._state[_LATEST])
+            if idx < 0:
+                return None
+            return self._frame(idx)
+
+    def _frame(self, idx: int) -> Frame:
+        monotonic, wall = self._stamps[idx].tolist()
+        return Frame(int(self._seqs[idx]), idx, self._readonly[idx], monotonic, wall)
+
+    @contextmanager
+    def read(self) -> Iterator[Frame | None]:
+        """Pin the newest frame for the duration of the ``with`` block."""
+        with self._lock:
+            idx = int(self._state[_LATEST])
+            if idx < 0:
+                frame = None
+            else:
+                self._pins[idx] += 1
+                frame = self._frame(idx)
+        try:
+            yield frame
+        finally:
+            if frame is not None:
+                with self._lock:
+                    self._pins[idx] -= 1
+
+    @contextmanager
+    def pin(self, frame: Frame) -> Iterator[Frame | None]:
+        """Pin a previously published frame if its slot still holds it.
+
+        Yields ``None`` when the slot has already been recycled by the writer.
+        """
+        with self._lock:
+            pinned = int(self._seqs[frame.slot]) == frame.seq
+            if pinned:
+                self._pins[frame.slot] += 1
+        try:
+            yield frame if pinned else None
+        finally:
+            if pinned:
+                with self._lock:
+                    self._pins[frame.slot] -= 1
+
+    def is_current(self, frame: Frame) -> bool:
+        """Return True if ``frame``'s slot has not been overwritten since."""
+        return int(self._seqs[frame.slot]) == frame.seq
+
+
+class SharedFrameRing(FrameRing):
+    """``FrameRing`` in ``multiprocessing.shared_memory``.
+
+    A capture process writes into it and the parent process reads views of the
+    same pages, so frames never get pickled. Pins are shared too, guarded by a
+    process-shared condition that also wakes ``wait`` on every publish.
+
+    Instances can be passed as ``multiprocessing.Process`` arguments; the
+    child re-attaches to the same segment by name.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, ...],
+        slots: int = 8,
+        dtype: np.dtype = np.uint8,
+        name: str | None = None,
+        cond=None,
+    ) -> None:
+        self._owner = name is None
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(
+                create=True, size=self.nbytes(shape, slots, dtype)
+            )
+            cond = mp.Condition(mp.Lock())
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._cond = cond
+        super().__init__(shape, slots, dtype, buffer=self._shm.buf, lock=cond)
+        if self._owner:
+            self._state[:] = -1
+            self._seqs[:] = -1
+            self._pins[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __reduce__(self):
+        return (
+            SharedFrameRing,
+            (self.shape, self.slots, self.dtype.str, self.name, self._cond),
+        )
+
+    def publish(self, monotonic: float = 0.0, wall: float = 0.0) -> int:
+        seq = super().publish(monotonic, wall)
+        with self._cond:
+            self._cond.notify_all()
+        return seq
+
+    def wait(self, after_seq: int, timeout: float | None = None) -> int:
+        """Block until a frame newer than ``after_seq`` is published."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq > after_seq, timeout=timeout)
+        return self.seq
+
+    def close(self) -> None:
+        """Detach from the segment; the owner also unlinks it."""
+        # Drop every numpy view first, the segment cannot close while exported
+        self._writable = self._readonly = []
+        self._buffer = self._state = self._seqs = self._pins = self._stamps = None
+        try:
+            self._shm.close()
+        except BufferError:  # pragma: no cover - a reader still holds a view
+            pass
+        if self._owner:
+            self._shm.unlink()
+
+
+class FramePool:
+    """Preallocated frame buffers under one byte budget shared by all cameras.
+
+    Subscribers that keep their own copy of every frame (the recorders)
+    ``acquire`` a buffer, copy into it and ``release`` it once the frame is
+    written, so frames queued across all cameras never hold more than
+    ``budget`` bytes and no frame is allocated on the hot path.
+    """
+
+    def __init__(
+        self, shape: tuple[int, ...], budget: int, dtype: np.dtype = np.uint8
+    ) -> None:
+        self.frame_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self.capacity = budget // self.frame_bytes
+        if self.capacity < 1:
+            raise ValueError("FramePool budget is smaller than one frame")
+        self._buffers = np.empty((self.capacity, *shape), dtype=dtype)
+        self._free = list(range(self.capacity))
+        self._lock = threading.Lock()
+        self.high_water = 0
+
+    @property
+    def in_use(self) -> int:
+        return self.capacity - len(self._free)
+
+    def acquire(self) -> int | None:
+        """Index of a free buffer, or ``None`` when the budget is used up."""
+        with self._lock:
+            if not self._free:
+                return None
+            index = self._free.pop()
+            self.high_water = max(self.high_water, self.capacity - len(self._free))
+            return index
+
+    def release(self, index: int) -> None:
+        with self._lock:
+            self._free.append(index)
+
+    def buffer(self, index: int) -> np.ndarray:
+        return self._buffers[index]
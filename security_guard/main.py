@@ -1,10 +1,10 @@
 """
  █████╗ ███████╗    ███████╗ ██████╗██████╗ ██╗   ██╗██████╗ ████████╗
 ██╔══██╗██╔════╝    ██╔════╝██╔════╝██╔══██╗╚██╗ ██╔╝██╔══██╗╚══██╔══╝
-███████║███████╗    ███████╗██║     ██████╔╝ ╚████╔╝ ██████╔╝   ██║   
-██╔══██║╚════██║    ╚════██║██║     ██╔══██╗  ╚██╔╝  ██╔═══╝    ██║   
-██║  ██║███████║    ███████║╚██████╗██║  ██║   ██║   ██║        ██║   
-╚═╝  ╚═╝╚══════╝    ╚══════╝ ╚═════╝╚═╝  ╚═╝   ╚═╝   ╚═╝        ╚═╝  
+███████║███████╗    ███████╗██║     ██████╔╝ ╚████╔╝ ██████╔╝   ██║
+██╔══██║╚════██║    ╚════██║██║     ██╔══██╗  ╚██╔╝  ██╔═══╝    ██║
+██║  ██║███████║    ███████║╚██████╗██║  ██║   ██║   ██║        ██║
+╚═╝  ╚═╝╚══════╝    ╚══════╝ ╚═════╝╚═╝  ╚═╝   ╚═╝   ╚═╝        ╚═╝
 
  AI-powered multi-camera security system with YOLO detection, Telegram alerts, and a Flask web dashboard.
     • Real-time human detection on one or more cameras
@@ -20,7 +20,7 @@ Dependencies:
     - opencv-python
     - ultralytics
     - python-telegram-bot
-    - Flask    
+    - Flask
 Compatibility:
     - Windows | Linux | macOS
 
@@ -28,6 +28,7 @@ Compatibility:
 # Example usage
 >>> python -m security_guard.main
 """
+
 import asyncio
 import os
 import platform
@@ -38,14 +39,18 @@ from datetime import datetime
 from . import config, webapp
 from .alerts import AlertSystem
 from .bot import SecurityBot
-from .camera import CameraStream
+from .camera import CameraProcess, CameraStream
 from .config import logger
 from .detection import DetectionEngine
 from .recorder import VideoRecorder
+from .retention import RetentionManager, send_warning
+from .startup import clock
 
 
 def main() -> None:
     """Main entry point for cam-security-guard."""
+    clock.mark("imports")
+
     # Create a dedicated event loop for the Telegram bot
     config.bot_loop = asyncio.new_event_loop()
     asyncio.set_event_loop(config.bot_loop)
@@ -58,10 +63,29 @@ def main() -> None:
 
     os.makedirs(config.VIDEO_SAVE_DIR, exist_ok=True)
 
-    cameras = [CameraStream(idx) for idx in config.CAMERA_INDEXES]
+    # Recordings from before the segment index existed, before any recorder
+    # adds rows of its own
+    count = config.segment_index.index_existing(config.VIDEO_SAVE_DIR)
+    if count:
+        logger.info(f"Indexed {count} existing recordings")
+
+    if config.CAMERA_PROCESSES:
+        # One capture process per camera; frames arrive via shared memory
+        cameras = [CameraProcess(idx) for idx in config.CAMERA_INDEXES]
+        for cam in cameras:
+            cam.start()
+    else:
+        cameras = [CameraStream(idx) for idx in config.CAMERA_INDEXES]
     recorders = [VideoRecorder(idx) for idx in config.CAMERA_INDEXES]
 
-    detector = DetectionEngine(camera_index=0)
+    retention = RetentionManager(
+        config.segment_index,
+        config.VIDEO_SAVE_DIR,
+        config.RETENTION,
+        notify=send_warning,
+    )
+
+    detector = DetectionEngine(camera_indexes=config.CAMERA_INDEXES)
     alerts = AlertSystem()
 
     security_bot = SecurityBot()
@@ -82,6 +106,12 @@ def main() -> None:
         t.start()
         threads.append(t)
 
+    # Deletes the oldest recordings to stay within the quotas
+    t_retention = threading.Thread(target=retention.run, name="Retention")
+    t_retention.daemon = True
+    t_retention.start()
+    threads.append(t_retention)
+
     # Detection engine
     t_detector = threading.Thread(target=detector.run, name="DetectionEngine")
     t_detector.daemon = True
@@ -112,8 +142,10 @@ def main() -> None:
     t_bot.start()
     threads.append(t_bot)
 
-    # Send startup message
+    # Send startup message once the model is loaded and warmed up
     time.sleep(2)
+    if not config.detection_ready.wait(timeout=300):
+        logger.error("Detection is not ready after 300s, check the model")
     try:
         future = asyncio.run_coroutine_threadsafe(
             config.bot.send_message(
@@ -0,0 +1,146 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap motion check in front of YOLO inference.
+
+    Frames are downscaled to ``scale_width`` pixels wide grayscale and compared
+    either with the previously checked frame (``method="diff"``) or with a
+    MOG2 background model (``method="mog2"``). A frame counts as motion when
+    more than ``min_area`` (fraction of unmasked pixels) changed by more than
+    ``threshold`` grey levels. Inference runs on motion, for ``hold`` seconds
+    after it, and at least every ``keepalive`` seconds so that someone standing
+    perfectly still is still seen.
+
+    ``masks`` are polygons in full-frame pixel coordinates whose area is
+    ignored (trees, a busy street, a TV).
+    """
+
+    def __init__(
+        self,
+        frame_size: tuple[int, int],
+        method: str = "diff",
+        scale_width: int = 160,
+        threshold: int = 25,
+        min_area: float = 0.002,
+        keepalive: float = 10.0,
+        hold: float = 2.0,
+        masks: list[list[list[int]]] | None = None,
+    ) -> None:
+        if method not in ("diff", "mog2"):
+            raise ValueError(f"Unknown motion method: {method}")
+
+        width, height = frame_size
+        self.method = method
+        self.scale = scale_width / width
+        self.size = (scale_width, max(1, round(height * self.scale)))
+        self.threshold = threshold
+        self.min_area = min_area
+        self.keepalive = keepalive
+        self.hold = hold
+
+        # 255 where motion counts, 0 inside ignore masks
+        self.mask = np.full((self.size[1], self.size[0]), 255, dtype=np.uint8)
+        for polygon in masks or []:
+            points = np.round(np.asarray(polygon, dtype=np.float32) * self.scale)
+            cv2.fillPoly(self.mask, [points.astype(np.int32)], 0)
+        self._active_pixels = max(int(np.count_nonzero(self.mask)), 1)
+
+        self._small = np.empty((self.size[1], self.size[0], 3), dtype=np.uint8)
+        self._gray = np.empty((self.size[1], self.size[0]), dtype=np.uint8)
+        self._previous: np.ndarray | None = None
+        self._seeded = False
+        self._diff = np.empty_like(self._gray)
+        self._subtractor = (
+            cv2.createBackgroundSubtractorMOG2(history=500, detectShadows=False)
+            if method == "mog2"
+            else None
+        )
+
+        self.last_motion = 0.0
+        self.last_inference = 0.0
+        self.motion_ratio = 0.0
+        self.frames = 0
+        self.skipped = 0
+
+    @classmethod
+    def from_config(
+        cls, settings: dict, camera_index: int, frame_size: tuple[int, int]
+    ) -> "MotionGate":
+        """Build a gate from the ``MOTION_GATE`` config section."""
+        masks = settings.get("masks", {}).get(str(camera_index), [])
+        return cls(
+            frame_size,
+            method=settings.get("method", "diff"),
+            scale_width=settings.get("scale_width", 160),
+            threshold=settings.get("threshold", 25),
+            min_area=settings.get("min_area", 0.002),
+            keepalive=settings.get("keepalive", 10.0),
+            hold=settings.get("hold", 2.0),
+            masks=masks,
+        )
+
+    @property
+    def skipped_fraction(self) -> float:
+        """Fraction of checked frames for which inference was skipped."""
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def detect_motion(self, frame: np.ndarray) -> bool:
+        """Return True if ``frame`` differs enough from the reference.
+
+        The first frame only seeds the reference (or background model):
+        with nothing to compare it to, it is not motion.
+        """
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.GaussianBlur(self._gray, (5, 5), 0, dst=self._gray)
+
+        if self._subtractor is not None:
+            foreground = self._subtractor.apply(self._gray)
+            if not self._seeded:
+                self._seeded = True
+                return False
+            changed = cv2.bitwise_and(foreground, self.mask)
+        else:
+            if self._previous is None:
+                self._previous = self._gray.copy()
+                return False
+            cv2.absdiff(self._gray, self._previous, dst=self._diff)
+            self._previous, self._gray = self._gray, self._previous
+            _, changed = cv2.threshold(
+                self._diff, self.threshold, 255, cv2.THRESH_BINARY
+            )
+            changed = cv2.bitwise_and(changed, self.mask)
+
+        self.motion_ratio = cv2.countNonZero(changed) / self._active_pixels
+        return self.motion_ratio > self.min_area
+
+    def check(self, frame: np.ndarray, now: float | None = None) -> bool:
+        """Look for motion in ``frame`` and record when it was last seen."""
+        moved = self.detect_motion(frame)
+        if moved:
+            self.last_motion = time.monotonic() if now is None else now
+        return moved
+
+    def wants_inference(self, now: float | None = None) -> bool:
+        """Decide whether the camera needs full inference and record the outcome."""
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        run = (
+            now - self.last_motion <= self.hold
+            or now - self.last_inference >= self.keepalive
+        )
+        if run:
+            self.last_inference = now
+        else:
+            self.skipped += 1
+        return run
+
+    def should_infer(self, frame: np.ndarray, now: float | None = None) -> bool:
+        """``check`` ``frame``, then decide whether it needs full inference."""
+        now = time.monotonic() if now is None else now
+        self.check(frame, now)
+        return self.wants_inference(now)
@@ -0,0 +1,135 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class StageStats:
+    """Per-stage latency and utilisation over one reporting window."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.window_start = time.perf_counter()
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.max_latency = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self.lock:
+            self.items += 1
+            self.busy += seconds
+            self.max_latency = max(self.max_latency, seconds)
+
+    def add_blocked(self, seconds: float) -> None:
+        with self.lock:
+            self.blocked += seconds
+
+    def snapshot(self, reset: bool = True) -> dict[str, float]:
+        """Items, mean/max latency (ms), busy and blocked share of wall time."""
+        with self.lock:
+            wall = max(time.perf_counter() - self.window_start, 1e-9)
+            snap = {
+                "items": self.items,
+                "mean_ms": 1000 * self.busy / self.items if self.items else 0.0,
+                "max_ms": 1000 * self.max_latency,
+                "utilisation": self.busy / wall,
+                "blocked": self.blocked / wall,
+            }
+            if reset:
+                self.reset()
+        return snap
+
+
+class Stage:
+    """One pipeline step on its own thread with bounded handoff queues.
+
+    Items come from ``inbox`` (or, for the first stage, from ``source``,
+    which may block waiting for input without counting as busy time). The
+    result of ``work`` is put on ``outbox``; a full outbox blocks the stage,
+    which is the backpressure that keeps earlier stages from running ahead.
+    ``work`` returning ``None`` drops the item. ``on_error`` is called with
+    an item whose ``work`` raised, to release what it holds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        work: Callable[[Any], Any],
+        inbox: queue.Queue | None = None,
+        outbox: queue.Queue | None = None,
+        source: Callable[[], Any] | None = None,
+        on_error: Callable[[Any], None] | None = None,
+    ) -> None:
+        if (inbox is None) == (source is None):
+            raise ValueError("A stage needs exactly one of inbox or source")
+        self.name = name
+        self.work = work
+        self.inbox = inbox
+        self.outbox = outbox
+        self.source = source
+        self.on_error = on_error
+        self.stats = StageStats()
+
+    def _next(self) -> Any:
+        if self.source is not None:
+            return self.source()
+        try:
+            return self.inbox.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    def _hand_off(self, item: Any, running: Callable[[], bool]) -> bool:
+        start = time.perf_counter()
+        try:
+            while running():
+                try:
+                    self.outbox.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.stats.add_blocked(time.perf_counter() - start)
+
+    def run(self, running: Callable[[], bool]) -> None:
+        while running():
+            item = self._next()
+            if item is None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = self.work(item)
+            except Exception as e:  # pragma: no cover - defensive
+                logger.error(f"Pipeline stage {self.name} error: {str(e)}")
+                if self.on_error is not None:
+                    self.on_error(item)
+                continue
+            self.stats.record(time.perf_counter() - start)
+
+            if result is None or self.outbox is None:
+                continue
+            if not self._hand_off(result, running) and self.on_error is not None:
+                self.on_error(result)
+
+    def start(self, running: Callable[[], bool]) -> threading.Thread:
+        thread = threading.Thread(
+            target=self.run, args=(running,), name=self.name, daemon=True
+        )
+        thread.start()
+        return thread
+
+
+def run_pipeline(stages: list[Stage], running: Callable[[], bool]) -> None:
+    """Run every stage on its own thread until ``running()`` turns false."""
+    threads = [stage.start(running) for stage in stages]
+    for thread in threads:
+        thread.join()
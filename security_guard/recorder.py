@@ -1,15 +1,406 @@
 import os
+import subprocess
+import threading
 import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 
 import cv2
+import numpy as np
 
 from . import config
+from .annotate import timestamp_overlay
+from .clips import ClipBuilder
 from .config import logger
+from .events import EventIndex, EventRecorder
+from .framebuffer import FramePool
+
+_pool_lock = threading.Lock()
+
+# Seconds before a minute edge at which the next segment is opened
+PREOPEN_SECONDS = 5.0
+
+# A segment that is open, or being opened: (minute, file path, writer)
+Segment = tuple[int, str, cv2.VideoWriter | None]
+
+# File of a minute under the camera's folder (strftime codes, also used by
+# ffmpeg's segment muxer)
+SEGMENT_LAYOUT = os.path.join("%Y", "%m", "%d", "%H", "%M.avi")
+
+
+def recorder_pool() -> FramePool:
+    """The frame buffers shared by all recorders (``RECORDER_BUFFER_MB``)."""
+    with _pool_lock:
+        if config.recorder_pool is None:
+            width, height = config.FRAME_SIZE
+            config.recorder_pool = FramePool(
+                (height, width, 3), config.RECORDER_BUFFER_MB * 2**20
+            )
+        return config.recorder_pool
+
+
+class SegmentWriter:
+    """Writes frames into one file per wall-clock minute.
+
+    Segments are cut on exact minute edges of the frames' capture time
+    (``minute = wall // 60``), not when the writing thread gets to them. The
+    next minute's folders and ``cv2.VideoWriter`` are created on a helper
+    thread ``preopen`` seconds before the edge, and the finished file is
+    released there as well, so at the edge the recording thread only swaps
+    writers instead of stalling while one container is finalised and the
+    next is created.
+
+    ``on_open(path, start)`` and ``on_close(path, start, end, frames)`` are
+    called on the helper thread for every file that gets frames (``start``
+    and ``end`` are the capture times of its first and last frame).
+    """
+
+    def __init__(
+        self,
+        path_for: Callable[[datetime], str],
+        fps: float,
+        frame_size: tuple[int, int],
+        name: str = "Recorder",
+        preopen: float = PREOPEN_SECONDS,
+        on_open: Callable[[str, float], None] | None = None,
+        on_close: Callable[[str, float, float, int], None] | None = None,
+    ) -> None:
+        self.path_for = path_for
+        self.fps = fps
+        self.frame_size = frame_size
+        self.name = name
+        self.preopen = preopen
+        self.on_open = on_open
+        self.on_close = on_close
+        # If X264 is not available with .avi on this system, MJPG is used
+        # for every later segment without trying X264 again.
+        self.codecs = ["X264", "MJPG"]
+        self.minute: int | None = None
+        self.path: str | None = None
+        self.writer: cv2.VideoWriter | None = None
+        self.started = self.last_wall = 0.0
+        self.frames = 0
+        self._next: Future | None = None
+        # One worker: opening and releasing happen in submission order
+        self._helper = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.rollovers = 0
+        self.max_swap = 0.0
+
+    def open(self, minute: int) -> Segment:
+        """Create the folders and the writer of the segment starting at ``minute``."""
+        path = self.path_for(datetime.fromtimestamp(minute * 60))
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            for i, codec in enumerate(self.codecs):
+                writer = cv2.VideoWriter(
+                    path, cv2.VideoWriter_fourcc(*codec), self.fps, self.frame_size
+                )
+                if writer.isOpened():
+                    if i:
+                        logger.warning(
+                            f"{codec} fallback used, {self.codecs[0]} failed"
+                        )
+                        self.codecs = self.codecs[i:]
+                    return minute, path, writer
+                writer.release()
+            logger.error(f"VideoWriter could not be created: {path}")
+        except Exception as e:  # pragma: no cover - defensive
+            logger.error(f"VideoWriter could not be created: {str(e)}")
+        return minute, path, None
+
+    def write(self, image: np.ndarray, wall: float) -> None:
+        """Write ``image`` captured at ``wall`` into the segment of its minute."""
+        minute = int(wall // 60)
+        # A clock stepping back keeps writing to the open file rather than
+        # overwriting an earlier one
+        if self.minute is None or minute > self.minute:
+            self._roll_over(minute, wall)
+        if self.writer is not None:
+            self.writer.write(image)
+            self.frames += 1
+            self.last_wall = wall
+        if self._next is None and wall >= (self.minute + 1) * 60 - self.preopen:
+            self._next = self._helper.submit(self.open, self.minute + 1)
+
+    def _roll_over(self, minute: int, wall: float) -> None:
+        start = time.perf_counter()
+        segment = None
+        if self._next is not None:
+            segment, self._next = self._next.result(), None
+            if segment[0] != minute:
+                # No frames for the prepared minute (e.g. the camera stalled)
+                self._helper.submit(self._discard, segment)
+                segment = None
+        if segment is None:
+            segment = self.open(minute)
+
+        if self.writer is not None:
+            self._finish()
+            self.rollovers += 1
+        self.minute, self.path, self.writer = segment
+        self.started, self.frames = wall, 0
+        if self.writer is not None and self.on_open is not None:
+            self._helper.submit(self._notify, self.on_open, self.path, wall)
+        self.max_swap = max(self.max_swap, time.perf_counter() - start)
+        logger.info(f"{self.name} - New recording started: {self.path}")
+
+    def _finish(self) -> None:
+        """Release the open writer on the helper, then report the file."""
+
+        def release(writer, *file) -> None:
+            writer.release()
+            if self.on_close is not None and file[-1]:
+                self._notify(self.on_close, *file)
+
+        self._helper.submit(
+            release, self.writer, self.path, self.started, self.last_wall, self.frames
+        )
+        self.writer = None
+
+    def _notify(self, callback: Callable, *args) -> None:
+        try:
+            callback(*args)
+        except Exception as e:  # pragma: no cover - defensive
+            logger.error(f"{self.name} segment callback error: {str(e)}")
+
+    @staticmethod
+    def _discard(segment: Segment) -> None:
+        """Release a writer that never got a frame and remove its file."""
+        _, path, writer = segment
+        if writer is not None:
+            writer.release()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def close(self, wait: bool = True) -> None:
+        """Finalise the open file on the helper; ``wait`` for it to finish."""
+        if self._next is not None:
+            pending, self._next = self._next, None
+            self._helper.submit(lambda: self._discard(pending.result()))
+        if self.writer is not None:
+            self._finish()
+        self.minute = self.path = None
+        if wait:
+            self._helper.submit(lambda: None).result()
+
+
+class FfmpegSegmentWriter:
+    """Pipes raw BGR frames to one ffmpeg process per minute file.
+
+    Encoding runs outside the Python process with the preset, CRF, thread
+    count and keyframe interval from ``RECORDER``. Like ``SegmentWriter``,
+    files are cut on the minute edges of the frames' capture time, so a
+    frame always lands in the file its time names and that the segment
+    index and clips were told about, even when a backlog or a pre-roll is
+    written late. The next minute's process (and folders) are started on a
+    helper thread ``preopen`` seconds before the edge, and the finished one
+    is closed and waited for there, so at the edge the recording thread only
+    swaps pipes.
+
+    ``on_open``/``on_close`` are called as by ``SegmentWriter``; a file is
+    reported closed once ffmpeg has finalised it.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        fps: float,
+        frame_size: tuple[int, int],
+        name: str = "Recorder",
+        options: dict | None = None,
+        preopen: float = PREOPEN_SECONDS,
+        on_open: Callable[[str, float], None] | None = None,
+        on_close: Callable[[str, float, float, int], None] | None = None,
+    ) -> None:
+        self.pattern = pattern
+        self.fps = fps
+        self.frame_size = frame_size
+        self.name = name
+        self.options = options or {}
+        self.preopen = preopen
+        self.on_open = on_open
+        self.on_close = on_close
+        self.process: subprocess.Popen | None = None
+        self.minute: int | None = None
+        self.path: str | None = None
+        self.started = self.last_wall = 0.0
+        self.frames = 0
+        # (minute, process or None if it could not be started)
+        self._next: Future | None = None
+        # One worker: starting and finishing happen in submission order
+        self._helper = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.rollovers = 0
+        self.max_swap = 0.0
+
+    def command(self, path: str) -> list[str]:
+        width, height = self.frame_size
+        options = self.options
+        gop = max(1, round(options.get("keyframe_interval", 2) * self.fps))
+        return [
+            options.get("ffmpeg", "ffmpeg"),
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "bgr24",
+            "-s",
+            f"{width}x{height}",
+            "-framerate",
+            f"{self.fps:g}",
+            "-i",
+            "pipe:0",
+            "-c:v",
+            options.get("codec", "libx264"),
+            "-preset",
+            options.get("preset", "veryfast"),
+            "-crf",
+            str(options.get("crf", 23)),
+            "-threads",
+            str(options.get("threads", 1)),
+            "-g",
+            str(gop),
+            "-pix_fmt",
+            "yuv420p",
+            "-y",
+            path,
+        ]
+
+    def _file(self, minute: int) -> str:
+        return time.strftime(self.pattern, time.localtime(minute * 60))
+
+    def open(self, minute: int) -> tuple[int, subprocess.Popen | None]:
+        """Create the folders and start ffmpeg for the file of ``minute``."""
+        path = self._file(minute)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Default (buffered) stdin: write() hands over whole frames, a
+            # raw pipe may take only part of one and shift every later frame
+            process = subprocess.Popen(
+                self.command(path), stdin=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            logger.error(f"{self.name} - ffmpeg could not be started: {str(e)}")
+            return minute, None
+        threading.Thread(
+            target=self._log_errors,
+            args=(process,),
+            name=f"{self.name} ffmpeg",
+            daemon=True,
+        ).start()
+        return minute, process
+
+    def _log_errors(self, process: subprocess.Popen) -> None:
+        for line in process.stderr:
+            logger.error(
+                f"{self.name} ffmpeg: {line.decode(errors='replace').rstrip()}"
+            )
+
+    def write(self, image: np.ndarray, wall: float) -> None:
+        """Write ``image`` captured at ``wall`` into its minute's file."""
+        minute = int(wall // 60)
+        # A clock stepping back keeps writing to the open file rather than
+        # overwriting an earlier one
+        if self.minute is None or minute > self.minute:
+            self._roll_over(minute, wall)
+
+        if self.process is not None:
+            try:
+                self.process.stdin.write(memoryview(np.ascontiguousarray(image)))
+                self.frames += 1
+                self.last_wall = wall
+            except OSError as e:
+                # Retried with the next minute's process
+                logger.error(
+                    f"{self.name} - ffmpeg exited ({self.process.poll()}): {str(e)}"
+                )
+                self._finish()
+
+        # Start the next minute's ffmpeg ahead of the edge; the minute after
+        # the open one, which a frame from a clock stepping back is not
+        if self._next is None and wall >= (self.minute + 1) * 60 - self.preopen:
+            self._next = self._helper.submit(self.open, self.minute + 1)
+
+    def _roll_over(self, minute: int, wall: float) -> None:
+        """Swap to the process of ``minute`` (pre-started if possible)."""
+        start = time.perf_counter()
+        if self.minute is not None:
+            self._finish()
+            self.rollovers += 1
+        pending, self._next = self._next, None
+        if pending is not None and pending.result()[0] == minute:
+            process = pending.result()[1]
+        else:
+            # First frame, or a gap: the pre-started minute was skipped
+            if pending is not None:
+                self._helper.submit(self._discard, *pending.result())
+            process = self.open(minute)[1]
+        self.minute, self.path, self.process = minute, self._file(minute), process
+        self.started, self.frames = wall, 0
+        if process is not None:
+            if self.on_open is not None:
+                self._helper.submit(self._notify, self.on_open, self.path, wall)
+            logger.info(f"{self.name} - New recording started: {self.path}")
+        self.max_swap = max(self.max_swap, time.perf_counter() - start)
+
+    def _finish(self) -> None:
+        """Close the open pipe on the helper, then report the file."""
+        if self.process is None:
+            return
+
+        def finish(process: subprocess.Popen, *file) -> None:
+            self._stop(process)
+            if self.on_close is not None and file[-1]:
+                self._notify(self.on_close, *file)
+
+        self._helper.submit(
+            finish, self.process, self.path, self.started, self.last_wall, self.frames
+        )
+        self.process = None
+
+    def _notify(self, callback: Callable, *args) -> None:
+        try:
+            callback(*args)
+        except Exception as e:  # pragma: no cover - defensive
+            logger.error(f"{self.name} segment callback error: {str(e)}")
+
+    def _stop(self, process: subprocess.Popen) -> None:
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            logger.error(f"{self.name} - ffmpeg did not exit, killing it")
+            process.kill()
+
+    def _discard(self, minute: int, process: subprocess.Popen | None) -> None:
+        """Stop a process that never got a frame and remove its file."""
+        if process is not None:
+            self._stop(process)
+        try:
+            os.remove(self._file(minute))
+        except OSError:
+            pass
+
+    def close(self, wait: bool = True) -> None:
+        """Finalise the open file on the helper; ``wait`` for it to finish."""
+        if self._next is not None:
+            pending, self._next = self._next, None
+            self._helper.submit(lambda: self._discard(*pending.result()))
+        self._finish()
+        self.minute = self.path = None
+        if wait:
+            self._helper.submit(lambda: None).result()
 
 
 class VideoRecorder:
-    """Consumes frames from the recording queue and writes them to disk.
+    """Consumes frames from the camera's frame bus and writes them to disk.
 
     Creates a separate file for each minute (file names use
     year/month/day/hour/minute hierarchy).
@@ -17,92 +408,145 @@ class VideoRecorder:
 
     def __init__(self, camera_index: int) -> None:
         self.camera_index = camera_index
-        self.writer: cv2.VideoWriter | None = None
-        self.start_time: datetime | None = None
-        self.current_hour: int | None = None
+        # Every frame is needed, so frames are copied out of the ring into
+        # the shared pool and queued; when the backlog or the byte budget is
+        # full, RECORDER_DROP_POLICY decides which frame is lost. The capture
+        # time is drawn onto the copy before it is written.
+        self.pool = recorder_pool()
+        self.subscription = config.frame_buses[camera_index].subscribe(
+            "recorder",
+            maxsize=config.MAX_RECORDER_QUEUE_SIZE,
+            policy=config.RECORDER_DROP_POLICY,
+            rate=config.FPS,
+            pool=self.pool,
+        )
+        self.report_interval = config.CAPTURE.get("report_interval", 300)
+        self._last_report = time.monotonic()
+        self._last_dropped = 0
+        self._last_rollovers = 0
+        self.camera_dir = os.path.join(config.VIDEO_SAVE_DIR, f"{camera_index}")
+        name = f"Camera {camera_index}"
+        # Every file is added to the segment index and to the camera's
+        # rolling clip when it is opened, and completed when it is closed
+        index = config.segment_index
+        self.clips = ClipBuilder(
+            config.CLIP_SECONDS, config.RECORDER.get("ffmpeg", "ffmpeg"), config.FPS
+        )
+        config.clips[camera_index] = self.clips
+
+        def on_open(path: str, start: float) -> None:
+            self.clips.opened(path, start)
+            index.opened(camera_index, path, start)
+
+        def on_close(path: str, start: float, end: float, frames: int) -> None:
+            self.clips.closed(path, start, end, frames)
+            index.closed(camera_index, path, start, end, frames)
+
+        callbacks = {"on_open": on_open, "on_close": on_close}
+        if config.RECORDER.get("backend", "opencv") == "ffmpeg":
+            self.segments = FfmpegSegmentWriter(
+                os.path.join(self.camera_dir, SEGMENT_LAYOUT),
+                config.FPS,
+                config.FRAME_SIZE,
+                name=name,
+                options=config.RECORDER,
+                **callbacks,
+            )
+        else:
+            self.segments = SegmentWriter(
+                self.get_file_path,
+                config.FPS,
+                config.FRAME_SIZE,
+                name=name,
+                **callbacks,
+            )
+        self.clips.writer = self.segments
+        self.events: EventRecorder | None = None
+        if config.RECORDER.get("mode", "continuous") == "events":
+            self.events = EventRecorder(
+                self.segments,
+                lambda: config.activity.get(camera_index),
+                EventIndex(os.path.join(self.camera_dir, "events.jsonl")),
+                pre_roll=config.RECORDER.get("pre_roll", 10),
+                post_roll=config.RECORDER.get("post_roll", 20),
+                fps=config.FPS,
+                quality=config.RECORDER.get("pre_roll_quality", 90),
+                name=name,
+            )
 
     def get_file_path(self, timestamp: datetime) -> str:
         """Create folders and file path in Year/Month/Day/Hour/Minute hierarchy."""
-        return os.path.join(
-            config.VIDEO_SAVE_DIR,
-            f"{self.camera_index}",
-            f"{timestamp.year}",
-            f"{timestamp.month:02d}",
-            f"{timestamp.day:02d}",
-            f"{timestamp.hour:02d}",
-            f"{timestamp.minute:02d}.avi",
-        )
+        return os.path.join(self.camera_dir, timestamp.strftime(SEGMENT_LAYOUT))
 
     def run(self) -> None:
         """Continuously record frames from the queue.
 
-        Switches to a new file when the hour changes.
-        Closes the file and opens a new one every 60 seconds.
+        Each frame goes into the file of the minute it was captured in;
+        ``SegmentWriter`` switches files on the minute (and hour) edges. In
+        ``events`` mode ``EventRecorder`` only passes on frames around
+        activity.
         """
-        queue_ = config.recorder_queues[self.camera_index]
-
         while config.system_running:
             try:
-                if not queue_.empty():
-                    frame = queue_.get()
-
-                    now = datetime.now()
-                    # Determine if a new file should be created
-                    if self.writer is None or now.hour != self.current_hour:
-                        self.start_recording(now)
-
-                    if self.writer is not None:
-                        self.writer.write(frame)
+                # Blocks until the camera publishes; the timeout only bounds
+                # how long shutdown takes to be noticed.
+                with self.subscription.next(timeout=1.0) as frame:
+                    if frame is None:
+                        continue
 
-                    # Switch to a new file after 1 minute
-                    if (
-                        self.start_time is not None
-                        and (datetime.now() - self.start_time).seconds >= 60
-                    ):
-                        self.stop_recording()
-
-                time.sleep(0.01)
+                    wall = frame.wall or time.time()
+                    # Own copy of the frame (copy=True), safe to draw on
+                    image = timestamp_overlay.draw(frame.image, wall)
+                    if self.events is None:
+                        self.segments.write(image, wall)
+                    else:
+                        monotonic = frame.monotonic or time.monotonic()
+                        self.events.write(image, wall, monotonic)
 
+                self.report_stats()
             except Exception as e:  # pragma: no cover - defensive
                 logger.error(f"Camera {self.camera_index} recording error: {str(e)}")
 
         # When loop ends, close the writer
         self.stop_recording()
 
-    def start_recording(self, timestamp: datetime) -> None:
-        """Open a new video file and start writing frames."""
-        self.stop_recording()  # Close previous recording if any
-        timestamp = timestamp.replace(second=0, microsecond=0)
-        self.start_time = timestamp
-        self.current_hour = timestamp.hour
+    def report_stats(self) -> None:
+        """Periodically log dropped frames and how full the queue got."""
+        if time.monotonic() - self._last_report < self.report_interval:
+            return
+        self._last_report = time.monotonic()
 
-        filename = self.get_file_path(timestamp)
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        queue, pool, segments = self.subscription.queue, self.pool, self.segments
+        mb = pool.frame_bytes / 2**20
+        logger.info(
+            f"Camera {self.camera_index} recorder queue: "
+            f"{queue.dropped - self._last_dropped} frames dropped "
+            f"({queue.policy}), high water {queue.high_water} frames "
+            f"({queue.high_water * mb:.0f} MB); all recorders peaked at "
+            f"{pool.high_water * mb:.0f} of {pool.capacity * mb:.0f} MB; "
+            f"{segments.rollovers - self._last_rollovers} segment rollovers, "
+            f"longest swap {1e3 * segments.max_swap:.1f} ms"
+        )
+        self._last_dropped = queue.dropped
+        self._last_rollovers = segments.rollovers
+        queue.high_water = len(queue)
+        segments.max_swap = 0.0
 
-        # If X264 fourcc is not compatible with .avi on some systems,
-        # fall back to another codec.
-        try:
-            fourcc = cv2.VideoWriter_fourcc(*"X264")
-            self.writer = cv2.VideoWriter(
-                filename, fourcc, config.FPS, config.FRAME_SIZE
+        events = self.events
+        if events is not None:
+            share = events.frames_written / max(events.frames_seen, 1)
+            logger.info(
+                f"Camera {self.camera_index} event recording: {events.events} "
+                f"events, {events.frames_written} of {events.frames_seen} frames "
+                f"written ({share:.1%}), pre-roll {len(events.pre_roll)} frames "
+                f"({events.pre_roll.nbytes / 2**20:.1f} MB)"
             )
-        except Exception:  # pragma: no cover - codec fallback
-            try:
-                fourcc = cv2.VideoWriter_fourcc(*"MJPG")
-                self.writer = cv2.VideoWriter(
-                    filename, fourcc, config.FPS, config.FRAME_SIZE
-                )
-                logger.warning("X264 codec error, falling back to MJPG")
-            except Exception as e:
-                logger.error(f"VideoWriter could not be created: {str(e)}")
-                self.writer = None
-                return
-
-        logger.info(f"Camera {self.camera_index} - New recording started: {filename}")
 
     def stop_recording(self) -> None:
         """Close the current video file if open."""
-        if self.writer:
-            self.writer.release()
-            self.writer = None
+        was_open = self.segments.minute is not None
+        if self.events is not None:
+            self.events.finish()
+        self.segments.close()
+        if was_open:
             logger.info(f"Video recording closed for camera {self.camera_index}.")
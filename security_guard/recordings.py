@@ -0,0 +1,328 @@
+"""Index of recorded segments: camera, time span, path, size and frame count.
+
+``VideoRecorder`` adds a row when it opens a file (``end`` still empty) and
+completes it when the file is closed, so finding the recordings of a camera
+or time range is one indexed SQLite query instead of an ``os.path.exists``
+call per minute. It also keeps a running total of the recorded bytes per
+camera for retention. The index lives next to the recordings; if it is lost
+or files were changed by hand it can be rebuilt from disk::
+
+    python -m security_guard.recordings rebuild
+    python -m security_guard.recordings find 202501011200 202501011300 --camera 0
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+# Longest time one file can span (files are cut on minute edges)
+MAX_SEGMENT_SECONDS = 60.0
+
+# <camera>/<year>/<month>/<day>/<hour>/<minute>.avi under VIDEO_SAVE_DIR
+_SEGMENT_PATH = re.compile(
+    r"(?P<camera>\d+)/(?P<year>\d{4})/(?P<month>\d{2})/(?P<day>\d{2})/"
+    r"(?P<hour>\d{2})/(?P<minute>\d{2})\.(?:avi|mp4)$"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    path TEXT PRIMARY KEY,
+    camera INTEGER NOT NULL,
+    start REAL NOT NULL,
+    end REAL,
+    size INTEGER,
+    frames INTEGER
+);
+CREATE INDEX IF NOT EXISTS segments_camera_start ON segments (camera, start);
+CREATE INDEX IF NOT EXISTS segments_start ON segments (start);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+@dataclass
+class Segment:
+    """One recorded file; ``end`` is None while it is being written."""
+
+    path: str
+    camera: int
+    start: float
+    end: float | None
+    size: int | None
+    frames: int | None
+
+
+class SegmentIndex:
+    """SQLite index of the recorded files, shared by all threads.
+
+    ``usage`` holds the bytes of the completed files per camera; it is read
+    once from the index and then updated as files are closed and removed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self._connect()
+
+    def _connect(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        # Recorders write while the bot and web app read
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self._load_usage()
+
+    def _load_usage(self) -> None:
+        self.usage: dict[int, int] = dict(
+            self.db.execute(
+                "SELECT camera, SUM(size) FROM segments "
+                "WHERE size IS NOT NULL GROUP BY camera"
+            ).fetchall()
+        )
+
+    @property
+    def total(self) -> int:
+        """Bytes of all completed files."""
+        return sum(self.usage.values())
+
+    def reset(self) -> None:
+        """Start an empty index, e.g. after the recordings folder was deleted."""
+        with self.lock:
+            self.db.close()
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self.path + suffix)
+                except OSError:
+                    pass
+            self._connect()
+
+    def opened(self, camera: int, path: str, start: float) -> None:
+        """A recorder started writing ``path`` at ``start`` (epoch seconds)."""
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, NULL, NULL, NULL)",
+                (path, camera, start),
+            )
+
+    def closed(
+        self, camera: int, path: str, start: float, end: float, frames: int
+    ) -> None:
+        """``path`` is complete: ``frames`` frames from ``start`` to ``end``."""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = None
+        with self.lock:
+            row = self.db.execute(
+                "SELECT size FROM segments WHERE path = ?", (path,)
+            ).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?, ?)",
+                (path, camera, start, end, size, frames),
+            )
+            added = (size or 0) - (row[0] or 0 if row else 0)
+            self.usage[camera] = self.usage.get(camera, 0) + added
+
+    def oldest(
+        self, limit: int, camera: int | None = None, before: float | None = None
+    ) -> list[Segment]:
+        """Up to ``limit`` completed files, oldest first (started ``before``)."""
+        query = (
+            "SELECT path, camera, start, end, size, frames FROM segments "
+            "WHERE end IS NOT NULL"
+        )
+        params: list = []
+        if camera is not None:
+            query += " AND camera = ?"
+            params.append(camera)
+        if before is not None:
+            query += " AND start < ?"
+            params.append(before)
+        with self.lock:
+            rows = self.db.execute(
+                query + " ORDER BY start LIMIT ?", [*params, limit]
+            ).fetchall()
+        return [Segment(*row) for row in rows]
+
+    def remove(self, segments: list[Segment]) -> None:
+        """Drop deleted files from the index and from ``usage``."""
+        if not segments:
+            return
+        marks = ", ".join("?" * len(segments))
+        with self.lock:
+            self.db.execute(
+                f"DELETE FROM segments WHERE path IN ({marks})",
+                [segment.path for segment in segments],
+            )
+            for segment in segments:
+                if segment.size:
+                    camera = segment.camera
+                    self.usage[camera] = self.usage.get(camera, 0) - segment.size
+
+    def discard(self, path: str) -> None:
+        """Drop ``path`` from the index, e.g. after it was deleted by hand."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT path, camera, start, end, size, frames FROM segments "
+                "WHERE path = ?",
+                (path,),
+            ).fetchone()
+        if row is not None:
+            self.remove([Segment(*row)])
+
+    def written_since(self, since: float) -> int:
+        """Bytes of the completed files started at or after ``since``."""
+        with self.lock:
+            (size,) = self.db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM segments WHERE start >= ?",
+                (since,),
+            ).fetchone()
+        return size
+
+    def find(
+        self, start: datetime, end: datetime, camera: int | None = None
+    ) -> list[Segment]:
+        """Segments overlapping ``start``-``end``, oldest first.
+
+        Both minutes are included, the same minutes the per-minute lookup
+        found. Files still being written are included.
+        """
+        first = start.replace(second=0, microsecond=0).timestamp()
+        # The end minute is included; its file starts at the first frame's
+        # time, some way into the minute
+        last = end.replace(second=0, microsecond=0).timestamp() + 60
+        query = (
+            "SELECT path, camera, start, end, size, frames FROM segments "
+            "WHERE start >= ? AND start < ? AND (end IS NULL OR end > ?)"
+        )
+        params: list = [first - MAX_SEGMENT_SECONDS, last, first]
+        if camera is not None:
+            query += " AND camera = ?"
+            params.append(camera)
+        with self.lock:
+            rows = self.db.execute(query + " ORDER BY start", params).fetchall()
+        return [Segment(*row) for row in rows]
+
+    def paths(
+        self, start: datetime, end: datetime, camera: int | None = None
+    ) -> list[str]:
+        return [segment.path for segment in self.find(start, end, camera)]
+
+    def index_existing(self, root: str) -> int:
+        """Index the files under ``root`` the first time the index is used.
+
+        Recordings from before the index existed are otherwise never seen
+        by retention or ``/download``. Whether this has been done is kept
+        in the index, so call it before any recorder starts: a recorder's
+        first row would not tell an empty index from a complete one.
+        Returns the number of files indexed (0 if done before).
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value FROM meta WHERE key = 'indexed'"
+            ).fetchone()
+        return 0 if row is not None else self.rebuild(root)
+
+    def rebuild(self, root: str) -> int:
+        """Replace the index with the files found under ``root``; their number.
+
+        Files being written (indexed without an ``end``) keep their rows, so
+        it can run while recorders write.
+        """
+        import cv2
+
+        with self.lock:
+            open_paths = {
+                path
+                for (path,) in self.db.execute(
+                    "SELECT path FROM segments WHERE end IS NULL"
+                )
+            }
+        rows = []
+        for folder, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(folder, name)
+                if path in open_paths:
+                    continue
+                match = _SEGMENT_PATH.search(
+                    os.path.relpath(path, root).replace(os.sep, "/")
+                )
+                if match is None:
+                    continue
+                fields = {k: int(v) for k, v in match.groupdict().items()}
+                camera = fields.pop("camera")
+                start = datetime(**fields).timestamp()
+
+                capture = cv2.VideoCapture(path)
+                frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+                fps = capture.get(cv2.CAP_PROP_FPS)
+                capture.release()
+                seconds = frames / fps if fps > 0 else MAX_SEGMENT_SECONDS
+                end = start + min(seconds, MAX_SEGMENT_SECONDS)
+                rows.append((path, camera, start, end, os.path.getsize(path), frames))
+
+        with self.lock:
+            self.db.execute("BEGIN")
+            self.db.execute("DELETE FROM segments WHERE end IS NOT NULL")
+            self.db.executemany(
+                "INSERT OR IGNORE INTO segments VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('indexed', ?)", (time.time(),)
+            )
+            self.db.execute("COMMIT")
+            self._load_usage()
+        return len(rows)
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    from . import config
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="re-create the index from VIDEO_SAVE_DIR")
+    p = sub.add_parser("find", help="list the segments of a range")
+    p.add_argument("start", help="YYYYMMDDHHmm")
+    p.add_argument("end", help="YYYYMMDDHHmm")
+    p.add_argument("--camera", type=int)
+    args = parser.parse_args(argv)
+
+    index = config.segment_index
+    started = time.perf_counter()
+    if args.command == "rebuild":
+        count = index.rebuild(config.VIDEO_SAVE_DIR)
+        print(
+            f"Indexed {count} files in {time.perf_counter() - started:.1f}s "
+            f"({index.path})"
+        )
+    else:
+        segments = index.find(
+            datetime.strptime(args.start, "%Y%m%d%H%M"),
+            datetime.strptime(args.end, "%Y%m%d%H%M"),
+            args.camera,
+        )
+        for segment in segments:
+            print(
+                f"{segment.camera} {datetime.fromtimestamp(segment.start):%Y-%m-%d %H:%M:%S} "
+                f"{segment.frames if segment.frames is not None else '-':>5} frames "
+                f"{(segment.size or 0) / 2**20:7.1f} MB  {segment.path}"
+            )
+        print(
+            f"{len(segments)} segments in "
+            f"{1e3 * (time.perf_counter() - started):.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import shutil
+import time
+from collections.abc import Callable
+
+from . import config
+from .config import logger
+from .recordings import Segment, SegmentIndex
+
+GB = 2**30
+DAY = 86400
+
+
+class RetentionManager:
+    """Deletes the oldest recordings to stay within quotas and free space.
+
+    Every ``interval`` seconds the rules of the ``RETENTION`` config are
+    applied in order: files older than ``max_days`` (per camera or global),
+    per-camera ``max_gb``, the global ``max_gb``, and ``min_free_gb`` of free
+    disk space. Files are deleted oldest first in batches of ``batch`` with
+    a ``pause`` in between, so the disk is never busy deleting for long
+    while recorders write. Sizes come from the running per-camera totals
+    of the segment index, not from walking the recordings tree.
+
+    If free space still drops below ``warn_free_gb``, e.g. because there is
+    nothing left to delete or other data fills the disk, a warning is sent
+    over Telegram (at most every ``warn_every`` seconds).
+    """
+
+    def __init__(
+        self,
+        index: SegmentIndex,
+        root: str,
+        settings: dict,
+        notify: Callable[[str], None] | None = None,
+    ) -> None:
+        self.index = index
+        self.root = os.path.abspath(root)
+        self.notify = notify
+        self.max_days = settings.get("max_days")
+        self.max_bytes = self._bytes(settings.get("max_gb"))
+        self.cameras = {int(k): v for k, v in settings.get("cameras", {}).items()}
+        self.min_free = self._bytes(settings.get("min_free_gb"))
+        self.warn_free = self._bytes(settings.get("warn_free_gb", 5))
+        self.batch = settings.get("batch", 20)
+        self.pause = settings.get("pause", 0.2)
+        self.interval = settings.get("interval", 60)
+        self.warn_every = settings.get("warn_every", 3600)
+        self._last_warning = float("-inf")
+        self.deleted_files = 0
+        self.deleted_bytes = 0
+
+    @staticmethod
+    def _bytes(gb: float | None) -> int | None:
+        return None if gb is None else int(gb * GB)
+
+    def free(self) -> int:
+        return shutil.disk_usage(self.root).free
+
+    def run(self) -> None:
+        while config.system_running:
+            try:
+                self.enforce()
+            except Exception as e:  # pragma: no cover - defensive
+                logger.error(f"Retention error: {str(e)}")
+            deadline = time.monotonic() + self.interval
+            while config.system_running and time.monotonic() < deadline:
+                time.sleep(1)
+
+    def enforce(self) -> None:
+        """Apply every rule once, then check the free space."""
+        now = time.time()
+        for camera in list(self.index.usage):
+            days = self.cameras.get(camera, {}).get("max_days", self.max_days)
+            if days is not None:
+                self._delete_while(
+                    lambda: True, f"older than {days} days", camera, now - days * DAY
+                )
+
+        for camera, settings in self.cameras.items():
+            limit = self._bytes(settings.get("max_gb"))
+            if limit is not None:
+
+                def over(camera: int = camera, limit: int = limit) -> bool:
+                    return self.index.usage.get(camera, 0) > limit
+
+                self._delete_while(
+                    over, f"camera {camera} over {settings['max_gb']} GB", camera
+                )
+
+        if self.max_bytes is not None:
+            self._delete_while(
+                lambda: self.index.total > self.max_bytes,
+                f"over {self.max_bytes / GB:g} GB",
+            )
+        if self.min_free is not None:
+            self._delete_while(
+                lambda: self.free() < self.min_free,
+                f"less than {self.min_free / GB:g} GB free",
+            )
+        self.check_free_space()
+
+    def _delete_while(
+        self,
+        condition: Callable[[], bool],
+        reason: str,
+        camera: int | None = None,
+        before: float | None = None,
+    ) -> None:
+        files = size = 0
+        while config.system_running and condition():
+            segments = self.index.oldest(self.batch, camera, before)
+            if not segments:
+                break
+            self.delete(segments)
+            files += len(segments)
+            size += sum(segment.size or 0 for segment in segments)
+            time.sleep(self.pause)
+        if files:
+            logger.info(
+                f"Retention: deleted {files} files ({size / 2**20:.0f} MB), {reason}"
+            )
+
+    def delete(self, segments: list[Segment]) -> None:
+        """Delete the files and empty folders of ``segments`` and unindex them."""
+        folders = set()
+        for segment in segments:
+            try:
+                os.remove(segment.path)
+            except FileNotFoundError:
+                pass
+            folders.add(os.path.dirname(segment.path))
+        self.index.remove(segments)
+        self.deleted_files += len(segments)
+        self.deleted_bytes += sum(segment.size or 0 for segment in segments)
+
+        # Day/hour folders, up to (not including) the camera folder
+        for folder in sorted(folders, reverse=True):
+            while os.path.dirname(os.path.abspath(folder)) != self.root:
+                try:
+                    os.rmdir(folder)
+                except OSError:
+                    break
+                folder = os.path.dirname(folder)
+
+    def check_free_space(self) -> None:
+        """Warn over Telegram when the disk is about to fill up."""
+        free = self.free()
+        if self.warn_free is None or free >= self.warn_free:
+            return
+        if time.monotonic() - self._last_warning < self.warn_every:
+            return
+        self._last_warning = time.monotonic()
+
+        total = shutil.disk_usage(self.root).total
+        per_hour = self.index.written_since(time.time() - 3600)
+        left = f", about {free / per_hour:.1f} h of recording left" if per_hour else ""
+        text = (
+            f"⚠️ Recording disk almost full: {free / GB:.1f} GB free of "
+            f"{total / GB:.0f} GB{left}. Recordings take "
+            f"{self.index.total / GB:.1f} GB."
+        )
+        logger.warning(text)
+        if self.notify is not None:
+            self.notify(text)
+
+
+def send_warning(text: str) -> None:
+    """Send ``text`` to the authorised Telegram user."""
+    try:
+        future = asyncio.run_coroutine_threadsafe(
+            config.bot.send_message(chat_id=config.AUTHORIZED_USER_ID, text=text),
+            config.bot_loop,
+        )
+        future.result(timeout=10)
+    except Exception as e:  # pragma: no cover - defensive
+        logger.error(f"Retention warning has not been sent: {str(e)}")
@@ -0,0 +1,148 @@
+import time
+from collections import deque
+
+
+class DetectionScheduler:
+    """Shares a global inference budget between cameras by recent activity.
+
+    A camera that just saw motion or a person is analysed at ``active_fps``
+    for ``hold`` seconds; after that its rate halves every ``half_life``
+    seconds down to ``idle_fps``. Across all cameras at most ``max_ips``
+    inferences are admitted in any one-second window.
+
+    Every camera is guaranteed its ``idle_fps`` floor: ``cameras * idle_fps``
+    of the budget is reserved for cameras that have waited ``1 / idle_fps``
+    seconds, and they are admitted before anyone else. Busy cameras share
+    the rest, most overdue first. So nobody waits much longer than
+    ``ttfd_bound`` for its next inference, which is the worst-case time to
+    first detection of a person entering an idle scene (plus one inference).
+    ``idle_fps`` is lowered if the budget cannot cover the floor.
+    """
+
+    def __init__(
+        self,
+        camera_indexes: list[int],
+        max_ips: float,
+        active_fps: float = 10.0,
+        idle_fps: float = 1.0,
+        hold: float = 5.0,
+        half_life: float = 5.0,
+    ) -> None:
+        if not 0 < idle_fps <= active_fps:
+            raise ValueError("Need 0 < idle_fps <= active_fps")
+        if max_ips < 1:
+            raise ValueError("max_ips must be at least 1")
+
+        self.max_ips = max_ips
+        self.active_fps = active_fps
+        self.idle_fps = min(idle_fps, max_ips / max(len(camera_indexes), 1))
+        self.hold = hold
+        self.half_life = half_life
+
+        self.last_activity = {idx: float("-inf") for idx in camera_indexes}
+        self.last_inference = {idx: float("-inf") for idx in camera_indexes}
+        self.inferences = {idx: 0 for idx in camera_indexes}
+        self.max_gap = {idx: 0.0 for idx in camera_indexes}
+        self._admitted: deque[float] = deque()
+        self._extra: deque[float] = deque()
+        self.extra_ips = max_ips - len(camera_indexes) * self.idle_fps
+        self.deferred = 0
+
+    @classmethod
+    def from_config(
+        cls, settings: dict, camera_indexes: list[int], detection_fps: float
+    ) -> "DetectionScheduler":
+        """Build a scheduler from the ``SCHEDULER`` config section."""
+        active_fps = settings.get("active_fps", detection_fps)
+        return cls(
+            camera_indexes,
+            max_ips=settings.get("max_ips", active_fps * len(camera_indexes)),
+            active_fps=active_fps,
+            idle_fps=settings.get("idle_fps", 1.0),
+            hold=settings.get("hold", 5.0),
+            half_life=settings.get("half_life", 5.0),
+        )
+
+    @property
+    def ttfd_bound(self) -> float:
+        """Worst-case seconds between two inferences of any camera."""
+        return 1.0 / self.idle_fps
+
+    def rate(self, camera_index: int, now: float | None = None) -> float:
+        """Current target inferences per second for ``camera_index``."""
+        now = time.monotonic() if now is None else now
+        idle = now - self.last_activity[camera_index] - self.hold
+        if idle <= 0:
+            return self.active_fps
+        decayed = self.active_fps * 0.5 ** (idle / self.half_life)
+        return max(decayed, self.idle_fps)
+
+    def due(self, camera_index: int, now: float | None = None) -> bool:
+        """True if ``camera_index`` should be analysed at its current rate."""
+        now = time.monotonic() if now is None else now
+        waited = now - self.last_inference[camera_index]
+        return waited * self.rate(camera_index, now) >= 1.0
+
+    def note_activity(self, camera_index: int, now: float | None = None) -> None:
+        """Motion or a person was seen at ``now``: back to full rate."""
+        now = time.monotonic() if now is None else now
+        self.last_activity[camera_index] = max(self.last_activity[camera_index], now)
+
+    def admit(self, candidates: list[int], now: float | None = None) -> list[int]:
+        """Pick the due cameras that fit in the global budget.
+
+        Cameras at their idle floor come first (longest wait first), then
+        the others by how overdue they are relative to their current rate.
+        """
+        now = time.monotonic() if now is None else now
+        for window in (self._admitted, self._extra):
+            while window and now - window[0] >= 1.0:
+                window.popleft()
+
+        floor_wait = 1.0 / self.idle_fps
+        waited = {idx: now - self.last_inference[idx] for idx in candidates}
+        floor = sorted(
+            (idx for idx in candidates if waited[idx] >= floor_wait),
+            key=waited.__getitem__,
+            reverse=True,
+        )
+        extra = sorted(
+            (idx for idx in candidates if waited[idx] < floor_wait),
+            key=lambda idx: waited[idx] * self.rate(idx, now),
+            reverse=True,
+        )
+
+        budget = max(int(self.max_ips) - len(self._admitted), 0)
+        admitted = floor[:budget]
+        extra_budget = min(
+            budget - len(admitted), max(int(self.extra_ips) - len(self._extra), 0)
+        )
+        admitted_extra = extra[:extra_budget]
+        self.deferred += len(candidates) - len(admitted) - len(admitted_extra)
+
+        self._extra.extend([now] * len(admitted_extra))
+        admitted += admitted_extra
+        for idx in admitted:
+            if self.inferences[idx]:
+                self.max_gap[idx] = max(self.max_gap[idx], waited[idx])
+            self.last_inference[idx] = now
+            self.inferences[idx] += 1
+            self._admitted.append(now)
+        return admitted
+
+    def stats(self, now: float | None = None) -> dict[int, dict[str, float]]:
+        """Rate, inference count and longest observed gap per camera."""
+        now = time.monotonic() if now is None else now
+        return {
+            idx: {
+                "rate": self.rate(idx, now),
+                "inferences": self.inferences[idx],
+                "max_gap": self.max_gap[idx],
+            }
+            for idx in self.last_inference
+        }
+
+    def reset_stats(self) -> None:
+        """Start a new reporting window for ``max_gap`` and ``deferred``."""
+        self.max_gap = dict.fromkeys(self.max_gap, 0.0)
+        self.deferred = 0
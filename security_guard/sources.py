@@ -0,0 +1,298 @@
+"""Frame sources behind a small ``cv2.VideoCapture``-like interface.
+
+``open_source`` turns a camera URI from ``config.CAMERA_SOURCES`` into a
+source object:
+
+    0, "0", "device:0"                  local capture device (cv2.VideoCapture)
+    "rtsp://...", "http://..."          network stream (cv2.VideoCapture)
+    "file:///videos/door.mp4?loop=1&realtime=1"
+                                        video file replay, looped, paced at the
+                                        file's FPS (realtime=0: as fast as possible)
+    "synthetic://?fps=25&person=5-12,40-48&period=60&seed=1"
+                                        generated NumPy scene; a figure walks
+                                        through the frame during each "person"
+                                        window (seconds within each period)
+
+Sources that are not real devices make it possible to load-test the
+detector, recorder and stream on a headless machine at any camera count.
+"""
+
+import time
+from urllib.parse import parse_qs, unquote, urlparse
+
+import cv2
+import numpy as np
+
+
+class FrameSource:
+    """Base class: ``read``/``grab``/``retrieve``/``release`` like VideoCapture."""
+
+    def isOpened(self) -> bool:  # noqa: N802 - mirrors cv2.VideoCapture
+        return True
+
+    def grab(self) -> bool:
+        raise NotImplementedError
+
+    def retrieve(self, image: np.ndarray | None = None) -> tuple[bool, np.ndarray]:
+        raise NotImplementedError
+
+    def read(self, image: np.ndarray | None = None) -> tuple[bool, np.ndarray]:
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def release(self) -> None:
+        pass
+
+
+class _Pacer:
+    """Sleep until the next frame is due, for real-time replay."""
+
+    def __init__(self, fps: float, realtime: bool) -> None:
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.realtime = realtime
+        self._next = time.monotonic()
+
+    def wait(self) -> None:
+        if not self.realtime or not self.interval:
+            return
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+            self._next += self.interval
+        else:
+            # Running late: don't try to catch up with a burst of frames
+            self._next = now + self.interval
+
+
+class DeviceSource(FrameSource):
+    """A local capture device or network stream via ``cv2.VideoCapture``."""
+
+    def __init__(self, target: int | str, frame_size: tuple[int, int]) -> None:
+        self.cap = cv2.VideoCapture(target)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_size[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_size[1])
+
+    def isOpened(self) -> bool:  # noqa: N802
+        return self.cap.isOpened()
+
+    def grab(self) -> bool:
+        return self.cap.grab()
+
+    def retrieve(self, image: np.ndarray | None = None) -> tuple[bool, np.ndarray]:
+        return self.cap.retrieve(image)
+
+    def read(self, image: np.ndarray | None = None) -> tuple[bool, np.ndarray]:
+        return self.cap.read(image)
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+class FileSource(FrameSource):
+    """Replay a video file, optionally looped and paced at its own FPS."""
+
+    def __init__(
+        self,
+        path: str,
+        loop: bool = True,
+        realtime: bool = True,
+        fps: float | None = None,
+    ) -> None:
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        file_fps = self.cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self._pacer = _Pacer(fps or file_fps, realtime)
+
+    def isOpened(self) -> bool:  # noqa: N802
+        return self.cap.isOpened()
+
+    def grab(self) -> bool:
+        self._pacer.wait()
+        if self.cap.grab():
+            return True
+        if not self.loop:
+            return False
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.cap.grab()
+
+    def retrieve(self, image: np.ndarray | None = None) -> tuple[bool, np.ndarray]:
+        return self.cap.retrieve(image)
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+class SyntheticSource(FrameSource):
+    """Generated scene with scripted "person enters" windows.
+
+    The background is a static gradient with a few fixed shapes, so frames are
+    identical while nobody is present. During each ``(start, end)`` window
+    (seconds within every ``period``) a figure walks across the frame. If a
+    ``sprite`` image (ideally a BGRA person cut-out) is given it is pasted
+    instead of the drawn figure, which gives the detector realistic input.
+    """
+
+    def __init__(
+        self,
+        frame_size: tuple[int, int],
+        fps: float = 25.0,
+        realtime: bool = True,
+        person_windows: list[tuple[float, float]] | None = None,
+        period: float = 60.0,
+        seed: int = 0,
+        sprite: str | None = None,
+    ) -> None:
+        self.width, self.height = frame_size
+        self.fps = fps
+        self.person_windows = person_windows or []
+        self.period = period
+        self._pacer = _Pacer(fps, realtime)
+        self._frame_no = -1
+        self._background = self._make_background(seed)
+        self._sprite = (
+            cv2.imread(sprite, cv2.IMREAD_UNCHANGED) if sprite is not None else None
+        )
+
+    def _make_background(self, seed: int) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        ramp = np.linspace(40, 160, self.width, dtype=np.float32)
+        shade = np.linspace(0.7, 1.0, self.height, dtype=np.float32)[:, None]
+        gray = (ramp[None, :] * shade).astype(np.uint8)
+        background = np.dstack(
+            [gray, gray, np.clip(gray.astype(np.int16) + 20, 0, 255).astype(np.uint8)]
+        )
+        for _ in range(4):
+            x, y = rng.integers(0, self.width - 80), rng.integers(0, self.height - 80)
+            w, h = rng.integers(30, 80, size=2)
+            color = tuple(int(c) for c in rng.integers(0, 255, size=3))
+            cv2.rectangle(background, (x, y), (x + w, y + h), color, -1)
+        return background
+
+    def person_progress(self, t: float) -> float | None:
+        """Position (0..1) of the figure across the frame at time ``t``."""
+        t = t % self.period if self.period > 0 else t
+        for start, end in self.person_windows:
+            if start <= t < end:
+                return (t - start) / max(end - start, 1e-6)
+        return None
+
+    def grab(self) -> bool:
+        self._pacer.wait()
+        self._frame_no += 1
+        return True
+
+    def retrieve(self, image: np.ndarray | None = None) -> tuple[bool, np.ndarray]:
+        if image is None or image.shape != self._background.shape:
+            image = np.empty_like(self._background)
+        np.copyto(image, self._background)
+
+        progress = self.person_progress(self._frame_no / self.fps)
+        if progress is not None:
+            self._draw_person(image, progress)
+        return True, image
+
+    def _draw_person(self, image: np.ndarray, progress: float) -> None:
+        h = int(self.height * 0.6)
+        w = h // 3
+        x = int(-w + progress * (self.width + w))
+        y = self.height - h - 10
+
+        if self._sprite is not None:
+            self._paste_sprite(image, x, y, w, h)
+            return
+
+        color = (60, 50, 40)
+        head = h // 7
+        cx = x + w // 2
+        cv2.circle(image, (cx, y + head), head, (90, 120, 170), -1)
+        cv2.rectangle(
+            image,
+            (x + w // 6, y + 2 * head),
+            (x + 5 * w // 6, y + h // 2 + head),
+            color,
+            -1,
+        )
+        stride = int(np.sin(progress * 40) * w // 4)
+        cv2.line(
+            image, (cx, y + h // 2 + head), (cx - w // 4 + stride, y + h), color, w // 5
+        )
+        cv2.line(
+            image, (cx, y + h // 2 + head), (cx + w // 4 - stride, y + h), color, w // 5
+        )
+        cv2.line(
+            image, (x + w // 6, y + 2 * head), (x - w // 6, y + h // 2), color, w // 7
+        )
+        cv2.line(
+            image,
+            (x + 5 * w // 6, y + 2 * head),
+            (x + 7 * w // 6, y + h // 2),
+            color,
+            w // 7,
+        )
+
+    def _paste_sprite(self, image: np.ndarray, x: int, y: int, w: int, h: int) -> None:
+        sprite = cv2.resize(self._sprite, (w, h))
+        x0, x1 = max(x, 0), min(x + w, self.width)
+        if x1 <= x0:
+            return
+        crop = sprite[:, x0 - x : x1 - x]
+        region = image[y : y + h, x0:x1]
+        if crop.shape[2] == 4:
+            alpha = crop[:, :, 3:4].astype(np.float32) / 255.0
+            region[:] = (crop[:, :, :3] * alpha + region * (1 - alpha)).astype(np.uint8)
+        else:
+            region[:] = crop[:, :, :3]
+
+
+def _flag(params: dict[str, list[str]], key: str, default: bool) -> bool:
+    if key not in params:
+        return default
+    return params[key][0].lower() in ("1", "true", "yes", "on")
+
+
+def _windows(spec: str) -> list[tuple[float, float]]:
+    windows = []
+    for part in spec.split(","):
+        if part.strip():
+            start, end = part.split("-")
+            windows.append((float(start), float(end)))
+    return windows
+
+
+def open_source(uri: int | str, frame_size: tuple[int, int]) -> FrameSource:
+    """Create the frame source described by ``uri`` (see module docstring)."""
+    if isinstance(uri, int) or str(uri).isdigit():
+        return DeviceSource(int(uri), frame_size)
+
+    parsed = urlparse(str(uri))
+    params = parse_qs(parsed.query)
+
+    if parsed.scheme == "device":
+        target = parsed.netloc or parsed.path
+        return DeviceSource(int(target) if target.isdigit() else target, frame_size)
+
+    if parsed.scheme == "file":
+        fps = params.get("fps")
+        return FileSource(
+            unquote(parsed.netloc + parsed.path),
+            loop=_flag(params, "loop", True),
+            realtime=_flag(params, "realtime", True),
+            fps=float(fps[0]) if fps else None,
+        )
+
+    if parsed.scheme == "synthetic":
+        sprite = params.get("sprite")
+        return SyntheticSource(
+            frame_size,
+            fps=float(params.get("fps", ["25"])[0]),
+            realtime=_flag(params, "realtime", True),
+            person_windows=_windows(params.get("person", [""])[0]),
+            period=float(params.get("period", ["60"])[0]),
+            seed=int(params.get("seed", ["0"])[0]),
+            sprite=unquote(sprite[0]) if sprite else None,
+        )
+
+    # rtsp://, http://, gstreamer pipelines, ... are handled by OpenCV itself
+    return DeviceSource(str(uri), frame_size)
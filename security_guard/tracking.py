@@ -0,0 +1,124 @@
+import inspect
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import torch
+import yaml
+from ultralytics.trackers.byte_tracker import BYTETracker
+from ultralytics.utils.checks import check_yaml
+
+
+def load_tracker_args(tracker_cfg: str = "bytetrack.yaml") -> SimpleNamespace:
+    """Load an ultralytics tracker YAML (bundled name or path)."""
+    with open(check_yaml(tracker_cfg), encoding="utf-8") as f:
+        return SimpleNamespace(**yaml.safe_load(f))
+
+
+class CameraTracker:
+    """Per-camera BYTETrack state for batched inference.
+
+    ``model.track`` keeps a single tracker per predictor, so frames of several
+    cameras in one batch would share track IDs. Each camera owns one of these
+    instead; ``update`` assigns IDs to one camera's ``Results`` exactly the way
+    ultralytics' own tracking callback does.
+    """
+
+    def __init__(self, args: SimpleNamespace, frame_rate: int = 30) -> None:
+        # ultralytics 8.4 dropped the ``frame_rate`` argument (always 30)
+        if "frame_rate" in inspect.signature(BYTETracker).parameters:
+            self.tracker = BYTETracker(args=args, frame_rate=frame_rate)
+        else:
+            self.tracker = BYTETracker(args=args)
+
+    def update(self, result):
+        """Return ``result`` restricted to tracked boxes, with track IDs."""
+        det = result.boxes.cpu().numpy()
+        if len(det) == 0:
+            return result
+
+        tracks = self.tracker.update(det, result.orig_img)
+        if len(tracks) == 0:
+            return result
+
+        idx = tracks[:, -1].astype(int)
+        result = result[idx]
+        result.update(boxes=torch.as_tensor(tracks[:, :-1]))
+        return result
+
+
+@dataclass
+class TrackRecord:
+    """When a track was first and last seen, and when it last alerted."""
+
+    first_seen: float
+    last_seen: float
+    last_alert: float
+
+
+class TrackRegistry:
+    """Per-camera registry of track IDs that decides which detections alert.
+
+    A track alerts once, when its ID is first seen. With ``realert_after``
+    set, a track that is still present alerts again after that many seconds
+    (someone lingering at the door). Records not seen for ``expire_after``
+    seconds are dropped, so a returning person whose ID the tracker has
+    already recycled alerts again.
+
+    Detections without a track ID (the tracker confirms new tracks on their
+    second frame) never alert by themselves.
+    """
+
+    def __init__(
+        self, realert_after: float | None = None, expire_after: float = 60.0
+    ) -> None:
+        self.realert_after = realert_after
+        self.expire_after = expire_after
+        self.tracks: dict[int, dict[int, TrackRecord]] = {}
+        self.alerts = 0
+        self.suppressed = 0
+
+    @classmethod
+    def from_config(cls, settings: dict) -> "TrackRegistry":
+        """Build a registry from the ``TRACK_ALERTS`` config section."""
+        return cls(
+            realert_after=settings.get("realert_after"),
+            expire_after=settings.get("expire_after", 60.0),
+        )
+
+    def update(
+        self, camera_index: int, track_ids: list[int], now: float | None = None
+    ) -> list[int]:
+        """Record the camera's current person tracks; return those that alert."""
+        now = time.monotonic() if now is None else now
+        records = self.tracks.setdefault(camera_index, {})
+        self.expire(camera_index, now)
+
+        alerting = []
+        for track_id in track_ids:
+            record = records.get(track_id)
+            if record is None:
+                records[track_id] = TrackRecord(now, now, now)
+                alerting.append(track_id)
+                continue
+            record.last_seen = now
+            if (
+                self.realert_after is not None
+                and now - record.last_alert >= self.realert_after
+            ):
+                record.last_alert = now
+                alerting.append(track_id)
+
+        if track_ids:
+            self.alerts += bool(alerting)
+            self.suppressed += not alerting
+        return alerting
+
+    def expire(self, camera_index: int, now: float | None = None) -> None:
+        """Forget tracks of ``camera_index`` not seen for ``expire_after``."""
+        now = time.monotonic() if now is None else now
+        records = self.tracks.get(camera_index, {})
+        for track_id in [
+            t for t, r in records.items() if now - r.last_seen > self.expire_after
+        ]:
+            del records[track_id]
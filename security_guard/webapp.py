@@ -1,7 +1,6 @@
 import base64
 import os
 import threading
-import time
 from datetime import datetime
 
 import cv2
@@ -18,6 +17,7 @@ from flask import (
 )
 
 from . import config
+from .annotate import annotator, latest_boxes, snapshot_encoder, timestamp_overlay
 from .config import logger
 
 app = Flask(__name__)
@@ -420,24 +420,33 @@ RECORDINGS_PAGE = """<!doctype html>
 
 
 def generate_frames():
-    """MJPEG stream generator – uses the global latest_frames[0] in config."""
+    """MJPEG stream generator – subscribes to camera 0's frame bus."""
     global stream_active
-    while stream_active:
-        with config.camera_locks.get(0, threading.Lock()):
-            frame = config.latest_frames.get(0)
-            if frame is None:
-                time.sleep(0.05)
-                continue
-            ret, buffer = cv2.imencode(".jpg", frame)
+    bus = config.frame_buses.get(0)
+    if bus is None:
+        return
+
+    # Newest frame only; a slow client skips frames instead of lagging behind
+    subscription = bus.subscribe("live", rate=config.FPS)
+    overlay = None  # Annotated copy, reused for every frame of this client
+    try:
+        while stream_active:
+            with subscription.next(timeout=1.0) as frame:
+                if frame is None:
+                    continue
+                overlay = annotator.render(frame.image, latest_boxes(0), out=overlay)
+                timestamp_overlay.draw(overlay, frame.wall)
+            ret, buffer = cv2.imencode(".jpg", overlay)
             if not ret:
-                time.sleep(0.05)
                 continue
             frame_bytes = buffer.tobytes()
 
-        yield (
-            b"--frame\r\n" b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
-        )
-        time.sleep(0.05)
+            yield (
+                b"--frame\r\n"
+                b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
+            )
+    finally:
+        subscription.close()
 
 
 def run_stream_server() -> None:
@@ -507,25 +516,24 @@ def capture_photo():
         return "Unauthorized", 401
 
     cam_index = 0
-    lock = config.camera_locks.get(cam_index)
-    if lock is None:
-        return "Camera lock not found.", 500
-
-    with lock:
-        frame = config.latest_frames.get(cam_index)
-
-    if frame is None:
-        return "No frame has been captured from the camera yet.", 500
-
-    snapshots_dir = os.path.join(config.VIDEO_SAVE_DIR, "snapshots")
-    os.makedirs(snapshots_dir, exist_ok=True)
+    ring = config.frame_rings.get(cam_index)
+    if ring is None:
+        return "Camera not initialized yet.", 500
 
     filename = f"snapshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-    full_path = os.path.join(snapshots_dir, filename)
-
-    cv2.imwrite(full_path, frame)
 
-    return send_file(full_path, as_attachment=True)
+    with ring.read() as frame:
+        if frame is None:
+            return "No frame has been captured from the camera yet.", 500
+        image = annotator.render(frame.image, latest_boxes(cam_index))
+        timestamp_overlay.draw(image, frame.wall)
+
+    return send_file(
+        snapshot_encoder.file(image, filename),
+        mimetype="image/jpeg",
+        as_attachment=True,
+        download_name=filename,
+    )
 
 
 @app.route("/recordings")
@@ -644,6 +652,10 @@ def delete_recording(file_id: str):
 
     try:
         os.remove(full_path)
+        # The index keeps paths as the recorders built them
+        config.segment_index.discard(
+            os.path.join(config.VIDEO_SAVE_DIR, os.path.relpath(full_path, root_dir))
+        )
     except Exception as e:  # pragma: no cover - defensive
         logger.error(f"Recording delete error: {e}")
         return "An error occurred while deleting the recording.", 500
@@ -0,0 +1,156 @@
+import cv2
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+
+def _nms(boxes: np.ndarray, scores: np.ndarray, iou: float) -> np.ndarray:
+    """Indices of boxes kept by greedy non-maximum suppression."""
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        x1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        overlap = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[overlap < iou]
+    return np.asarray(keep, dtype=int)
+
+
+class Zone:
+    """A named polygon in full-frame pixel coordinates and the crop covering it.
+
+    The crop is the polygon's bounding rectangle grown by ``padding`` pixels
+    (people standing in a doorway stick out of it) unless ``crop`` gives an
+    explicit ``[x, y, w, h]`` rectangle.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        polygon: list[list[int]],
+        frame_size: tuple[int, int],
+        padding: int = 32,
+        crop: list[int] | None = None,
+    ) -> None:
+        width, height = frame_size
+        self.frame_size = frame_size
+        self.name = name
+        self.polygon = np.asarray(polygon, dtype=np.float32)
+        if crop is None:
+            x, y, w, h = cv2.boundingRect(self.polygon.astype(np.int32))
+            crop = [x - padding, y - padding, w + 2 * padding, h + 2 * padding]
+        x, y, w, h = crop
+        self.x0, self.y0 = max(int(x), 0), max(int(y), 0)
+        self.x1, self.y1 = min(int(x + w), width), min(int(y + h), height)
+        if self.x1 <= self.x0 or self.y1 <= self.y0:
+            raise ValueError(f"Zone {name} lies outside the frame")
+
+    @property
+    def crop_size(self) -> tuple[int, int]:
+        return self.x1 - self.x0, self.y1 - self.y0
+
+    def fit(self, w: int, h: int) -> None:
+        """Grow the crop to ``w`` x ``h`` around its centre, inside the frame."""
+        width, height = self.frame_size
+        w, h = min(w, width), min(h, height)
+        cx, cy = (self.x0 + self.x1) // 2, (self.y0 + self.y1) // 2
+        self.x0 = min(max(cx - w // 2, 0), width - w)
+        self.y0 = min(max(cy - h // 2, 0), height - h)
+        self.x1, self.y1 = self.x0 + w, self.y0 + h
+
+    def contains(self, x: float, y: float) -> bool:
+        return cv2.pointPolygonTest(self.polygon, (float(x), float(y)), False) >= 0
+
+
+class ZoneSet:
+    """Region-of-interest zones of one camera.
+
+    ``crops`` cuts the zones' rectangles out of a frame (views, no copies) so
+    that only those pixels go through the model. All crops of a set are grown
+    to the same size, so they batch at one input shape without letterbox
+    padding. ``merge`` maps the crops' detections back to full-frame
+    coordinates, removes duplicates where crops overlap and keeps only boxes
+    whose bottom centre (the feet) lies inside one of the polygons.
+    """
+
+    def __init__(self, zones: list[Zone], iou: float = 0.5) -> None:
+        if not zones:
+            raise ValueError("ZoneSet needs at least one zone")
+        self.zones = zones
+        self.iou = iou
+        w = max(zone.crop_size[0] for zone in zones)
+        h = max(zone.crop_size[1] for zone in zones)
+        for zone in zones:
+            zone.fit(w, h)
+
+    @classmethod
+    def from_config(
+        cls, settings: dict, camera_index: int, frame_size: tuple[int, int]
+    ) -> "ZoneSet | None":
+        """Build the camera's zones from the ``ZONES`` config section."""
+        padding = settings.get("padding", 32)
+        entries = settings.get("cameras", {}).get(str(camera_index), [])
+        zones = [
+            Zone(
+                entry.get("name", f"zone{i}"),
+                entry["polygon"],
+                frame_size,
+                padding=entry.get("padding", padding),
+                crop=entry.get("crop"),
+            )
+            for i, entry in enumerate(entries)
+            if entry.get("enabled", True)
+        ]
+        return cls(zones) if zones else None
+
+    def imgsz(self, max_imgsz: int) -> int:
+        """Smallest model input (multiple of 32) that fits every crop unscaled."""
+        side = max(max(zone.crop_size) for zone in self.zones)
+        return min(max_imgsz, -(-side // 32) * 32)
+
+    def crops(self, frame: np.ndarray) -> list[np.ndarray]:
+        return [frame[z.y0 : z.y1, z.x0 : z.x1] for z in self.zones]
+
+    def inside(self, xyxy: np.ndarray) -> np.ndarray:
+        """Mask of boxes whose bottom centre lies in any zone polygon."""
+        feet_x = (xyxy[:, 0] + xyxy[:, 2]) / 2
+        return np.array(
+            [
+                any(zone.contains(x, y) for zone in self.zones)
+                for x, y in zip(feet_x, xyxy[:, 3], strict=True)
+            ],
+            dtype=bool,
+        )
+
+    def merge(self, frame: np.ndarray, results: list) -> Results:
+        """Combine per-crop ``Results`` into one full-frame ``Results``."""
+        rows = []
+        for zone, result in zip(self.zones, results, strict=True):
+            data = result.boxes.data.cpu().numpy()
+            if len(data):
+                data = data.copy()
+                data[:, [0, 2]] += zone.x0
+                data[:, [1, 3]] += zone.y0
+                rows.append(data)
+
+        data = np.concatenate(rows) if rows else np.zeros((0, 6), np.float32)
+        if len(data):
+            data = data[self.inside(data[:, :4])]
+        if len(data) > 1:
+            # Offset boxes by class so only same-class duplicates suppress
+            offset = data[:, 5:6] * 4096
+            data = data[_nms(data[:, :4] + offset, data[:, 4], self.iou)]
+
+        return Results(
+            frame,
+            path="",
+            names=results[0].names,
+            boxes=torch.as_tensor(data, dtype=torch.float32),
+        )
@@ -0,0 +1,31 @@
+import cv2
+import numpy as np
+import pytest
+
+from security_guard.annotate import SnapshotEncoder
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (480, 640, 3), np.uint8)
+
+
+def test_bytes_match_imwrite(frame, tmp_path):
+    path = str(tmp_path / "alert.jpg")
+    cv2.imwrite(path, frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    with open(path, "rb") as f:
+        assert SnapshotEncoder(80).encode(frame) == f.read()
+
+
+@pytest.mark.parametrize("max_width, shape", [(320, (240, 320)), (1280, (480, 640))])
+def test_max_width_downscales_wider_frames(frame, max_width, shape):
+    data = SnapshotEncoder(90, max_width).encode(frame)
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape[:2] == shape
+
+
+def test_file_is_named_for_telegram(frame):
+    data = SnapshotEncoder().file(frame, "alert.jpg")
+    assert data.name == "alert.jpg"
+    assert data.getvalue()[:2] == b"\xff\xd8"
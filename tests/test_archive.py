@@ -0,0 +1,77 @@
+import os
+import zipfile
+
+import numpy as np
+import pytest
+
+from security_guard.archive import export_parts, plan_parts
+
+KB = 1024
+
+
+@pytest.fixture
+def recordings(tmp_path):
+    """Incompressible placeholder files, 8 minutes of 2 cameras."""
+    rng = np.random.default_rng(0)
+    root = tmp_path / "recordings"
+    files = []
+    for cam in range(2):
+        folder = root / str(cam) / "2026" / "01" / "01" / "12"
+        folder.mkdir(parents=True)
+        for m in range(8):
+            path = folder / f"{m:02d}.avi"
+            path.write_bytes(rng.bytes(100 * KB))
+            files.append(str(path))
+    return str(root), files
+
+
+def names(files: list[str], root: str) -> list[str]:
+    return [os.path.relpath(path, root).replace(os.sep, "/") for path in files]
+
+
+def test_plan_keeps_order_and_part_size(recordings):
+    root, files = recordings
+    parts = plan_parts(files, root, 350 * KB)
+    assert [len(part) for part in parts] == [3, 3, 3, 3, 3, 1]
+    assert [name for part in parts for _, name in part] == names(files, root)
+    # Minute names alone collide between cameras
+    assert parts[0][0][1] == "0/2026/01/01/12/00.avi"
+
+
+def test_plan_leaves_out_a_vanished_file(recordings):
+    root, files = recordings
+    gone = os.path.join(root, "0", "2026", "01", "01", "13", "00.avi")
+    parts = plan_parts([files[0], gone, files[1]], root, 10 * 2**20)
+    assert parts == [list(zip(files[:2], names(files[:2], root), strict=True))]
+
+
+def test_oversize_file_gets_its_own_part(recordings):
+    root, files = recordings
+    parts = plan_parts(files[:3], root, 50 * KB)
+    assert [len(part) for part in parts] == [1, 1, 1]
+
+
+def test_exported_parts_hold_every_file_once(recordings, tmp_path):
+    root, files = recordings
+    out = tmp_path / "out"
+    out.mkdir()
+    max_bytes = 350 * KB
+    parts = list(export_parts(files, root, "download", str(out), max_bytes))
+    assert os.path.basename(parts[0]) == "download.part1of6.zip"
+
+    archived = []
+    for part in parts:
+        assert os.path.getsize(part) <= max_bytes
+        with zipfile.ZipFile(part) as archive:
+            assert archive.testzip() is None
+            assert {info.compress_type for info in archive.infolist()} == {
+                zipfile.ZIP_STORED
+            }
+            archived += archive.namelist()
+    assert archived == names(files, root)
+
+
+def test_single_part_has_no_part_suffix(recordings, tmp_path):
+    root, files = recordings
+    (part,) = export_parts(files, root, "download", str(tmp_path), 10 * 2**20)
+    assert os.path.basename(part) == "download.zip"
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from security_guard.bus import DropQueue
+
+
+def test_drop_oldest_keeps_newest_items():
+    dropped = []
+    queue = DropQueue(maxsize=2, policy="drop_oldest", on_drop=dropped.append)
+    assert all(queue.put(item) for item in (1, 2, 3, 4))
+    assert [queue.get(timeout=0), queue.get(timeout=0)] == [3, 4]
+    assert dropped == [1, 2]
+    assert (queue.dropped, queue.delivered, queue.high_water) == (2, 2, 2)
+
+
+def test_drop_newest_keeps_items_from_before_the_stall():
+    dropped = []
+    queue = DropQueue(maxsize=2, policy="drop_newest", on_drop=dropped.append)
+    assert [queue.put(item) for item in (1, 2, 3, 4)] == [True, True, False, False]
+    assert [queue.get(timeout=0), queue.get(timeout=0)] == [1, 2]
+    assert dropped == [3, 4]
+    assert queue.dropped == 2
+
+
+def test_drop_oldest_on_demand_and_count_drop():
+    dropped = []
+    queue = DropQueue(maxsize=3, policy="drop_newest", on_drop=dropped.append)
+    assert not queue.drop_oldest()
+    queue.put(1)
+    queue.put(2)
+    assert queue.drop_oldest()
+    queue.count_drop()
+    assert dropped == [1]
+    assert queue.dropped == 2
+    assert len(queue) == 1
+
+
+def test_get_blocks_until_put_or_timeout():
+    queue = DropQueue()
+    assert queue.get(timeout=0.01) is None
+
+    got = []
+    consumer = threading.Thread(target=lambda: got.append(queue.get(timeout=5)))
+    consumer.start()
+    queue.put("frame")
+    consumer.join(timeout=5)
+    assert got == ["frame"]
+
+
+def test_close_wakes_consumers_and_releases_items():
+    dropped = []
+    queue = DropQueue(maxsize=2, on_drop=dropped.append)
+    queue.put(1)
+    queue.close()
+    assert dropped == [1]
+    assert queue.get(timeout=5) is None
+    assert not queue.put(2)
+    assert dropped == [1, 2]
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"policy": "drop_random"}, {"maxsize": 0}], ids=["policy", "maxsize"]
+)
+def test_rejects_bad_settings(kwargs):
+    with pytest.raises(ValueError):
+        DropQueue(**kwargs)
@@ -0,0 +1,83 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+from security_guard.clips import ClipExporter, transcode, video_bitrate
+
+MB = 2**20
+
+
+@pytest.mark.parametrize("seconds", [0.5, 1, 10, 60, 300, 3600])
+def test_video_bitrate_fits_the_budget(seconds):
+    bitrate = video_bitrate(seconds, 45 * MB, None)
+    assert bitrate * max(seconds, 1) / 8 <= 45 * MB * 0.97 + 1
+
+
+def test_video_bitrate_caps_short_clips():
+    assert video_bitrate(10, 45 * MB, 2000) == 2_000_000
+    assert video_bitrate(3600, 45 * MB, 2000) < 2_000_000
+
+
+@pytest.fixture
+def ffmpeg(tmp_path):
+    """A stand-in for ffmpeg that records its arguments and writes the output."""
+    script = tmp_path / "ffmpeg"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import json, sys\n"
+        f"with open({str(tmp_path / 'argv.json')!r}, 'w') as f:\n"
+        "    json.dump(sys.argv[1:], f)\n"
+        "with open(sys.argv[-1], 'wb') as f:\n"
+        "    f.write(b'mp4')\n"
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+def run(ffmpeg, tmp_path, **options) -> list[str]:
+    listing = tmp_path / "clip.ffconcat"
+    listing.write_text("ffconcat version 1.0\n")
+    output, _ = transcode(
+        str(listing), 300, {"ffmpeg": ffmpeg, "folder": str(tmp_path), **options}
+    )
+    with open(output, "rb") as f:
+        assert f.read() == b"mp4"
+    os.remove(output)
+    with open(tmp_path / "argv.json") as f:
+        return json.load(f)
+
+
+def option(argv: list[str], name: str) -> str | None:
+    return argv[argv.index(name) + 1] if name in argv else None
+
+
+def test_transcode_at_the_budget_bitrate(ffmpeg, tmp_path):
+    argv = run(ffmpeg, tmp_path, max_mb=10, max_kbps=None)
+    bitrate = str(video_bitrate(300, 10 * MB, None))
+    assert option(argv, "-b:v") == option(argv, "-maxrate") == bitrate
+    assert option(argv, "-bufsize") == bitrate
+    assert option(argv, "-crf") is None
+    assert option(argv, "-vf") is None
+
+
+def test_idle_speedup_encodes_at_crf_under_the_cap(ffmpeg, tmp_path):
+    argv = run(ffmpeg, tmp_path, max_mb=10, idle_speedup=4, crf=28, width=640)
+    assert option(argv, "-crf") == "28"
+    assert option(argv, "-b:v") is None
+    assert option(argv, "-maxrate") == str(video_bitrate(300, 10 * MB, 2000))
+    assert option(argv, "-vf") == (
+        "mpdecimate=max=3,setpts=N/FRAME_RATE/TB,scale=640:-2"
+    )
+
+
+@pytest.mark.skipif(not hasattr(os, "nice"), reason="no os.nice")
+def test_export_workers_run_at_lower_priority():
+    exporter = ClipExporter({"nice": 5})
+    try:
+        niceness = exporter.pool.submit(os.nice, 0).result()
+    finally:
+        exporter.pool.shutdown()
+    assert niceness == min(os.nice(0) + 5, 19)
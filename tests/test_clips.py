@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+import types
+
+import pytest
+
+from security_guard.clips import ClipBuilder
+
+FPS = 25.0
+
+
+def placeholder(root, name: str) -> str:
+    path = os.path.join(str(root), name)
+    open(path, "wb").close()
+    return path
+
+
+@pytest.fixture
+def builder(tmp_path):
+    return ClipBuilder(window=300.0, fps=FPS, folder=str(tmp_path))
+
+
+def test_manifest_lists_the_window_with_frame_based_seconds(builder, tmp_path):
+    now = time.time()
+    expected, seconds = [], 0.0
+    for m in range(8):
+        start = now - (8 - m) * 60
+        # Every third file is short of frames (dropped frames or an
+        # events-mode file held open between events)
+        frames = 1000 if m % 3 == 0 else 1500
+        path = placeholder(tmp_path, f"{m:02d}.avi")
+        builder.opened(path, start)
+        if m < 7:
+            builder.closed(path, start, start + 59.9, frames)
+        else:
+            builder.writer = types.SimpleNamespace(path=path, frames=frames)
+        if start + 59.9 >= now - builder.window:
+            expected.append(os.path.abspath(path))
+            seconds += frames / FPS
+
+    entries, covered = builder.entries()
+    assert [entry.split("'")[1] for entry in entries] == expected
+    assert covered == pytest.approx(seconds)
+    # Closed files carry their content length, the open one has none yet:
+    # the first one in the window is short of frames
+    assert entries[0].endswith("duration 40.000\n")
+    assert "duration" not in entries[-1]
+
+
+def test_files_past_the_window_are_dropped(tmp_path):
+    builder = ClipBuilder(window=270.0, fps=FPS)
+    now = time.time()
+    for m in range(10):
+        start = now - (10 - m) * 60
+        path = placeholder(tmp_path, f"{m:02d}.avi")
+        builder.opened(path, start)
+        builder.closed(path, start, start + 59.9, 1500)
+    # Files ending more than 270 s before the last close are gone
+    assert len(builder.segments) == 5
+
+
+def test_missing_open_file_is_left_out(builder, tmp_path):
+    now = time.time()
+    path = placeholder(tmp_path, "00.avi")
+    builder.opened(path, now - 120)
+    builder.closed(path, now - 120, now - 60, 1500)
+    builder.opened(os.path.join(str(tmp_path), "01.avi"), now - 60)
+    entries, seconds = builder.entries()
+    assert len(entries) == 1
+    assert seconds == 60.0
+
+
+def test_concurrent_snapshots_get_their_own_manifest(builder, tmp_path):
+    assert builder.snapshot() is None
+    now = time.time()
+    path = placeholder(tmp_path, "00.avi")
+    builder.opened(path, now - 60)
+    builder.closed(path, now - 60, now, 1500)
+
+    listings: list[str] = []
+    lock = threading.Lock()
+
+    def request() -> None:
+        for _ in range(20):
+            listing, _ = builder.snapshot()
+            with lock:
+                listings.append(listing)
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(listings)) == len(listings) == 80
+    with open(listings[0], encoding="utf-8") as f:
+        assert f.read().startswith("ffconcat version 1.0\nfile '")
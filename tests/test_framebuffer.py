@@ -0,0 +1,79 @@
+import pytest
+
+from security_guard.framebuffer import FrameRing
+
+
+def publish(ring: FrameRing, value: int) -> int:
+    slot = ring.writable_slot()
+    assert slot is not None
+    slot[:] = value
+    return ring.publish(monotonic=float(value), wall=1000.0 + value)
+
+
+def test_read_returns_newest_frame_read_only():
+    ring = FrameRing((2, 2, 3), slots=4)
+    with ring.read() as frame:
+        assert frame is None
+
+    publish(ring, 1)
+    seq = publish(ring, 2)
+    with ring.read() as frame:
+        assert frame.seq == seq == 1
+        assert (frame.image == 2).all()
+        assert (frame.monotonic, frame.wall) == (2.0, 1002.0)
+        with pytest.raises(ValueError):
+            frame.image[0, 0, 0] = 0
+
+
+def test_pinned_frame_survives_any_number_of_writes():
+    ring = FrameRing((2, 2, 3), slots=3)
+    publish(ring, 1)
+    with ring.read() as pinned:
+        for value in range(2, 20):
+            publish(ring, value)
+        assert ring.is_current(pinned)
+        assert (pinned.image == 1).all()
+    assert ring.seq == 18
+
+
+def test_no_writable_slot_when_every_other_slot_is_pinned():
+    ring = FrameRing((2, 2, 3), slots=3)
+    publish(ring, 1)
+    with ring.read() as first:
+        publish(ring, 2)
+        with ring.read() as second:
+            publish(ring, 3)
+            # Newest frame and two pinned frames: nothing left to overwrite
+            assert ring.writable_slot() is None
+            assert (first.image == 1).all() and (second.image == 2).all()
+        assert ring.writable_slot() is not None
+
+
+def test_pin_recycled_frame_yields_none():
+    ring = FrameRing((2, 2, 3), slots=3)
+    publish(ring, 1)
+    old = ring.latest()
+    for value in range(2, 5):
+        publish(ring, value)
+    assert not ring.is_current(old)
+    with ring.pin(old) as frame:
+        assert frame is None
+
+    current = ring.latest()
+    with ring.pin(current) as frame:
+        assert frame is current
+        for value in range(5, 10):
+            publish(ring, value)
+        assert ring.is_current(current)
+
+
+def test_publish_without_reserved_slot():
+    ring = FrameRing((2, 2, 3), slots=3)
+    with pytest.raises(RuntimeError):
+        ring.publish()
+
+
+def test_needs_three_slots():
+    with pytest.raises(ValueError):
+        FrameRing((2, 2, 3), slots=2)
+    assert FrameRing((2, 2, 3), slots=3).latest() is None
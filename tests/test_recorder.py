@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+
+from security_guard.recorder import SegmentWriter
+
+MINUTE = 29_000_000  # Minutes since the epoch (February 2025)
+
+
+@pytest.fixture
+def writer(tmp_path):
+    opened, closed = [], []
+    writer = SegmentWriter(
+        lambda ts: os.path.join(str(tmp_path), ts.strftime("%H/%M.avi")),
+        fps=4,
+        frame_size=(32, 24),
+        preopen=5.0,
+        on_open=lambda *args: opened.append(args),
+        on_close=lambda *args: closed.append(args),
+    )
+    writer.codecs = ["MJPG"]
+    writer.opened, writer.closed = opened, closed
+    yield writer
+    writer.close()
+
+
+def write(writer: SegmentWriter, walls: list[float]) -> None:
+    image = np.zeros((24, 32, 3), np.uint8)
+    for wall in walls:
+        writer.write(image, wall)
+
+
+def test_files_are_cut_on_the_minute_edges_of_capture_time(writer):
+    start = MINUTE * 60 + 0.5
+    # 4 fps for three minutes, written late in one burst
+    write(writer, [start + i / 4 for i in range(3 * 240 - 2)])
+    writer.close()
+    assert [os.path.exists(path) for path, _ in writer.opened] == [True] * 3
+    frames = [file[-1] for file in writer.closed]
+    assert frames == [238, 240, 240]
+    # First and last capture times of each file, inside its minute
+    for _, first, last, _ in writer.closed:
+        assert first // 60 == last // 60
+    assert writer.rollovers == 2
+
+
+def test_a_minute_without_frames_leaves_no_file(writer, tmp_path):
+    base = MINUTE * 60
+    # The next minute is opened ahead, then the camera stalls past it
+    write(writer, [base + 50, base + 58, base + 130])
+    writer.close()
+    files = [name for _, _, names in os.walk(str(tmp_path)) for name in names]
+    assert len(files) == 2
+    assert [file[-1] for file in writer.closed] == [2, 1]
+
+
+def test_clock_stepping_back_keeps_the_open_file(writer):
+    base = MINUTE * 60
+    write(writer, [base + 70, base + 80, base + 30, base + 90])
+    writer.close()
+    assert len(writer.opened) == 1
+    assert writer.closed[0][-1] == 4
@@ -0,0 +1,75 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from security_guard.recordings import SegmentIndex
+
+# The recorder's <camera>/<year>/<month>/<day>/<hour>/<minute>.avi layout
+LAYOUT = os.path.join("%Y", "%m", "%d", "%H", "%M.avi")
+FIRST = datetime(2025, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SegmentIndex(str(tmp_path / "segments.db"))
+    yield index
+    index.close()
+
+
+def segment_path(root, camera: int, minute: datetime) -> str:
+    return os.path.join(str(root), str(camera), minute.strftime(LAYOUT))
+
+
+def record(index, root, camera: int, minutes: int, closed: bool = True) -> list:
+    """Index ``minutes`` files the way a recorder does, 0.4 s into the minute."""
+    paths = []
+    for m in range(minutes):
+        minute = FIRST + timedelta(minutes=m)
+        path = segment_path(root, camera, minute)
+        opened = minute.timestamp() + 0.4
+        index.opened(camera, path, opened)
+        if closed:
+            index.closed(camera, path, opened, opened + 59.5, 1487)
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize("span", [1, 5, 60])
+def test_find_includes_both_end_minutes(index, tmp_path, span):
+    paths = record(index, tmp_path, 0, 120)
+    begin = FIRST + timedelta(minutes=30)
+    end = begin + timedelta(minutes=span - 1)
+    assert index.paths(begin, end, 0) == paths[30 : 30 + span]
+
+
+def test_find_includes_files_being_written(index, tmp_path):
+    paths = record(index, tmp_path, 0, 3)
+    (live,) = record(index, tmp_path, 1, 1, closed=False)
+    found = {s.path: s for s in index.find(FIRST, FIRST + timedelta(minutes=2))}
+    assert sorted(found) == sorted([*paths, live])
+    assert found[live].end is None
+
+
+def test_find_filters_by_camera(index, tmp_path):
+    cam0 = record(index, tmp_path, 0, 5)
+    cam1 = record(index, tmp_path, 1, 5)
+    end = FIRST + timedelta(minutes=4)
+    assert index.paths(FIRST, end, 0) == cam0
+    assert index.paths(FIRST, end, 1) == cam1
+    assert len(index.paths(FIRST, end)) == 10
+
+
+def test_rebuild_keeps_files_being_written(index, tmp_path):
+    for m in range(3):
+        path = segment_path(tmp_path, 0, FIRST + timedelta(minutes=m))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "wb").close()
+    (live,) = record(index, tmp_path, 0, 1, closed=False)
+
+    assert index.index_existing(str(tmp_path)) == 2
+    found = index.find(FIRST, FIRST + timedelta(minutes=2), 0)
+    assert [segment.end is None for segment in found] == [True, False, False]
+    assert found[0].path == live
+    # Done once: a later start does not walk the folder again
+    assert index.index_existing(str(tmp_path)) == 0
@@ -0,0 +1,131 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from security_guard.recordings import SegmentIndex
+from security_guard.retention import DAY, GB, RetentionManager
+
+LAYOUT = os.path.join("%Y", "%m", "%d", "%H", "%M.avi")
+SIZE = 64 * 1024
+COUNT = 30
+BATCH = 4
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SegmentIndex(str(tmp_path / "segments.db"))
+    yield index
+    index.close()
+
+
+def populate(root, index: SegmentIndex, cameras: int) -> dict[int, list[str]]:
+    """Sparse placeholder files, one per minute, the newest 30 s old."""
+    now = time.time()
+    paths: dict[int, list[str]] = {}
+    for cam in range(cameras):
+        paths[cam] = []
+        for m in range(COUNT):
+            start = now - (COUNT - m) * 60 + 30
+            path = os.path.join(
+                str(root), str(cam), datetime.fromtimestamp(start).strftime(LAYOUT)
+            )
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.truncate(SIZE)
+            index.opened(cam, path, start)
+            index.closed(cam, path, start, start + 59.5, 1487)
+            paths[cam].append(path)
+    return paths
+
+
+def manager(index, root, **settings) -> RetentionManager:
+    settings = {"warn_free_gb": None, "batch": BATCH, "pause": 0, **settings}
+    return RetentionManager(index, str(root), settings)
+
+
+def left(paths: list[str]) -> int:
+    """How many files are left; they must be the newest ones."""
+    kept = [path for path in paths if os.path.exists(path)]
+    assert kept == paths[len(paths) - len(kept) :]
+    return len(kept)
+
+
+def assert_consistent(root, index: SegmentIndex, cameras: int) -> None:
+    for cam in range(cameras):
+        folder = os.path.join(str(root), str(cam))
+        on_disk = [
+            os.path.join(path, name)
+            for path, _, names in os.walk(folder)
+            for name in names
+        ]
+        assert index.usage.get(cam, 0) == sum(map(os.path.getsize, on_disk))
+        indexed = index.oldest(10 * COUNT, cam)
+        assert sorted(segment.path for segment in indexed) == sorted(on_disk)
+        assert not [path for path, dirs, names in os.walk(folder) if not dirs + names]
+
+
+def test_camera_max_gb_deletes_its_oldest_files(index, tmp_path):
+    paths = populate(tmp_path, index, 2)
+    retention = manager(index, tmp_path, cameras={"0": {"max_gb": 10.5 * SIZE / GB}})
+    retention.enforce()
+    # Oldest first in whole batches until at most 10 files are left
+    assert (left(paths[0]), left(paths[1])) == (10, COUNT)
+    assert retention.deleted_bytes == 20 * SIZE
+    assert_consistent(tmp_path, index, 2)
+
+
+def test_max_days_per_camera_and_global(index, tmp_path):
+    paths = populate(tmp_path, index, 2)
+    retention = manager(
+        index,
+        tmp_path,
+        max_days=20 * 60 / DAY,
+        cameras={"1": {"max_days": 5 * 60 / DAY}},
+    )
+    retention.enforce()
+    assert (left(paths[0]), left(paths[1])) == (20, 5)
+    assert_consistent(tmp_path, index, 2)
+
+
+def test_global_max_gb_takes_the_oldest_files_overall(index, tmp_path):
+    paths = populate(tmp_path, index, 2)
+    # Camera 1 is trimmed to 10 files first, then 8 more have to go
+    retention = manager(
+        index,
+        tmp_path,
+        max_gb=32.5 * SIZE / GB,
+        cameras={"1": {"max_days": 10 * 60 / DAY}},
+    )
+    retention.enforce()
+    assert (left(paths[0]), left(paths[1])) == (22, 10)
+    assert index.total == 32 * SIZE
+    assert_consistent(tmp_path, index, 2)
+
+
+def test_free_space_floor_and_a_single_warning(index, tmp_path):
+    paths = populate(tmp_path, index, 1)
+    capacity = 2 * COUNT * SIZE
+    warnings: list[str] = []
+
+    class SimulatedDisk(RetentionManager):
+        """A disk that fills up with the recordings alone."""
+
+        def free(self) -> int:
+            return capacity - self.index.total
+
+    settings = {
+        "min_free_gb": (2 * COUNT - 10 - 0.5) * SIZE / GB,
+        "warn_free_gb": capacity / GB,
+        "batch": BATCH,
+        "pause": 0,
+    }
+    retention = SimulatedDisk(index, str(tmp_path), settings, notify=warnings.append)
+    retention.enforce()
+    retention.enforce()
+    assert left(paths[0]) == 10
+    assert_consistent(tmp_path, index, 1)
+    # Still below warn_free_gb, but warned once per warn_every
+    assert len(warnings) == 1
+    assert "almost full" in warnings[0]
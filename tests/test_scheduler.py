@@ -0,0 +1,78 @@
+import pytest
+
+from security_guard.scheduler import DetectionScheduler
+
+
+def run(scheduler: DetectionScheduler, seconds: float, fps: float = 25.0) -> list:
+    """Offer every due camera on each tick of a virtual clock."""
+    admitted = []
+    cameras = list(scheduler.last_inference)
+    for tick in range(int(seconds * fps)):
+        now = tick / fps
+        due = [idx for idx in cameras if scheduler.due(idx, now)]
+        admitted += [(now, idx) for idx in scheduler.admit(due, now)]
+    return admitted
+
+
+def test_never_exceeds_the_global_budget():
+    scheduler = DetectionScheduler(list(range(8)), max_ips=10, active_fps=10)
+    for idx in range(8):
+        scheduler.note_activity(idx, 0.0)
+    admitted = run(scheduler, 20)
+    times = [now for now, _ in admitted]
+    for start in times:
+        assert sum(start <= t < start + 1.0 for t in times) <= 10
+    assert scheduler.deferred > 0
+
+
+def test_idle_cameras_keep_their_floor_under_load():
+    scheduler = DetectionScheduler(
+        list(range(6)), max_ips=12, active_fps=10, idle_fps=1, hold=1000
+    )
+    # Cameras 0 and 1 are busy and would take the whole budget; they share
+    # what is left after every camera's idle floor
+    scheduler.note_activity(0, 0.0)
+    scheduler.note_activity(1, 0.0)
+    run(scheduler, 30)
+    for idx in range(2, 6):
+        assert scheduler.max_gap[idx] <= scheduler.ttfd_bound + 0.05
+        assert scheduler.inferences[idx] >= 29
+    assert scheduler.inferences[0] > 3 * scheduler.inferences[2]
+
+
+def test_floor_cameras_are_admitted_first():
+    scheduler = DetectionScheduler([0, 1, 2], max_ips=3, active_fps=10, idle_fps=1)
+    scheduler.note_activity(0, 0.0)
+    scheduler.last_inference.update({0: 9.0, 1: 8.0, 2: 9.5})
+    # One slot left in this second: the camera waiting longest past its floor
+    scheduler._admitted.extend([9.8, 9.8])
+    assert scheduler.admit([0, 1, 2], 10.0) == [1]
+
+
+def test_rate_decays_from_active_to_idle():
+    scheduler = DetectionScheduler([0], max_ips=10, active_fps=8, idle_fps=1)
+    assert scheduler.rate(0, 0.0) == 1
+    scheduler.note_activity(0, 100.0)
+    assert scheduler.rate(0, 104.0) == 8
+    assert scheduler.rate(0, 110.0) == pytest.approx(4)
+    assert scheduler.rate(0, 1000.0) == 1
+
+    scheduler.last_inference[0] = 104.0
+    assert not scheduler.due(0, 104.1)
+    assert scheduler.due(0, 104.125)
+
+
+def test_idle_floor_is_lowered_to_fit_the_budget():
+    scheduler = DetectionScheduler(list(range(10)), max_ips=5, idle_fps=1)
+    assert scheduler.idle_fps == 0.5
+    assert scheduler.ttfd_bound == 2.0
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"max_ips": 0}, {"idle_fps": 0}, {"idle_fps": 20, "active_fps": 10}],
+    ids=["budget", "idle", "idle above active"],
+)
+def test_rejects_bad_settings(kwargs):
+    with pytest.raises(ValueError):
+        DetectionScheduler([0], **{"max_ips": 10, **kwargs})
@@ -0,0 +1,46 @@
+from security_guard.tracking import TrackRegistry
+
+
+def test_track_alerts_once_while_present():
+    registry = TrackRegistry()
+    assert registry.update(0, [1], 0.0) == [1]
+    for step in range(1, 50):
+        assert registry.update(0, [1], step * 0.1) == []
+    assert registry.update(0, [1, 2], 5.0) == [2]
+    assert (registry.alerts, registry.suppressed) == (2, 49)
+
+
+def test_untracked_detections_do_not_alert():
+    registry = TrackRegistry()
+    assert registry.update(0, [], 0.0) == []
+    assert (registry.alerts, registry.suppressed) == (0, 0)
+
+
+def test_realert_after_for_someone_lingering():
+    registry = TrackRegistry(realert_after=30.0)
+    assert registry.update(0, [7], 0.0) == [7]
+    assert registry.update(0, [7], 29.0) == []
+    assert registry.update(0, [7], 30.0) == [7]
+    assert registry.update(0, [7], 45.0) == []
+
+
+def test_expired_track_alerts_again():
+    registry = TrackRegistry(expire_after=60.0)
+    registry.update(0, [3], 0.0)
+    assert registry.update(0, [3], 60.0) == []
+    # Last seen at 60 s; a recycled ID after more than a minute is new
+    assert registry.update(0, [3], 121.0) == [3]
+
+
+def test_cameras_keep_separate_tracks():
+    registry = TrackRegistry()
+    assert registry.update(0, [1], 0.0) == [1]
+    assert registry.update(1, [1], 0.0) == [1]
+    registry.expire(0, 100.0)
+    assert registry.tracks[0] == {}
+    assert list(registry.tracks[1]) == [1]
+
+
+def test_from_config():
+    registry = TrackRegistry.from_config({"realert_after": 300})
+    assert (registry.realert_after, registry.expire_after) == (300, 60.0)